@@ -12,6 +12,9 @@ class InferenceConfig(BaseModel):
     post_top_p: float = Field(default=0.75, description="포스트 생성 top_p - 다양성 제어")
     post_top_k: int = Field(default=1, description="포스트 생성 top_k - 토큰 선택 범위")
     post_stop_tokens: List[str] = Field(default=["</s>", "<|endoftext|>", "\n\n"], description="포스트 생성 중지 토큰")
+    post_chunk_concurrency: int = Field(default=4, description="긴 포스트 청크 동시 변환 수")
+    post_candidates: int = Field(default=1, description="포스트 요청당 후보 생성 수 (vLLM n, 1이면 후보 선택 없음)")
+    post_candidate_top_k: int = Field(default=20, description="후보 생성 시 top_k (top_k=1이면 후보가 모두 같아짐)")
     
     # 댓글 생성용 파라미터
     comment_max_tokens: int = Field(default=200, description="댓글 생성 최대 토큰 수")
@@ -26,6 +29,18 @@ class InferenceConfig(BaseModel):
     chat_top_p: float = Field(default=0.75, description="채팅 생성 top_p - 다양성 제어")
     chat_top_k: int = Field(default=1, description="채팅 생성 top_k - 토큰 선택 범위")
     chat_stop_tokens: List[str] = Field(default=["</s>", "<|endoftext|>", "\n\n"], description="채팅 생성 중지 토큰")
+    
+    # 출력 후처리 파라미터 (ai_server/util/postprocess.py)
+    postprocess_ngram: int = Field(default=3, description="반복 판단 단어 n-gram 크기")
+    postprocess_max_repeat: int = Field(default=3, description="같은 n-gram이 이 횟수만큼 나오면 반복으로 보고 자름")
+    postprocess_length_ratio: float = Field(default=3.0, description="입력 글자 수 대비 출력 최대 글자 수 비율")
+    postprocess_min_chars: int = Field(default=180, description="출력 최대 글자 수 하한")
+    
+    # 토큰 예산 파라미터 (max_tokens는 위 상한 이내에서 입력 길이에 비례)
+    tokenizer_path: Optional[str] = Field(default=None, description="토큰 계산용 토크나이저 경로 (미지정 시 vLLM 모델 경로)")
+    output_token_ratio: float = Field(default=1.5, description="입력 토큰 대비 생성 토큰 비율")
+    min_output_tokens: int = Field(default=32, description="입력 길이와 무관하게 확보할 최소 생성 토큰 수")
+    token_safety_margin: int = Field(default=8, description="모델 최대 길이 대비 여유 토큰 수")
 
 
 class Settings(BaseSettings):
@@ -45,6 +60,79 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
 
 
+class TracingConfig(BaseSettings):
+    """요청 트레이싱 설정 (환경 변수 TRACE_* 로 지정)"""
+    enabled: bool = Field(default=True, description="Server-Timing/X-Request-ID 헤더 및 구간 수집 여부")
+    export: str = Field(default="none", description="트레이스 내보내기 방식 (none, file, otlp)")
+    export_path: str = Field(default="./logs/traces.jsonl", description="file 방식 OTLP/JSON 저장 경로")
+    otlp_endpoint: str = Field(default="http://localhost:4318/v1/traces", description="otlp 방식 컬렉터 주소 (OTLP/HTTP JSON)")
+    sample_rate: float = Field(default=1.0, description="내보낼 트레이스 비율 (0~1, 헤더는 항상 추가)")
+    export_queue_size: int = Field(default=1000, description="내보내기 대기열 크기 (초과분은 버림)")
+    service_name: str = Field(default="meow-ai-server", description="OTLP service.name")
+
+    class Config:
+        env_prefix = "TRACE_"
+
+
+class AdminConfig(BaseSettings):
+    """관리자 엔드포인트/프로파일러 설정 (환경 변수 ADMIN_* 로 지정)"""
+    token: Optional[str] = Field(default=None, description="X-Admin-Token 헤더 값 (미설정 시 관리자 엔드포인트 비활성화)")
+    profile_default_rate: int = Field(default=100, description="프로파일 기본 샘플링 주기 (Hz)")
+    profile_default_duration: float = Field(default=10.0, description="프로파일 기본 수집 시간(초)")
+    profile_max_rate: int = Field(default=1000, description="허용 최대 샘플링 주기 (Hz)")
+    profile_max_duration: float = Field(default=60.0, description="허용 최대 수집 시간(초)")
+    profile_signal: bool = Field(default=False, description="SIGUSR2 수신 시 프로파일 저장 여부")
+    profile_dir: str = Field(default="./logs/profiles", description="시그널 프로파일 저장 디렉토리")
+
+    class Config:
+        env_prefix = "ADMIN_"
+
+
+class EmbeddingConfig(BaseSettings):
+    """이미지 임베딩 백엔드 설정 (환경 변수 EMBEDDING_* 로 지정)"""
+    backend: str = Field(default="local", description="임베딩 백엔드 (local: 서버 프로세스 내 CLIP, worker: 임베딩 사이드카)")
+    socket_path: str = Field(default="/tmp/meow-embedding.sock", description="임베딩 사이드카 Unix 소켓 경로")
+    workers: int = Field(default=1, description="사이드카 임베딩 워커 프로세스 수")
+    timeout: float = Field(default=10.0, description="사이드카 요청 타임아웃(초)")
+    embedder: str = Field(default="ai_server.model.embedding_worker:load_clip_embedder", description="사이드카 임베더 팩토리 (module:function)")
+    restart_backoff_initial: float = Field(default=0.5, description="사이드카 워커 재시작 백오프 초기값(초, 연속 비정상 종료마다 2배)")
+    restart_backoff_max: float = Field(default=30.0, description="사이드카 워커 재시작 백오프 최대값(초)")
+    restart_stable_period: float = Field(default=60.0, description="이 시간 이상 동작한 워커가 죽으면 백오프 초기화(초)")
+    text_cache_size: int = Field(default=1024, description="텍스트 검색어 임베딩 LRU 캐시 크기")
+    text_batch_size: int = Field(default=32, description="텍스트 임베딩 배치 최대 크기")
+    text_batch_wait_ms: float = Field(default=5.0, description="텍스트 임베딩 배치를 모으는 최대 대기 시간(ms)")
+
+    class Config:
+        env_prefix = "EMBEDDING_"
+
+
+class WarmupConfig(BaseSettings):
+    """시작 시 워밍업/준비 상태 설정 (환경 변수 WARMUP_* 로 지정)"""
+    enabled: bool = Field(default=True, description="시작 시 서브시스템 워밍업 실행 여부 (끄면 /ready가 즉시 준비 상태)")
+    required: List[str] = Field(
+        default=["embedding", "vector_db", "tokenizer", "vllm"],
+        description="/ready가 200을 반환하기 위해 준비돼야 하는 서브시스템 (embedding, vector_db, tokenizer, vllm)"
+    )
+    retry_interval: float = Field(default=5.0, description="실패한 워밍업 재시도 간격(초)")
+    timeout: float = Field(default=600.0, description="이 시간 안에 성공하지 못하면 failed로 보고(초, 이후에도 백오프하며 계속 재시도)")
+    max_retry_interval: float = Field(default=60.0, description="제한 시간 이후 재시도 간격 상한(초, 실패마다 2배)")
+
+    class Config:
+        env_prefix = "WARMUP_"
+
+
+class FastPathConfig(BaseSettings):
+    """짧은 입력의 규칙 기반 변환 경로 설정 (환경 변수 FAST_PATH_* 로 지정)"""
+    enabled: bool = Field(default=True, description="규칙 기반 빠른 경로 사용 여부")
+    services: List[str] = Field(default=["post", "comment"], description="빠른 경로를 적용할 서비스")
+    max_chars: int = Field(default=20, description="빠른 경로 대상 입력의 최대 길이(공백 제외)")
+    max_content_chars: int = Field(default=3, description="한글 음절/영문자 등 내용 글자 최대 수 (자모/기호/이모지 제외)")
+    max_words: int = Field(default=2, description="띄어쓰기 기준 최대 단어 수")
+
+    class Config:
+        env_prefix = "FAST_PATH_"
+
+
 # 전역 추론 설정 인스턴스
 inference_config = InferenceConfig()
 
@@ -58,4 +146,34 @@ def get_inference_config() -> InferenceConfig:
 @lru_cache()
 def get_settings() -> Settings:
     """설정 인스턴스를 반환합니다. 캐시되어 재사용됩니다."""
-    return Settings() 
+    return Settings()
+
+
+@lru_cache()
+def get_tracing_config() -> TracingConfig:
+    """트레이싱 설정 인스턴스 반환"""
+    return TracingConfig()
+
+
+@lru_cache()
+def get_admin_config() -> AdminConfig:
+    """관리자 설정 인스턴스 반환"""
+    return AdminConfig()
+
+
+@lru_cache()
+def get_embedding_config() -> EmbeddingConfig:
+    """임베딩 설정 인스턴스 반환"""
+    return EmbeddingConfig()
+
+
+@lru_cache()
+def get_warmup_config() -> WarmupConfig:
+    """워밍업 설정 인스턴스 반환"""
+    return WarmupConfig()
+
+
+@lru_cache()
+def get_fast_path_config() -> FastPathConfig:
+    """빠른 경로 설정 인스턴스 반환"""
+    return FastPathConfig()
@@ -0,0 +1,63 @@
+"""
+프로세스 간 파일 잠금
+
+여러 워커 프로세스가 같은 작업(예: 이미지 DB 구축)을 동시에 하지 않도록 fcntl.flock으로 조정합니다.
+flock은 열린 파일 단위로 잠기므로 같은 프로세스의 다른 스레드끼리도 배타적으로 동작합니다.
+"""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True) -> Iterator[bool]:
+    """배타적 파일 잠금 컨텍스트 매니저
+
+    Args:
+        path: 잠금 파일 경로 (없으면 생성)
+        blocking: False면 이미 잠겨 있을 때 기다리지 않고 False를 반환
+
+    Yields:
+        잠금 획득 여부
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a+") as f:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(f.fileno(), flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def run_once(lock_path: str, marker_path: str, fingerprint: str, task: Callable[[], None]) -> bool:
+    """여러 프로세스 중 하나만 task를 실행하도록 조정
+
+    잠금을 얻은 뒤 같은 fingerprint의 완료 표시가 있으면 건너뛰고, 없으면 task 실행 후 완료 표시를 남깁니다.
+    다른 프로세스가 실행 중이면 끝날 때까지 기다렸다가 같은 확인을 거칩니다.
+    task가 예외를 던지면 완료 표시를 남기지 않고 그대로 전파하므로 다음 호출에서 다시 실행됩니다.
+
+    Returns:
+        이 프로세스에서 task를 실행했는지 여부
+    """
+    with file_lock(lock_path):
+        try:
+            with open(marker_path, "r", encoding="utf-8") as f:
+                if json.load(f).get("fingerprint") == fingerprint:
+                    return False
+        except (OSError, ValueError):
+            pass
+
+        task()
+        with open(marker_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "pid": os.getpid()}, f)
+        return True
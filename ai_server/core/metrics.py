@@ -0,0 +1,269 @@
+"""
+Prometheus 텍스트 형식 메트릭
+
+외부 의존성 없이 카운터/게이지/히스토그램을 제공합니다.
+값 갱신은 딕셔너리 조회와 락 한 번이 전부라 운영 환경에서 항상 켜둘 수 있습니다.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from ai_server.core.tracing import span
+
+LabelValues = Tuple[str, ...]
+
+# 지연 시간 히스토그램 기본 버킷(초) - 수 ms 단위 전처리부터 수십 초 vLLM 호출까지
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Metric:
+    """레이블별 값을 보관하는 메트릭 기본 클래스"""
+    metric_type = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """증감 가능한 게이지 (예: 처리 중 요청 수)"""
+    metric_type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램"""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 레이블별 [버킷별 개수..., +Inf 개수], 합계
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def get_count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """블록 실행 시간 기록 (예외가 나도 기록)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += counts[-1]
+            inf = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """메트릭 등록 및 텍스트 노출"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, description, labelnames))
+
+    def gauge(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, description, labelnames))
+
+    def histogram(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 노출 형식 (0.0.4)"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# 전역 레지스트리 및 서비스 공통 메트릭
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP 요청 수", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간", ("method", "route")
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "라우터별 처리 중인 HTTP 요청 수", ("router",)
+)
+STAGE_LATENCY = registry.histogram(
+    "stage_duration_seconds", "내부 처리 단계별 소요 시간", ("stage",)
+)
+VLLM_FAILURES = registry.counter(
+    "vllm_request_failures_total", "vLLM 요청 실패 수", ("reason",)
+)
+VLLM_CIRCUIT_STATE = registry.gauge(
+    "vllm_circuit_state", "vLLM 서킷 브레이커 상태 (0: closed, 1: half_open, 2: open)"
+)
+VLLM_DEADLINE = registry.gauge(
+    "vllm_request_deadline_seconds", "현재 vLLM 요청 데드라인 (요청 구간별)", ("workload",)
+)
+TRANSFORM_PATHS = registry.counter(
+    "transform_path_total", "변환 경로별 요청 수 (rule: 규칙 기반 빠른 경로, llm: vLLM)", ("service", "path")
+)
+CANDIDATE_SELECTIONS = registry.counter(
+    "post_candidate_selection_total", "포스트 후보 선택 결과 (accepted, best_effort, empty)", ("outcome",)
+)
+FALLBACKS = registry.counter(
+    "transform_fallback_total", "vLLM 변환 실패로 규칙 기반 변환으로 대체한 횟수", ("service", "reason")
+)
+
+
+@contextmanager
+def stage_timer(stage: str, **attributes) -> Iterator[None]:
+    """내부 처리 단계 시간 측정 컨텍스트 매니저
+
+    단계별 히스토그램에 기록하고, 요청 트레이스 안이면 같은 이름의 구간(span)도 남깁니다.
+
+    사용 예:
+        with stage_timer("prompt_build"):
+            prompt = generator.get_formatted_prompt()
+    """
+    with span(stage, **attributes), STAGE_LATENCY.time(stage=stage):
+        yield
+
+
+class MetricsMiddleware:
+    """라우터별 요청 수, 지연 시간, 처리 중 요청 수를 기록하는 ASGI 미들웨어
+
+    요청 수/지연 시간 레이블에는 실제 경로가 아니라 라우트 템플릿을 사용해 카디널리티를 제한합니다.
+    처리 중 요청 수는 라우팅 전에 알 수 있는 라우터 접두사 기준으로 집계합니다.
+    """
+
+    def __init__(self, app, router_prefixes: Sequence[str] = ()):
+        self.app = app
+        # 긴 접두사부터 비교 (예: /generate/post 가 /generate 보다 먼저)
+        self.router_prefixes = sorted(router_prefixes, key=len, reverse=True)
+
+    def _router_label(self, path: str) -> str:
+        for prefix in self.router_prefixes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return prefix
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        router = self._router_label(scope["path"])
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(router=router)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(router=router)
+            route = _route_label(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+            HTTP_LATENCY.observe(time.perf_counter() - start, method=method, route=route)
+
+
+def _route_label(scope) -> str:
+    """매칭된 라우트 템플릿 (매칭 실패 시 unmatched)"""
+    path = getattr(scope.get("route"), "path", None)
+    return path if path else "unmatched"
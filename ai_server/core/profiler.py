@@ -0,0 +1,140 @@
+"""
+프로세스 내 샘플링 프로파일러
+
+별도 스레드에서 일정 주기로 sys._current_frames()를 읽어 모든 스레드의 스택을 수집하고,
+flamegraph.pl / speedscope 에서 바로 읽을 수 있는 collapsed stack 형식으로 반환합니다.
+대상 스레드를 멈추거나 코드를 계측하지 않으므로 운영 중인 워커에서도 실행할 수 있습니다.
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from ai_server.core.config import AdminConfig, get_admin_config
+
+logger = logging.getLogger(__name__)
+
+# 대기 중인 스레드의 최상위 프레임 (include_idle=False 일 때 제외)
+IDLE_FRAMES = frozenset({
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+    ("ssl.py", "read"),
+})
+
+# 한 번에 하나의 프로파일만 실행
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """다른 프로파일이 이미 실행 중일 때 발생"""
+
+
+class SamplingProfiler:
+    """스레드 스택 샘플러
+
+    Args:
+        rate: 초당 샘플 수 (Hz)
+        duration: 수집 시간(초)
+        include_idle: 대기 중인 스레드 스택도 포함할지 여부
+    """
+
+    def __init__(self, rate: int = 100, duration: float = 10.0, include_idle: bool = False):
+        if rate <= 0 or duration <= 0:
+            raise ValueError("rate와 duration은 0보다 커야 합니다")
+        self.rate = rate
+        self.duration = duration
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        # 코드 객체별 프레임 이름 캐시 (샘플링 비용 절감)
+        self._names: Dict[object, str] = {}
+
+    def _frame_name(self, code) -> str:
+        name = self._names.get(code)
+        if name is None:
+            name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._names[code] = name
+        return name
+
+    def _sample(self, own_ident: int, thread_names: Dict[int, str]):
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            leaf = frame.f_code
+            if not self.include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                continue
+            names = []
+            while frame is not None:
+                names.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            names.append(thread_names.get(ident, f"thread-{ident}"))
+            self._stacks[";".join(reversed(names))] += 1
+
+    def run(self) -> str:
+        """duration 동안 샘플링 후 collapsed stack 문자열 반환 (호출 스레드를 점유)"""
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusyError("이미 프로파일이 실행 중입니다")
+        try:
+            own_ident = threading.get_ident()
+            interval = 1.0 / self.rate
+            deadline = time.perf_counter() + self.duration
+            next_tick = time.perf_counter()
+            while next_tick < deadline:
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+                self._sample(own_ident, thread_names)
+                self.samples += 1
+                next_tick += interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # 샘플링이 주기를 못 따라가면 밀린 틱은 버림 (부하 시 자기 조절)
+                    next_tick = time.perf_counter()
+            logger.info(f"프로파일 완료: {self.samples}회 샘플링, {len(self._stacks)}개 스택")
+            return self.collapsed()
+        finally:
+            _profile_lock.release()
+
+    def collapsed(self) -> str:
+        """collapsed stack 형식 ("frame;frame;frame count" 한 줄씩)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+def profile_to_file(rate: int, duration: float, output_dir: str) -> Optional[str]:
+    """프로파일을 실행해 output_dir에 저장하고 파일 경로 반환 (실행 중이면 None)"""
+    try:
+        result = SamplingProfiler(rate=rate, duration=duration).run()
+    except ProfilerBusyError:
+        logger.warning("이미 프로파일이 실행 중이라 요청을 무시합니다")
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(result)
+    logger.info(f"프로파일 저장: {path}")
+    return path
+
+
+def install_profile_signal_handler(config: Optional[AdminConfig] = None, signum: int = signal.SIGUSR2):
+    """시그널 수신 시 백그라운드 스레드에서 기본 설정으로 프로파일을 저장 (메인 스레드에서 호출)"""
+    config = config or get_admin_config()
+
+    def handler(signum, frame):
+        threading.Thread(
+            target=profile_to_file,
+            args=(config.profile_default_rate, config.profile_default_duration, config.profile_dir),
+            name="signal-profiler",
+            daemon=True,
+        ).start()
+
+    signal.signal(signum, handler)
+    logger.info(f"프로파일 시그널 핸들러 등록: {signal.Signals(signum).name} -> {config.profile_dir}")
@@ -0,0 +1,180 @@
+"""
+시작 워밍업 및 준비 상태(/ready)
+
+/health는 프로세스가 살아 있는지만 알려주므로, 첫 요청이 CLIP 로드/첫 추론, ChromaDB 컬렉션 열기,
+vLLM 연결 수립 비용을 떠안지 않도록 시작 시 서브시스템별 워밍업을 실행하고 그 결과를 /ready로 노출합니다.
+로드 밸런서는 /ready가 200일 때만 트래픽을 보내면 됩니다.
+
+- embedding: 더미 이미지 임베딩 + auto 분류용 프롬프트 임베딩 (local CLIP 또는 사이드카)
+- vector_db: cat/dog 컬렉션 열기
+- tokenizer: 토큰 예산 계산용 토크나이저 로드 (요청 경로에서 로드하지 않도록 스레드에서 미리 로드)
+- vllm: 레플리카별 1토큰 생성
+
+실패한 워밍업은 제한 시간까지 주기적으로 재시도합니다 (예: vLLM이 API 서버보다 늦게 뜨는 경우).
+제한 시간이 지나면 failed로 보고하되 포기하지 않고, 재시도 간격을 2배씩(상한 있음) 늘려 계속 시도하다 성공하면 ready가 됩니다.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from ai_server.core.config import WarmupConfig, get_warmup_config
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+# 인자 없는 워밍업 코루틴 함수 (반환값은 상태 detail로 노출)
+WarmupStep = Callable[[], Awaitable[object]]
+
+
+class ReadinessTracker:
+    """
+    Args:
+        required: 준비 완료로 판단하기 위해 모두 준비돼야 하는 서브시스템 이름
+    """
+
+    def __init__(self, required: Sequence[str]):
+        self.required = list(required)
+        self._status: Dict[str, Dict] = {name: self._new_status() for name in self.required}
+        self._tasks: List[asyncio.Task] = []
+
+    @staticmethod
+    def _new_status() -> Dict:
+        return {"state": PENDING, "attempts": 0, "duration_ms": None, "detail": None, "error": None}
+
+    @property
+    def ready(self) -> bool:
+        return all(self._status[name]["state"] == READY for name in self.required)
+
+    def mark_ready(self, name: str, detail: object = None):
+        """워밍업 없이 준비 상태로 표시 (워밍업 비활성화 시)"""
+        status = self._status.setdefault(name, self._new_status())
+        status.update(state=READY, detail=detail, error=None)
+
+    async def warm_up(
+        self,
+        name: str,
+        step: WarmupStep,
+        retry_interval: float = 5.0,
+        timeout: float = 600.0,
+        max_retry_interval: float = 60.0,
+    ):
+        """성공할 때까지 워밍업 재시도 (제한 시간이 지나면 failed로 보고하고 간격을 늘려 계속 재시도)"""
+        status = self._status.setdefault(name, self._new_status())
+        deadline = time.monotonic() + timeout
+        failed_retries = 0
+        while True:
+            if status["state"] != FAILED:
+                status["state"] = WARMING
+            status["attempts"] += 1
+            started = time.perf_counter()
+            try:
+                detail = await step()
+            except Exception as e:
+                status["error"] = f"{type(e).__name__}: {e}"
+                if status["state"] == FAILED or time.monotonic() + retry_interval > deadline:
+                    delay = min(retry_interval * (2 ** failed_retries), max_retry_interval)
+                    failed_retries += 1
+                    if status["state"] != FAILED:
+                        logger.error(f"{name} 워밍업 제한 시간 초과 ({status['attempts']}회 시도), 계속 재시도합니다: {e}")
+                    status["state"] = FAILED
+                else:
+                    delay = retry_interval
+                    status["state"] = PENDING
+                logger.warning(f"{name} 워밍업 실패, {delay:.0f}초 후 재시도: {e}")
+                await asyncio.sleep(delay)
+                continue
+
+            status.update(
+                state=READY,
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                detail=detail,
+                error=None,
+            )
+            logger.info(f"{name} 워밍업 완료 ({status['duration_ms']}ms)")
+            return
+
+    def start(self, steps: Dict[str, WarmupStep], config: WarmupConfig):
+        """서브시스템별 워밍업을 백그라운드로 동시에 시작 (실행 중인 이벤트 루프 필요)"""
+        unknown = [name for name in self.required if name not in steps]
+        if unknown:
+            logger.warning(f"워밍업 단계가 없는 필수 서브시스템: {unknown}")
+        loop = asyncio.get_running_loop()
+        for name, step in steps.items():
+            if not config.enabled:
+                self.mark_ready(name, detail="warmup disabled")
+                continue
+            self._tasks.append(loop.create_task(
+                self.warm_up(name, step, config.retry_interval, config.timeout, config.max_retry_interval)
+            ))
+
+    def snapshot(self) -> Dict:
+        """/ready 응답 본문"""
+        return {
+            "status": READY if self.ready else "not_ready",
+            "required": self.required,
+            "subsystems": {name: dict(status) for name, status in self._status.items()},
+        }
+
+    async def close(self):
+        """진행 중인 워밍업 취소"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+async def warm_up_embedding():
+    """CLIP(또는 사이드카) 첫 추론"""
+    from ai_server.model.image_search import get_image_search_service
+    service = await asyncio.to_thread(get_image_search_service)
+    await service.warm_up_embeddings()
+    return {"backend": "worker" if service.embedding_client is not None else "local"}
+
+
+async def warm_up_vector_db():
+    """검색 컬렉션 열기"""
+    from ai_server.model.image_search import get_image_search_service
+    service = await asyncio.to_thread(get_image_search_service)
+    return await asyncio.to_thread(service.warm_up_collections)
+
+
+async def warm_up_tokenizer():
+    """토크나이저 로드 (실패하면 추정치로 계산하므로 준비 완료로 봄)"""
+    from ai_server.util.token_budget import get_token_budgeter
+    budgeter = get_token_budgeter()
+    exact = await asyncio.to_thread(budgeter.load)
+    return {"mode": "tokenizer" if exact else "estimate", "path": budgeter.model_path}
+
+
+async def warm_up_vllm():
+    """레플리카별 1토큰 생성 (하나 이상 성공하면 준비 완료)"""
+    from ai_server.external.vLLM import get_vllm_client
+    results = await get_vllm_client().warmup()
+    if not any(results.values()):
+        raise RuntimeError("워밍업에 성공한 vLLM 레플리카가 없습니다")
+    return results
+
+
+# 서브시스템 이름 -> 워밍업 단계
+WARMUP_STEPS: Dict[str, WarmupStep] = {
+    "embedding": warm_up_embedding,
+    "vector_db": warm_up_vector_db,
+    "tokenizer": warm_up_tokenizer,
+    "vllm": warm_up_vllm,
+}
+
+_tracker: Optional[ReadinessTracker] = None
+
+
+def get_readiness_tracker() -> ReadinessTracker:
+    """공유 준비 상태 추적기 반환"""
+    global _tracker
+    if _tracker is None:
+        _tracker = ReadinessTracker(get_warmup_config().required)
+    return _tracker
@@ -0,0 +1,41 @@
+"""
+빠른 JSON 응답
+
+- FastJSONResponse: dict/list 응답용. orjson이 설치되어 있으면 orjson, 없으면 표준 json으로 직렬화합니다.
+- lean_response(): 라우터에서 직접 만든 응답 모델을 pydantic-core에서 바로 JSON 바이트로 직렬화합니다.
+  FastAPI의 response_model 재검증, 파이썬 dict 변환, json.dumps를 모두 건너뜁니다.
+
+두 경로 모두 Starlette JSONResponse와 같은 압축 UTF-8 형식이라 응답 바이트는 기존과 동일합니다.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson 기반 JSON 응답 (미설치 시 표준 json)"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def lean_response(model: BaseModel, status_code: int = 200) -> Response:
+    """직접 만든 응답 모델을 재검증 없이 바로 직렬화
+
+    Response 객체를 반환하면 FastAPI는 response_model 검증/직렬화를 하지 않습니다.
+    (pydantic v2에서는 생성 시 검증이 model_construct()보다 빠르므로 모델은 일반 생성자로 만듭니다.)
+
+    사용 예:
+        return lean_response(ChatResponse(status_code=200, message=text))
+    """
+    return Response(model.__pydantic_serializer__.to_json(model), status_code=status_code, media_type="application/json")
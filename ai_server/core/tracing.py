@@ -0,0 +1,245 @@
+"""
+요청 단위 경량 트레이싱
+
+요청마다 request ID와 트레이스를 만들고, 서비스 내부 구간(span)을 contextvars로 수집합니다.
+응답에는 구간별 소요 시간을 Server-Timing 헤더로 붙이고,
+설정 시 OTLP/JSON 형식으로 파일 또는 컬렉터(/v1/traces)에 내보냅니다.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+from ai_server.core.config import TracingConfig, get_tracing_config
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """트레이스 내 하나의 처리 구간"""
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class Trace:
+    """요청 하나의 구간 모음"""
+
+    def __init__(self, request_id: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None):
+        self.request_id = request_id
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.root = Span("request", parent_id, {})
+        self.spans: List[Span] = []
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (같은 이름의 구간은 합산)"""
+        totals: Dict[str, float] = {}
+        for item in self.spans:
+            if item.end_ns is not None:
+                totals[item.name] = totals.get(item.name, 0.0) + item.duration_ms
+        entries = [f"{name};dur={dur:.1f}" for name, dur in totals.items()]
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    """현재 요청의 request ID (트레이스 밖이면 None)"""
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """현재 요청 트레이스에 구간 기록 (트레이스가 없으면 아무것도 하지 않음)
+
+    asyncio 태스크는 생성 시점의 컨텍스트를 복사하므로 gather로 나눈 하위 작업도 같은 트레이스에 기록됩니다.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = Span(name, _current_span_id.get() or trace.root.span_id, attributes)
+    token = _current_span_id.set(current.span_id)
+    try:
+        yield current
+    except Exception as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span_id.reset(token)
+        trace.spans.append(current)
+
+
+def traced(name: str) -> Callable:
+    """함수 전체를 하나의 구간으로 기록하는 데코레이터 (동기/비동기 함수 모두 지원)"""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _parse_traceparent(value: Optional[str]):
+    """W3C traceparent 헤더에서 (trace_id, parent_span_id) 추출"""
+    if not value:
+        return None, None
+    parts = value.split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None, None
+
+
+class TraceExporter:
+    """OTLP/JSON 형식 트레이스 내보내기 (백그라운드 스레드에서 배치 처리)"""
+
+    def __init__(self, config: TracingConfig):
+        self.config = config
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=config.export_queue_size)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, trace: Trace):
+        if random.random() >= self.config.sample_rate:
+            return
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            # 내보내기가 밀리면 요청 처리를 막지 않고 버림
+            pass
+
+    def _run(self):
+        client = httpx.Client(timeout=5.0) if self.config.export == "otlp" else None
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                payload = to_otlp(batch, self.config.service_name)
+                if client is not None:
+                    client.post(self.config.otlp_endpoint, json=payload)
+                else:
+                    directory = os.path.dirname(self.config.export_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    with open(self.config.export_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            except Exception as e:
+                logger.warning(f"트레이스 내보내기 실패: {e}")
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(trace: Trace, span_: Span) -> Dict:
+    data = {
+        "traceId": trace.trace_id,
+        "spanId": span_.span_id,
+        "name": span_.name,
+        "kind": 2 if span_ is trace.root else 1,  # SERVER / INTERNAL
+        "startTimeUnixNano": str(span_.start_ns),
+        "endTimeUnixNano": str(span_.end_ns or span_.start_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span_.attributes.items()],
+    }
+    if span_.parent_id:
+        data["parentSpanId"] = span_.parent_id
+    return data
+
+
+def to_otlp(traces: List[Trace], service_name: str) -> Dict:
+    """OTLP/JSON ExportTraceServiceRequest 형식 변환"""
+    spans = [_otlp_span(trace, s) for trace in traces for s in [trace.root, *trace.spans]]
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "ai_server"}, "spans": spans}],
+        }]
+    }
+
+
+class TracingMiddleware:
+    """request ID 부여, 트레이스 수집, Server-Timing/X-Request-ID 헤더 추가 ASGI 미들웨어"""
+
+    def __init__(self, app, config: Optional[TracingConfig] = None):
+        self.app = app
+        self.config = config or get_tracing_config()
+        self.exporter = TraceExporter(self.config) if self.config.export in ("file", "otlp") else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        request_id = headers.get("x-request-id") or uuid.uuid4().hex
+        trace_id, parent_id = _parse_traceparent(headers.get("traceparent"))
+        trace = Trace(request_id, trace_id, parent_id)
+        trace.root.attributes.update({"http.method": scope["method"], "http.target": scope["path"]})
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.root.attributes["http.status_code"] = message["status"]
+                extra = [
+                    (b"x-request-id", request_id.encode("latin-1")),
+                    (b"server-timing", trace.server_timing().encode("latin-1")),
+                ]
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            trace.root.end_ns = time.time_ns()
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                trace.root.name = f"{scope['method']} {route}"
+            if self.exporter:
+                self.exporter.submit(trace)
@@ -13,7 +13,19 @@ from .server.vllm_config import (
 from .server.vllm_launcher import VLLMLauncher
 
 # 클라이언트
-from .client.vllm_client import VLLMAsyncClient, CompletionRequest
+from .client.vllm_client import (
+    VLLMAsyncClient,
+    CompletionRequest,
+    VLLMEndpoint,
+    get_vllm_client,
+)
+from .client.resilience import (
+    AdaptiveDeadline,
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    QueueFullError,
+)
 
 __all__ = [
     # 설정
@@ -27,4 +39,11 @@ __all__ = [
     # 클라이언트
     "VLLMAsyncClient",
     "CompletionRequest",
+    "VLLMEndpoint",
+    "get_vllm_client",
+    "AdaptiveDeadline",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "DeadlineExceededError",
+    "QueueFullError",
 ] 
\ No newline at end of file
@@ -2,6 +2,17 @@
 vLLM 클라이언트 모듈 - 간소화 버전
 """
 
-from .vllm_client import VLLMAsyncClient, CompletionRequest
+from .vllm_client import VLLMAsyncClient, CompletionRequest, VLLMEndpoint, get_vllm_client
+from .resilience import AdaptiveDeadline, CircuitBreaker, CircuitOpenError, DeadlineExceededError, QueueFullError
 
-__all__ = ["VLLMAsyncClient", "CompletionRequest"] 
\ No newline at end of file
+__all__ = [
+    "VLLMAsyncClient",
+    "CompletionRequest",
+    "VLLMEndpoint",
+    "get_vllm_client",
+    "AdaptiveDeadline",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "DeadlineExceededError",
+    "QueueFullError",
+] 
\ No newline at end of file
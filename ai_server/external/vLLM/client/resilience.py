@@ -0,0 +1,225 @@
+"""
+vLLM 호출 보호: 서킷 브레이커 + 적응형 데드라인
+
+- CircuitBreaker: 최근 호출의 오류율/느린 호출 비율이 임계값을 넘으면 open 상태가 되어
+  open_seconds 동안 vLLM을 호출하지 않고 즉시 CircuitOpenError를 냅니다.
+  이후 half_open 상태에서 소수의 시험 호출이 모두 성공하면 다시 closed로 돌아갑니다.
+- AdaptiveDeadline: 최근 생성 지연 시간의 백분위수 x 배수로 요청별 데드라인을 정해,
+  vLLM 장애 시 모든 연결이 고정 타임아웃(30초)만큼 묶이지 않게 합니다.
+  데드라인을 넘긴 요청은 "최소 데드라인만큼 걸림"으로 기록해, 지연 시간이 한 단계 늘어나도
+  백분위수가 따라 올라가 데드라인이 회복됩니다 (성공만 기록하면 계속 같은 데드라인에서 잘림).
+- QueueFullError: 대기 중인 vLLM 요청 수가 상한(max_pending)에 닿으면 기다리지 않고 즉시 거절합니다.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 메트릭 게이지 값
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷이 열려 있어 vLLM을 호출하지 않음"""
+
+
+class DeadlineExceededError(TimeoutError):
+    """요청별 데드라인 안에 생성이 끝나지 않음"""
+
+
+class QueueFullError(RuntimeError):
+    """처리/대기 중인 vLLM 요청이 상한에 닿아 호출하지 않음"""
+
+
+class CircuitBreaker:
+    """
+    Args:
+        window: 오류율/느린 호출 비율을 계산할 최근 호출 수
+        min_calls: 판단에 필요한 최소 호출 수
+        failure_rate: open으로 전환할 실패 비율
+        slow_call_seconds: 이보다 오래 걸린 호출은 느린 호출로 집계
+        slow_call_rate: open으로 전환할 느린 호출 비율
+        open_seconds: open 상태 유지 시간 (이후 half_open)
+        half_open_probes: half_open에서 허용할 시험 호출 수 (모두 성공하면 closed)
+        clock: 단조 시계 (테스트용)
+
+    open으로 바뀔 때마다 add_open_listener로 등록한 콜백을 호출합니다 (예: 데드라인 표본 초기화).
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 15.0,
+        half_open_probes: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        # 최근 호출 (실패 여부, 느린 호출 여부)
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._open_listeners: List[Callable[[], None]] = []
+
+    def add_open_listener(self, callback: Callable[[], None]):
+        """open으로 바뀔 때 호출할 콜백 등록"""
+        self._open_listeners.append(callback)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() >= self._opened_at + self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_started = 0
+            self._probes_succeeded = 0
+        return self._state
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        for callback in self._open_listeners:
+            callback()
+
+    def before_call(self) -> str:
+        """호출 허용 여부 확인 (허용되면 현재 상태 반환, 허용되지 않으면 CircuitOpenError)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return state
+            if state == HALF_OPEN and self._probes_started < self.half_open_probes:
+                self._probes_started += 1
+                return state
+            retry_in = max(self._opened_at + self.open_seconds - self._clock(), 0.0)
+        raise CircuitOpenError(f"vLLM 서킷이 열려 있습니다 ({state}, {retry_in:.1f}초 후 재시도)")
+
+    def record(self, success: bool, duration: float):
+        """허용된 호출의 결과 기록"""
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                if not success:
+                    self._open()
+                    return
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self.half_open_probes:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if state == OPEN:
+                # open 전에 시작된 호출의 늦은 결과는 무시
+                return
+
+            self._outcomes.append((not success, duration >= self.slow_call_seconds))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(failed for failed, _ in self._outcomes)
+            slow = sum(is_slow for _, is_slow in self._outcomes)
+            if failures / calls >= self.failure_rate or slow / calls >= self.slow_call_rate:
+                self._open()
+
+    def release(self):
+        """결과 없이 끝난 호출(취소) - half_open 시험 호출 자리를 돌려줌"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_started > self._probes_succeeded:
+                self._probes_started -= 1
+
+    def snapshot(self) -> Dict:
+        """상태 조회용 딕셔너리"""
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            failures = sum(failed for failed, _ in self._outcomes)
+        return {
+            "state": state,
+            "recent_calls": calls,
+            "recent_failures": failures,
+        }
+
+
+class AdaptiveDeadline:
+    """
+    Args:
+        percentile: 기준 백분위수 (0~1)
+        multiplier: 백분위수 지연 시간에 곱할 배수
+        min_seconds: 데드라인 하한
+        max_seconds: 데드라인 상한 (표본이 부족할 때의 값)
+        window: 보관할 최근 지연 시간 수
+        min_samples: 백분위수를 쓰기 위한 최소 표본 수
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.99,
+        multiplier: float = 2.0,
+        min_seconds: float = 2.0,
+        max_seconds: float = 30.0,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        if not 0.0 < percentile <= 1.0:
+            raise ValueError("percentile은 0과 1 사이여야 합니다")
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.min_samples = min_samples
+        self.window = window
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def clone(self) -> "AdaptiveDeadline":
+        """같은 설정의 표본 없는 데드라인 (워크로드별로 따로 둘 때 사용)"""
+        return AdaptiveDeadline(
+            percentile=self.percentile,
+            multiplier=self.multiplier,
+            min_seconds=self.min_seconds,
+            max_seconds=self.max_seconds,
+            window=self.window,
+            min_samples=self.min_samples,
+        )
+
+    def observe(self, seconds: float):
+        """성공한 생성의 지연 시간 기록"""
+        self._samples.append(seconds)
+
+    def observe_timeout(self, deadline: float):
+        """데드라인을 넘긴 요청 기록 (실제 지연 시간은 알 수 없으므로 하한인 데드라인 값으로 기록)"""
+        self._samples.append(deadline)
+
+    def reset(self):
+        """표본 초기화 (서킷이 열렸을 때 - 표본이 다시 쌓일 때까지 상한 사용)"""
+        self._samples.clear()
+
+    def quantile(self) -> float:
+        """최근 지연 시간의 기준 백분위수 (nearest-rank)"""
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(self.percentile * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+    def current(self) -> float:
+        """다음 요청에 적용할 데드라인(초)"""
+        if len(self._samples) < self.min_samples:
+            return self.max_seconds
+        return min(max(self.quantile() * self.multiplier, self.min_seconds), self.max_seconds)
@@ -1,14 +1,61 @@
 """
-vLLM 서버 클라이언트 - 버전 2.1.0
+vLLM 서버 클라이언트 - 버전 2.2.0
+여러 vLLM 레플리카에 대한 부하 분산 및 헬스 체크 지원
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Dict, List, Optional, Union
 import httpx
 from pydantic import BaseModel
 
+from ai_server.external.vLLM.server.vllm_config import get_vllm_config
+from ai_server.external.vLLM.server.vllm_launcher import read_supervisor_status, supervisor_holds
+from ai_server.external.vLLM.client.resilience import (
+    HALF_OPEN,
+    STATE_VALUES,
+    AdaptiveDeadline,
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    QueueFullError,
+)
+from ai_server.core.metrics import VLLM_CIRCUIT_STATE, VLLM_DEADLINE, VLLM_FAILURES
+from ai_server.core.tracing import span
+
 logger = logging.getLogger(__name__)
 
+# 다른 레플리카로 재시도해도 안전한 오류 (요청을 보내기 전에 실패한 경우)
+# RemoteProtocolError는 레플리카가 이미 생성을 시작한 뒤에도 날 수 있으므로 재시도하지 않음
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+# 데드라인 지연 시간 분포를 나누는 max_tokens 구간 하한 (2의 거듭제곱 단위)
+MIN_DEADLINE_BUCKET = 64
+
+
+def deadline_key(request: "CompletionRequest") -> str:
+    """요청의 데드라인 구간 키 (max_tokens 2의 거듭제곱 구간 x 후보 수)
+
+    포스트(긴 max_tokens, 여러 후보)와 댓글(짧은 생성)은 지연 시간 분포가 달라
+    한 분포로 데드라인을 정하면 긴 요청이 잘리거나 짧은 요청의 데드라인이 느슨해집니다.
+    """
+    bucket = MIN_DEADLINE_BUCKET
+    while bucket < request.max_tokens:
+        bucket *= 2
+    return f"max_tokens<={bucket},n={request.n}"
+
+
+def _failure_reason(error: Exception) -> str:
+    """메트릭 레이블용 실패 원인 분류"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http_{error.response.status_code}"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    return "request_error"
+
 
 class CompletionRequest(BaseModel):
     """포스트 생성 요청 모델"""
@@ -18,16 +65,89 @@ class CompletionRequest(BaseModel):
     top_p: float
     top_k: int
     stop: Optional[List[str]] = None
+    n: int = 1  # 한 요청에서 생성할 후보 수 (프리필 공유)
+
+
+class VLLMEndpoint:
+    """개별 vLLM 레플리카의 라우팅 상태"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0            # 처리 중인 요청 수
+        self.healthy = True           # 마지막 확인 결과
+        self.ejected_until = 0.0      # 제외 해제 시각 (monotonic)
+        self.total_requests = 0
+        self.total_failures = 0
+
+    def is_available(self, now: float) -> bool:
+        """라우팅 대상 여부 (비정상이어도 쿨다운이 지나면 다시 시도)"""
+        return self.healthy or now >= self.ejected_until
+
+    def mark_healthy(self):
+        if not self.healthy:
+            logger.info(f"vLLM 레플리카 복구: {self.url}")
+        self.healthy = True
+        self.ejected_until = 0.0
+
+    def mark_unhealthy(self, cooldown: float):
+        if self.healthy:
+            logger.warning(f"vLLM 레플리카 제외 ({cooldown:.0f}s): {self.url}")
+        self.healthy = False
+        self.ejected_until = time.monotonic() + cooldown
+
+    def snapshot(self) -> Dict:
+        """상태 조회용 딕셔너리"""
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+        }
 
 
 class VLLMAsyncClient:
-    """간소화된 vLLM 비동기 클라이언트"""
-    
-    def __init__(self, base_url: str = "http://localhost:8002"):
-        self.base_url = base_url.rstrip("/")
-        self.model_name = "meow-clovax-v3" 
+    """vLLM 비동기 클라이언트
+
+    하나 이상의 엔드포인트를 받아 처리 중인 요청 수가 가장 적은 레플리카로 라우팅합니다.
+    연결 오류가 난 레플리카는 쿨다운 동안 제외하고 다른 레플리카로 재시도합니다.
+    같은 호스트의 vLLM 슈퍼바이저가 draining/재시작 중이면 헬스 체크에서 해당 레플리카를 제외합니다.
+    요청 전체는 서킷 브레이커와 최근 지연 시간 기반 데드라인으로 보호하고,
+    처리/대기 중인 요청이 max_pending에 닿으면 GPU 대기열을 늘리지 않고 즉시 거절합니다.
+    데드라인은 deadline을 설정 틀로 삼아 요청 구간(deadline_key)별로 따로 계산하며,
+    서킷이 열리면 모든 구간의 표본을 비우고 half_open 시험 호출에는 상한(max_seconds)을 적용합니다.
+    """
+
+    def __init__(
+        self,
+        base_url: Union[str, List[str]] = "http://localhost:8002",
+        health_check_interval: float = 10.0,
+        eject_cooldown: float = 30.0,
+        supervisor_status_path: Optional[str] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        deadline: Optional[AdaptiveDeadline] = None,
+        max_pending: int = 0,
+    ):
+        urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        if not urls:
+            raise ValueError("vLLM 엔드포인트가 최소 1개 필요합니다")
+
+        self.endpoints: List[VLLMEndpoint] = [VLLMEndpoint(url) for url in urls]
+        self.base_url = self.endpoints[0].url
+        self.model_name = "meow-clovax-v3"
+        self.health_check_interval = health_check_interval
+        self.eject_cooldown = eject_cooldown
+        self.supervisor_status_path = supervisor_status_path
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.deadline = deadline or AdaptiveDeadline()  # 구간별 데드라인의 설정 틀
+        self.deadlines: Dict[str, AdaptiveDeadline] = {}
+        self.circuit_breaker.add_open_listener(self._reset_deadlines)
+        self.max_pending = max_pending  # 0이면 제한 없음
+        self.pending = 0
         self._client: Optional[httpx.AsyncClient] = None
-    
+        self._health_task: Optional[asyncio.Task] = None
+        self._rr_index = 0  # 동률일 때 순환 시작 위치
+
     @property
     def client(self) -> httpx.AsyncClient:
         """비동기 HTTP 클라이언트 인스턴스"""
@@ -40,40 +160,267 @@ class VLLMAsyncClient:
                 }
             )
         return self._client
-    
+
+    def _select_endpoint(self, exclude: List[VLLMEndpoint]) -> Optional[VLLMEndpoint]:
+        """처리 중 요청이 가장 적은 사용 가능한 레플리카 선택"""
+        now = time.monotonic()
+        candidates = [ep for ep in self.endpoints if ep not in exclude and ep.is_available(now)]
+        if not candidates:
+            # 모두 제외된 경우라도 시도해볼 레플리카는 남겨둔다
+            candidates = [ep for ep in self.endpoints if ep not in exclude]
+        if not candidates:
+            return None
+
+        # 동률이면 순환 순서로 골라 고르게 분산
+        n = len(self.endpoints)
+        start = self._rr_index
+        self._rr_index = (self._rr_index + 1) % n
+        return min(
+            candidates,
+            key=lambda ep: (ep.in_flight, (self.endpoints.index(ep) - start) % n)
+        )
+
+    def deadline_for(self, request: CompletionRequest) -> AdaptiveDeadline:
+        """요청 구간의 데드라인 (처음 보는 구간이면 표본 없이 생성)"""
+        key = deadline_key(request)
+        if key not in self.deadlines:
+            self.deadlines[key] = self.deadline.clone()
+        return self.deadlines[key]
+
+    def _reset_deadlines(self):
+        """서킷이 열리면 오래된 지연 시간 표본을 버림 (복구 후 상한부터 다시 학습)"""
+        for deadline in self.deadlines.values():
+            deadline.reset()
+
     async def completion(self, request: CompletionRequest) -> Dict:
-        """포스트 텍스트 생성 요청"""
+        """포스트 텍스트 생성 요청
+
+        Raises:
+            CircuitOpenError: 서킷이 열려 있어 호출하지 않음
+            DeadlineExceededError: 적응형 데드라인 안에 생성이 끝나지 않음
+            QueueFullError: 처리/대기 중인 요청이 max_pending에 닿음
+        """
+        if self.max_pending and self.pending >= self.max_pending:
+            VLLM_FAILURES.inc(reason="queue_full")
+            raise QueueFullError(f"vLLM 대기 요청이 상한({self.max_pending})에 닿았습니다")
+
         try:
-            payload = {
-                "model": self.model_name,
-                "prompt": request.prompt,
-                "max_tokens": request.max_tokens,
-                "temperature": request.temperature,
-                "top_p": request.top_p,
-                "top_k": request.top_k,
-                "stop": request.stop
-            }
-            
-            response = await self.client.post(
-                f"{self.base_url}/v1/completions",
-                json=payload
-            )
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except (httpx.HTTPStatusError, httpx.RequestError, httpx.ConnectError, httpx.TimeoutException) as e:
-            logger.error(f"포스트 생성 요청 실패: {e}")
+            state = self.circuit_breaker.before_call()
+        except CircuitOpenError:
+            VLLM_FAILURES.inc(reason="circuit_open")
+            raise
+        finally:
+            VLLM_CIRCUIT_STATE.set(STATE_VALUES[self.circuit_breaker.state])
+
+        deadline = self.deadline_for(request)
+        # 시험 호출은 지난 분포가 아니라 상한으로 판단 (지연 시간이 늘어난 서버도 복구 가능)
+        timeout = deadline.max_seconds if state == HALF_OPEN else deadline.current()
+        VLLM_DEADLINE.set(timeout, workload=deadline_key(request))
+        started = time.perf_counter()
+        self.pending += 1
+        try:
+            result = await asyncio.wait_for(self._completion_with_failover(request), timeout)
+        except asyncio.TimeoutError:
+            elapsed = time.perf_counter() - started
+            deadline.observe_timeout(timeout)
+            self.circuit_breaker.record(False, elapsed)
+            VLLM_FAILURES.inc(reason="deadline")
+            raise DeadlineExceededError(f"vLLM 응답이 데드라인({timeout:.1f}초)을 넘었습니다")
+        except asyncio.CancelledError:
+            self.circuit_breaker.release()
             raise
-    
+        except httpx.HTTPStatusError as e:
+            # 4xx는 요청 문제이므로 서버 상태 판단에서 제외
+            self.circuit_breaker.record(e.response.status_code < 500, time.perf_counter() - started)
+            raise
+        except Exception:
+            self.circuit_breaker.record(False, time.perf_counter() - started)
+            raise
+        finally:
+            self.pending -= 1
+            VLLM_CIRCUIT_STATE.set(STATE_VALUES[self.circuit_breaker.state])
+
+        elapsed = time.perf_counter() - started
+        deadline.observe(elapsed)
+        self.circuit_breaker.record(True, elapsed)
+        return result
+
+    async def _completion_with_failover(self, request: CompletionRequest) -> Dict:
+        """처리 중 요청이 가장 적은 레플리카로 요청 (연결 실패 시 다른 레플리카로 재시도)"""
+        payload = {
+            "model": self.model_name,
+            "prompt": request.prompt,
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature,
+            "top_p": request.top_p,
+            "top_k": request.top_k,
+            "stop": request.stop,
+            "n": request.n
+        }
+
+        tried: List[VLLMEndpoint] = []
+        while True:
+            endpoint = self._select_endpoint(exclude=tried)
+            tried.append(endpoint)
+
+            endpoint.in_flight += 1
+            endpoint.total_requests += 1
+            try:
+                # 레플리카별 시도 구간 (재시도 시 여러 개 기록)
+                with span("vllm_attempt", endpoint=endpoint.url, attempt=len(tried)):
+                    response = await self.client.post(
+                        f"{endpoint.url}/v1/completions",
+                        json=payload
+                    )
+                response.raise_for_status()
+                endpoint.mark_healthy()
+                return response.json()
+
+            except RETRYABLE_ERRORS as e:
+                endpoint.total_failures += 1
+                VLLM_FAILURES.inc(reason="connect")
+                endpoint.mark_unhealthy(self.eject_cooldown)
+                if len(tried) < len(self.endpoints):
+                    logger.warning(f"vLLM 연결 실패, 다른 레플리카로 재시도: {endpoint.url} - {e}")
+                    continue
+                logger.error(f"포스트 생성 요청 실패 (모든 레플리카): {e}")
+                raise
+
+            except (httpx.HTTPStatusError, httpx.RequestError) as e:
+                endpoint.total_failures += 1
+                VLLM_FAILURES.inc(reason=_failure_reason(e))
+                if isinstance(e, httpx.RemoteProtocolError):
+                    # 응답 도중 연결이 끊긴 레플리카는 제외만 하고 요청은 다시 보내지 않음
+                    endpoint.mark_unhealthy(self.eject_cooldown)
+                logger.error(f"포스트 생성 요청 실패: {e}")
+                raise
+
+            finally:
+                endpoint.in_flight -= 1
+
+    async def check_endpoint_health(self, endpoint: VLLMEndpoint) -> bool:
+        """`/v1/models` 프로브로 레플리카 상태 확인"""
+        try:
+            response = await self.client.get(f"{endpoint.url}/v1/models", timeout=3.0)
+            healthy = response.status_code == 200
+        except httpx.HTTPError:
+            healthy = False
+
+        if healthy and self.supervisor_status_path:
+            healthy = not supervisor_holds(read_supervisor_status(self.supervisor_status_path), endpoint.url)
+
+        if healthy:
+            endpoint.mark_healthy()
+        else:
+            endpoint.mark_unhealthy(self.eject_cooldown)
+        return healthy
+
+    async def warmup_endpoint(self, endpoint: VLLMEndpoint) -> bool:
+        """1토큰 생성으로 레플리카 연결 수립 및 첫 추론 준비"""
+        payload = {"model": self.model_name, "prompt": "안녕", "max_tokens": 1, "temperature": 0.0}
+        try:
+            response = await self.client.post(f"{endpoint.url}/v1/completions", json=payload)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"vLLM 워밍업 실패: {endpoint.url} - {e}")
+            return False
+        endpoint.mark_healthy()
+        return True
+
+    async def warmup(self) -> Dict[str, bool]:
+        """모든 레플리카 워밍업 (레플리카별 성공 여부)"""
+        results = await asyncio.gather(*(self.warmup_endpoint(ep) for ep in self.endpoints))
+        return {ep.url: ok for ep, ok in zip(self.endpoints, results)}
+
+    async def check_health(self) -> Dict[str, bool]:
+        """모든 레플리카 헬스 체크"""
+        results = await asyncio.gather(*(self.check_endpoint_health(ep) for ep in self.endpoints))
+        return {ep.url: ok for ep, ok in zip(self.endpoints, results)}
+
+    async def _health_check_loop(self):
+        """주기적 헬스 체크 루프"""
+        while True:
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.warning(f"vLLM 헬스 체크 중 오류: {e}")
+            await asyncio.sleep(self.health_check_interval)
+
+    def start_health_checks(self):
+        """백그라운드 헬스 체크 시작 (실행 중인 이벤트 루프 필요)"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._health_check_loop())
+
+    def get_status(self) -> List[Dict]:
+        """레플리카별 상태 목록"""
+        return [ep.snapshot() for ep in self.endpoints]
+
+    def get_protection_status(self) -> Dict:
+        """서킷 브레이커 상태, 현재 요청 데드라인, 처리/대기 중인 요청 수"""
+        return {
+            "circuit": self.circuit_breaker.snapshot(),
+            "deadline_seconds": {key: round(deadline.current(), 3) for key, deadline in self.deadlines.items()},
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+        }
+
     async def close(self):
         """클라이언트 종료"""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
         if self._client:
             await self._client.aclose()
             self._client = None
-    
+
     async def __aenter__(self):
         return self
-    
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close() 
\ No newline at end of file
+        await self.close()
+
+
+# 전역 인스턴스 (스레드 안전 싱글톤 패턴)
+_vllm_client: Optional[VLLMAsyncClient] = None
+_client_lock = threading.Lock()
+
+
+def get_vllm_client() -> VLLMAsyncClient:
+    """설정된 엔드포인트로 공유 vLLM 클라이언트 반환 (스레드 안전 싱글톤)"""
+    global _vllm_client
+
+    if _vllm_client is None:
+        with _client_lock:
+            # 더블 체크 락킹 패턴
+            if _vllm_client is None:
+                config = get_vllm_config()
+                _vllm_client = VLLMAsyncClient(
+                    base_url=config.endpoints,
+                    health_check_interval=config.health_check_interval,
+                    eject_cooldown=config.eject_cooldown,
+                    supervisor_status_path=config.supervisor_status_path,
+                    circuit_breaker=CircuitBreaker(
+                        window=config.breaker_window,
+                        min_calls=config.breaker_min_calls,
+                        failure_rate=config.breaker_failure_rate,
+                        slow_call_seconds=config.breaker_slow_call_seconds,
+                        slow_call_rate=config.breaker_slow_call_rate,
+                        open_seconds=config.breaker_open_seconds,
+                        half_open_probes=config.breaker_half_open_probes,
+                    ),
+                    deadline=AdaptiveDeadline(
+                        percentile=config.deadline_percentile,
+                        multiplier=config.deadline_multiplier,
+                        min_seconds=config.deadline_min,
+                        max_seconds=config.request_timeout,
+                        window=config.latency_window,
+                        min_samples=config.deadline_min_samples,
+                    ),
+                    max_pending=config.max_pending,
+                )
+
+    return _vllm_client
@@ -3,6 +3,7 @@ vLLM 서버 설정 관리
 포스트 문장 생성을 위한 간소화된 설정
 """
 
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -30,9 +31,73 @@ class VLLMConfig(BaseSettings):
     max_num_batched_tokens: int = Field(default=512, description="배치 토큰 수")
     max_num_seqs: int = Field(default=4, description="동시 시퀀스 수")
     
-    # 문제가 되는 boolean 설정들 제거
-    # enable_prefix_caching, trust_remote_code 제거
+    # 프리픽스 캐싱 및 스케줄러 설정 (boolean 값은 True일 때만 플래그로 전달)
+    # trust_remote_code는 여전히 제거
+    enable_prefix_caching: bool = Field(
+        default=False,
+        description="자동 프리픽스 캐싱 - 공통 시스템/지시 프롬프트의 KV 캐시 재사용"
+    )
+    enable_chunked_prefill: bool = Field(
+        default=False,
+        description="청크 단위 프리필 - 긴 프리필이 디코딩을 막지 않도록 분할"
+    )
+    num_scheduler_steps: Optional[int] = Field(
+        default=None,
+        description="멀티 스텝 스케줄링 스텝 수 (미지정 시 vLLM 기본값)"
+    )
     
+    # 클라이언트(API 서버) 측 레플리카 설정 - VLLM_ENDPOINTS='["http://a:8002","http://b:8002"]'
+    endpoints: List[str] = Field(
+        default=["http://localhost:8002"],
+        description="요청을 분산할 vLLM 레플리카 엔드포인트 목록"
+    )
+    health_check_interval: float = Field(default=10.0, description="레플리카 헬스 체크 주기(초)")
+    eject_cooldown: float = Field(default=30.0, description="비정상 레플리카 제외 시간(초)")
+
+    # 요청 데드라인 - 최근 생성 지연 시간 백분위수 x 배수 (표본이 부족하면 request_timeout)
+    request_timeout: float = Field(default=30.0, description="요청 데드라인 상한(초)")
+    deadline_percentile: float = Field(default=0.99, description="데드라인 기준 지연 시간 백분위수 (0~1)")
+    deadline_multiplier: float = Field(default=2.0, description="백분위수 지연 시간에 곱할 배수")
+    deadline_min: float = Field(default=2.0, description="요청 데드라인 하한(초)")
+    deadline_min_samples: int = Field(default=20, description="적응형 데드라인을 쓰기 위한 최소 표본 수")
+    latency_window: int = Field(default=200, description="데드라인 계산에 쓰는 최근 지연 시간 수")
+    max_pending: int = Field(default=32, description="처리/대기 중인 vLLM 요청 상한 (초과 시 즉시 거절, 0이면 제한 없음)")
+
+    # 서킷 브레이커 - 최근 호출의 오류율/느린 호출 비율 기준
+    breaker_window: int = Field(default=20, description="오류율을 계산할 최근 호출 수")
+    breaker_min_calls: int = Field(default=10, description="서킷 판단에 필요한 최소 호출 수")
+    breaker_failure_rate: float = Field(default=0.5, description="서킷을 열 실패 비율")
+    breaker_slow_call_seconds: float = Field(default=10.0, description="느린 호출 기준(초)")
+    breaker_slow_call_rate: float = Field(default=0.8, description="서킷을 열 느린 호출 비율")
+    breaker_open_seconds: float = Field(default=15.0, description="서킷 open 유지 시간(초)")
+    breaker_half_open_probes: int = Field(default=3, description="half-open 상태 시험 호출 수")
+
+    # 슈퍼바이저 설정 (vllm_launcher --action supervise)
+    server_command: List[str] = Field(
+        default=["python", "-m", "vllm.entrypoints.openai.api_server"],
+        description="vLLM 서버 실행 명령 (서버 인자 앞부분)"
+    )
+    startup_timeout: float = Field(default=300.0, description="프로세스 시작 후 /v1/models 응답까지 최대 대기(초)")
+    supervisor_health_interval: float = Field(default=5.0, description="슈퍼바이저 헬스 체크 주기(초)")
+    supervisor_failure_threshold: int = Field(default=3, description="재시작할 연속 헬스 체크 실패 횟수")
+    restart_backoff_initial: float = Field(default=2.0, description="재시작 백오프 초기값(초, 연속 실패마다 2배)")
+    restart_backoff_max: float = Field(default=60.0, description="재시작 백오프 최대값(초)")
+    restart_stable_period: float = Field(default=300.0, description="이 시간 이상 정상 동작하면 백오프 초기화(초)")
+    gpu_memory_threshold_mb: int = Field(
+        default=15000,
+        description="시작/재시작 전 GPU 메모리 사용량 상한(MB, 넘으면 띄우지 않고 백오프 후 다시 확인, 0이면 확인 안 함)"
+    )
+    drain_grace: float = Field(default=10.0, description="draining 표시 후 API 서버가 라우팅을 멈출 때까지 대기(초)")
+    drain_timeout: float = Field(default=60.0, description="처리 중 요청이 끝나기를 기다리는 최대 시간(초)")
+    stop_timeout: float = Field(default=30.0, description="SIGTERM 후 SIGKILL까지 대기(초)")
+    log_dir: str = Field(default="./logs/vllm", description="vLLM stdout/stderr 로그 디렉토리")
+    log_max_bytes: int = Field(default=50 * 1024 * 1024, description="로그 파일 회전 크기(바이트)")
+    log_backup_count: int = Field(default=5, description="보관할 회전 로그 파일 수")
+    supervisor_status_path: str = Field(
+        default="./logs/vllm/supervisor.json",
+        description="슈퍼바이저 상태 파일 (API 서버가 읽어 /vllm-status, 라우팅에 사용)"
+    )
+
     class Config:
         env_prefix = "VLLM_"
 
@@ -45,7 +110,7 @@ class VLLMServerArgs:
     
     def get_server_args(self) -> list[str]:
         """풀파인튜닝 모델용 서버 인자 (안정적인 설정만)"""
-        return [
+        args = [
             "--host", self.config.host,
             "--port", str(self.config.port),
             "--model", self.config.model_path,
@@ -55,6 +120,16 @@ class VLLMServerArgs:
             "--max-num-batched-tokens", str(self.config.max_num_batched_tokens),
             "--max-num-seqs", str(self.config.max_num_seqs),
         ]
+        
+        # 선택 옵션: 값이 "False" 문자열로 넘어가지 않도록 켜진 경우에만 추가
+        if self.config.enable_prefix_caching:
+            args.append("--enable-prefix-caching")
+        if self.config.enable_chunked_prefill:
+            args.append("--enable-chunked-prefill")
+        if self.config.num_scheduler_steps:
+            args += ["--num-scheduler-steps", str(self.config.num_scheduler_steps)]
+        
+        return args
 
 
 # 전역 설정 인스턴스
@@ -1,68 +1,189 @@
 """
-vLLM 서버 런처 - 간소화 버전
+vLLM 서버 런처 / 슈퍼바이저
+
+- start_server/stop_server/restart_server: 일회성 시작/중지 (scripts/model_manager.py)
+- supervise: vLLM을 자식 프로세스로 띄워 계속 감시 (--action supervise)
+    * 비동기 헬스 체크 루프 - 프로세스가 죽거나 연속으로 응답하지 않으면 재시작
+    * 비정상 재시작마다 2배씩 늘어나는 백오프 (restart_stable_period 이상 정상 동작하면 초기화)
+    * 띄우기 전 GPU 메모리 확인 - 이전 프로세스가 메모리를 아직 놓지 않았으면 백오프 후 다시 확인
+    * stdout/stderr를 회전 로그 파일(log_dir/vllm.log)로 수집
+    * SIGHUP: 처리 중 요청을 비운 뒤 재시작, SIGTERM/SIGINT: 비운 뒤 종료
+    * 상태를 JSON 파일(supervisor_status_path)로 기록 - API 서버가 /vllm-status로 노출하고
+      draining/재시작 중인 레플리카는 라우팅에서 제외
 """
 
+import asyncio
+import json
+import logging
+import os
+import signal
 import subprocess
 import time
-import logging
-from typing import Optional
-import requests
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
 
 from ai_server.external.vLLM.server.vllm_config import VLLMConfig, VLLMServerArgs, get_vllm_config
 
 logger = logging.getLogger(__name__)
 
+# 슈퍼바이저 상태
+STARTING = "starting"
+RUNNING = "running"
+DRAINING = "draining"
+BACKOFF = "backoff"
+STOPPED = "stopped"
+
+# 재시작 사유 (요청에 의한 재시작/종료는 drain 후 백오프 없이 진행)
+RESTART_REQUESTED = "restart requested"
+STOP_REQUESTED = "stop requested"
+
+# 상태 파일이 헬스 체크 주기의 이 배수 이상 갱신되지 않으면 슈퍼바이저가 죽은 것으로 간주
+STALE_STATUS_INTERVALS = 3
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "0.0.0.0", "::1"}
+
+# drain 시 확인하는 vLLM /metrics 게이지 (처리 중 + 대기 중 요청 수)
+IN_FLIGHT_METRICS = ("vllm:num_requests_running", "vllm:num_requests_waiting")
+
+# vLLM 로그 한 줄 최대 길이 (asyncio 스트림 버퍼 한도)
+LOG_LINE_LIMIT = 1024 * 1024
+
+
+def gpu_memory_used_mb() -> Optional[int]:
+    """GPU 메모리 사용량(MB, 여러 GPU면 가장 많이 쓰는 GPU 기준), nvidia-smi가 없거나 실패하면 None"""
+    try:
+        output = subprocess.run(
+            ["nvidia-smi", "--query-gpu=memory.used", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=10, check=True,
+        ).stdout
+        return max(int(line) for line in output.split())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+def read_supervisor_status(path: str) -> Optional[Dict]:
+    """슈퍼바이저 상태 파일 읽기 (없으면 None, 갱신이 끊긴 상태는 stale=True)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return None
+    max_age = status.get("health_interval", 5.0) * STALE_STATUS_INTERVALS
+    status["stale"] = time.time() - status.get("updated_at", 0.0) > max_age
+    return status
+
+
+def supervisor_holds(status: Optional[Dict], url: str) -> bool:
+    """url이 슈퍼바이저가 관리하는 레플리카이고 draining/재시작 중이라 라우팅하면 안 되는지"""
+    if not status or status.get("stale") or status.get("state") == RUNNING:
+        return False
+    parsed = urlparse(url)
+    return parsed.port == status.get("port") and parsed.hostname in LOCAL_HOSTS | {status.get("host")}
+
+
+def parse_in_flight(metrics_text: str) -> int:
+    """vLLM Prometheus 텍스트에서 처리 중 + 대기 중 요청 수 합계"""
+    total = 0.0
+    for line in metrics_text.splitlines():
+        if line.startswith(IN_FLIGHT_METRICS):
+            total += float(line.rsplit(" ", 1)[1])
+    return int(total)
+
 
 class VLLMLauncher:
-    """vLLM 서버 런처"""
-    
+    """vLLM 서버 런처 및 슈퍼바이저"""
+
     def __init__(self, config: Optional[VLLMConfig] = None):
         self.config = config or get_vllm_config()
         self.process: Optional[subprocess.Popen] = None
         self.server_args = VLLMServerArgs(self.config)
-    
+
+        # 슈퍼바이저 상태 (supervise 실행 중에만 사용)
+        self.state = STOPPED
+        self.restarts = 0
+        self.consecutive_failures = 0     # 연속 비정상 재시작 횟수 (백오프 계산)
+        self.last_exit_code: Optional[int] = None
+        self.last_restart_reason: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.next_restart_at: Optional[float] = None
+        self._child: Optional[asyncio.subprocess.Process] = None
+        self._exit_waiter: Optional[asyncio.Future] = None
+        self._log_task: Optional[asyncio.Task] = None
+        self._log_handler: Optional[RotatingFileHandler] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._restart_requested = False
+        self._stopping = False
+
+    @property
+    def base_url(self) -> str:
+        """서버 접속 주소 (0.0.0.0 바인드는 루프백으로 접속)"""
+        host = "127.0.0.1" if self.config.host in ("0.0.0.0", "") else self.config.host
+        return f"http://{host}:{self.config.port}"
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.config.log_dir, "vllm.log")
+
+    def get_command(self) -> List[str]:
+        """vLLM 서버 실행 명령"""
+        return list(self.config.server_command) + self.server_args.get_server_args()
+
     def is_running(self) -> bool:
         """서버 실행 상태 확인"""
-        if self.process is None:
+        # 직접 띄운 프로세스가 이미 종료된 경우
+        if self.process is not None and self.process.poll() is not None:
             return False
-        
-        # 프로세스 상태 확인
-        if self.process.poll() is not None:
-            return False
-        
-        # 서버 응답 확인
+
+        # 서버 응답 확인 (슈퍼바이저가 띄운 서버 포함)
         return self._check_server_health()
-    
+
     def _check_server_health(self) -> bool:
         """서버 상태 확인"""
         try:
-            response = requests.get(f"http://{self.config.host}:{self.config.port}/v1/models", timeout=3)
+            response = httpx.get(f"{self.base_url}/v1/models", timeout=3)
             return response.status_code == 200
-        except:
+        except httpx.HTTPError:
             return False
-    
+
+    def _supervisor_pid(self) -> Optional[int]:
+        """실행 중인 슈퍼바이저 PID (없으면 None)"""
+        status = read_supervisor_status(self.config.supervisor_status_path)
+        if not status or status["stale"] or status.get("state") == STOPPED:
+            return None
+        pid = status.get("supervisor_pid")
+        try:
+            os.kill(pid, 0)
+        except (OSError, TypeError):
+            return None
+        return pid
+
     def start_server(self) -> bool:
         """서버 시작"""
         if self.is_running():
             return True
-        
+
         try:
-            args = ["python", "-m", "vllm.entrypoints.openai.api_server"] + self.server_args.get_server_args()
-            
+            args = self.get_command()
+
             # 실행할 명령어 로그 출력
             logger.info(f"vLLM 서버 시작 명령어: {' '.join(args)}")
-            
-            self.process = subprocess.Popen(
-                args,
-                stdout=None,
-                stderr=None,
-                text=True
-            )
-            
-            logger.info(f"vLLM 프로세스 시작됨. PID: {self.process.pid}")
-            
+
+            # 런처가 먼저 종료되므로 회전 없이 로그 파일에 이어 쓰기 (회전은 supervise 사용)
+            os.makedirs(self.config.log_dir, exist_ok=True)
+            with open(self.log_path, "ab") as log_file:
+                self.process = subprocess.Popen(
+                    args,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                )
+
+            logger.info(f"vLLM 프로세스 시작됨. PID: {self.process.pid} (로그: {self.log_path})")
+
             # 서버 준비 대기
-            if self._wait_for_server_ready():
+            if self._wait_for_server_ready(self.config.startup_timeout):
                 logger.info("vLLM 서버가 시작되었습니다")
                 return True
             else:
@@ -71,71 +192,367 @@ class VLLMLauncher:
                     logger.error(f"vLLM 프로세스가 exit code {self.process.poll()}로 종료됨")
                 self.stop_server()
                 return False
-                
+
         except Exception as e:
             logger.error(f"vLLM 서버 시작 중 오류: {e}")
             return False
-    
-    def _wait_for_server_ready(self, timeout: int = 300) -> bool:
+
+    def _wait_for_server_ready(self, timeout: float = 300) -> bool:
         """서버 준비 대기"""
         start_time = time.time()
-        
+
         while time.time() - start_time < timeout:
+            if self.process is not None and self.process.poll() is not None:
+                return False
             if self._check_server_health():
                 return True
             time.sleep(2)
-        
+
         return False
-    
+
     def stop_server(self) -> bool:
-        """서버 중지"""
+        """서버 중지 (슈퍼바이저가 관리 중이면 drain 후 종료하도록 SIGTERM 전달)"""
+        supervisor_pid = self._supervisor_pid()
+        if self.process is None and supervisor_pid is not None:
+            os.kill(supervisor_pid, signal.SIGTERM)
+            logger.info(f"슈퍼바이저(PID {supervisor_pid})에 종료 요청")
+            return True
+
         if self.process is None:
             return True
-        
+
         try:
             self.process.terminate()
-            
+
             # 정상 종료 대기
             try:
-                self.process.wait(timeout=10)
+                self.process.wait(timeout=self.config.stop_timeout)
             except subprocess.TimeoutExpired:
                 self.process.kill()
                 self.process.wait()
-            
+
             self.process = None
             logger.info("vLLM 서버가 중지되었습니다")
             return True
-            
+
         except Exception as e:
             logger.error(f"vLLM 서버 중지 중 오류: {e}")
             return False
-    
+
     def restart_server(self) -> bool:
-        """서버 재시작"""
+        """서버 재시작 (슈퍼바이저가 관리 중이면 drain 후 재시작하도록 SIGHUP 전달)"""
+        supervisor_pid = self._supervisor_pid()
+        if self.process is None and supervisor_pid is not None:
+            os.kill(supervisor_pid, signal.SIGHUP)
+            logger.info(f"슈퍼바이저(PID {supervisor_pid})에 재시작 요청")
+            return True
+
         self.stop_server()
         time.sleep(2)
         return self.start_server()
 
+    # ---- 슈퍼바이저 ----
+
+    def backoff_delay(self, failures: int) -> float:
+        """연속 비정상 재시작 횟수별 대기 시간"""
+        delay = self.config.restart_backoff_initial * (2 ** max(failures - 1, 0))
+        return min(delay, self.config.restart_backoff_max)
+
+    def request_restart(self):
+        """처리 중 요청을 비운 뒤 재시작 (SIGHUP)"""
+        self._restart_requested = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def request_stop(self):
+        """처리 중 요청을 비운 뒤 종료 (SIGTERM/SIGINT)"""
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def status(self) -> Dict:
+        """API 서버에 노출할 슈퍼바이저 상태"""
+        return {
+            "state": self.state,
+            "pid": self._child.pid if self._child is not None else None,
+            "supervisor_pid": os.getpid(),
+            "host": self.config.host,
+            "port": self.config.port,
+            "url": self.base_url,
+            "restarts": self.restarts,
+            "consecutive_failures": self.consecutive_failures,
+            "last_exit_code": self.last_exit_code,
+            "last_restart_reason": self.last_restart_reason,
+            "started_at": self.started_at,
+            "next_restart_at": self.next_restart_at,
+            "health_interval": self.config.supervisor_health_interval,
+            "log_path": self.log_path,
+            "updated_at": time.time(),
+        }
+
+    def _write_status(self):
+        """상태 파일 원자적 갱신"""
+        path = self.config.supervisor_status_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.status(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _set_state(self, state: str):
+        self.state = state
+        self._write_status()
+
+    async def _pump_logs(self, stream: asyncio.StreamReader):
+        """자식 프로세스 출력을 한 줄씩 회전 로그 파일로 기록"""
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                # 한도를 넘는 줄은 버퍼에서 버려짐
+                continue
+            if not line:
+                return
+            self._log_handler.handle(logging.makeLogRecord({
+                "msg": line.decode("utf-8", errors="replace").rstrip("\n"),
+                "levelno": logging.INFO,
+                "levelname": "INFO",
+            }))
+
+    async def _pre_start_check(self) -> Optional[str]:
+        """띄우기 전 GPU 메모리 확인 (이전 프로세스의 메모리가 남아 있으면 재시작 사유 반환)"""
+        threshold = self.config.gpu_memory_threshold_mb
+        if threshold <= 0:
+            return None
+        used = await asyncio.to_thread(gpu_memory_used_mb)
+        if used is not None and used > threshold:
+            return f"GPU memory {used}MB > {threshold}MB"
+        return None
+
+    async def _spawn(self):
+        """vLLM 프로세스 시작 (별도 세션 - 터미널 시그널은 슈퍼바이저만 받음)"""
+        command = self.get_command()
+        logger.info(f"vLLM 서버 시작 명령어: {' '.join(command)}")
+        self._child = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=LOG_LINE_LIMIT,
+            start_new_session=True,
+        )
+        self._exit_waiter = asyncio.ensure_future(self._child.wait())
+        self._log_task = asyncio.ensure_future(self._pump_logs(self._child.stdout))
+        self.started_at = time.time()
+        self.next_restart_at = None
+        logger.info(f"vLLM 프로세스 시작됨. PID: {self._child.pid} (로그: {self.log_path})")
+        self._set_state(STARTING)
+
+    def _signal_child(self, signum: int):
+        """vLLM과 그 하위 프로세스(엔진 코어 등) 전체에 시그널 전달"""
+        try:
+            os.killpg(self._child.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    async def _terminate(self):
+        """SIGTERM 후 stop_timeout 안에 끝나지 않으면 SIGKILL"""
+        if self._child is None:
+            return
+        if self._child.returncode is None:
+            self._signal_child(signal.SIGTERM)
+            try:
+                await asyncio.wait_for(asyncio.shield(self._exit_waiter), self.config.stop_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"vLLM 프로세스가 {self.config.stop_timeout:.0f}초 안에 종료되지 않아 SIGKILL")
+                self._signal_child(signal.SIGKILL)
+                await self._exit_waiter
+        self.last_exit_code = self._child.returncode
+        # 하위 프로세스가 파이프를 잡고 있을 수 있으므로 남은 로그는 잠깐만 기다림
+        try:
+            await asyncio.wait_for(self._log_task, 2.0)
+        except asyncio.TimeoutError:
+            pass
+        self._child = None
+        self._exit_waiter = None
+        self._log_task = None
+
+    async def _wait(self, timeout: float):
+        """timeout 동안 대기 (프로세스 종료나 재시작/종료 요청 시 즉시 반환)"""
+        wake = asyncio.ensure_future(self._wake.wait())
+        waiters = [wake] if self._exit_waiter is None else [wake, self._exit_waiter]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            wake.cancel()
+
+    async def _check_health(self, client: httpx.AsyncClient) -> bool:
+        try:
+            response = await client.get(f"{self.base_url}/v1/models", timeout=3.0)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def _in_flight(self, client: httpx.AsyncClient) -> Optional[int]:
+        """처리 중 + 대기 중 요청 수 (/metrics를 지원하지 않으면 None)"""
+        try:
+            response = await client.get(f"{self.base_url}/metrics", timeout=3.0)
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            return None
+        return parse_in_flight(response.text)
+
+    async def _wait_until_ready(self, client: httpx.AsyncClient) -> Optional[str]:
+        """준비되면 None, 아니면 실패 사유"""
+        deadline = time.monotonic() + self.config.startup_timeout
+        while True:
+            if self._child.returncode is not None:
+                return f"exited during startup (code {self._child.returncode})"
+            if self._stopping:
+                return STOP_REQUESTED
+            if self._restart_requested:
+                return RESTART_REQUESTED
+            if await self._check_health(client):
+                return None
+            if time.monotonic() >= deadline:
+                return "startup timeout"
+            await self._wait(min(1.0, self.config.supervisor_health_interval))
+
+    async def _monitor(self, client: httpx.AsyncClient) -> str:
+        """정상 동작 중 감시 - 재시작/종료 사유 반환"""
+        failures = 0
+        while True:
+            await self._wait(self.config.supervisor_health_interval)
+            if self._child.returncode is not None:
+                return f"exited (code {self._child.returncode})"
+            if self._stopping:
+                return STOP_REQUESTED
+            if self._restart_requested:
+                return RESTART_REQUESTED
+
+            if await self._check_health(client):
+                failures = 0
+                if time.time() - self.started_at >= self.config.restart_stable_period:
+                    self.consecutive_failures = 0
+            else:
+                failures += 1
+                logger.warning(f"vLLM 헬스 체크 실패 ({failures}/{self.config.supervisor_failure_threshold})")
+                if failures >= self.config.supervisor_failure_threshold:
+                    return f"unhealthy ({failures} failed health checks)"
+            # 상태 파일 갱신이 곧 슈퍼바이저 생존 신호
+            self._write_status()
+
+    async def _drain(self, client: httpx.AsyncClient):
+        """draining을 알려 새 요청을 막고 처리 중 요청이 끝날 때까지 대기"""
+        self._set_state(DRAINING)
+        # API 서버 헬스 체크가 상태 파일을 보고 이 레플리카를 제외할 시간
+        await asyncio.sleep(self.config.drain_grace)
+        deadline = time.monotonic() + self.config.drain_timeout
+        while self._child.returncode is None:
+            in_flight = await self._in_flight(client)
+            if not in_flight:
+                return
+            if time.monotonic() >= deadline:
+                logger.warning(f"drain 제한 시간 초과 (처리 중 요청 {in_flight}개)")
+                return
+            self._write_status()
+            await asyncio.sleep(0.5)
+
+    def _install_signal_handlers(self, loop: asyncio.AbstractEventLoop):
+        loop.add_signal_handler(signal.SIGHUP, self.request_restart)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.request_stop)
+
+    def _remove_signal_handlers(self, loop: asyncio.AbstractEventLoop):
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+
+    async def supervise(self, handle_signals: bool = True):
+        """vLLM을 띄우고 종료 요청이 올 때까지 감시/재시작"""
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._restart_requested = False
+        os.makedirs(self.config.log_dir, exist_ok=True)
+        self._log_handler = RotatingFileHandler(
+            self.log_path,
+            maxBytes=self.config.log_max_bytes,
+            backupCount=self.config.log_backup_count,
+            encoding="utf-8",
+        )
+        self._log_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        if handle_signals:
+            self._install_signal_handlers(loop)
+
+        try:
+            async with httpx.AsyncClient() as client:
+                while not self._stopping:
+                    reason = await self._pre_start_check()
+                    if reason is None:
+                        await self._spawn()
+                        reason = await self._wait_until_ready(client)
+                        if reason is None:
+                            logger.info(f"vLLM 서버 준비 완료 ({self.base_url})")
+                            self._set_state(RUNNING)
+                            reason = await self._monitor(client)
+                            if reason in (RESTART_REQUESTED, STOP_REQUESTED):
+                                await self._drain(client)
+                        await self._terminate()
+                    self._restart_requested = False
+                    self._wake.clear()
+                    if self._stopping:
+                        break
+
+                    self.restarts += 1
+                    self.last_restart_reason = reason
+                    if reason == RESTART_REQUESTED:
+                        logger.info("vLLM 서버 재시작 (요청)")
+                        continue
+
+                    self.consecutive_failures += 1
+                    delay = self.backoff_delay(self.consecutive_failures)
+                    self.next_restart_at = time.time() + delay
+                    logger.warning(f"vLLM 서버 재시작 ({reason}), {delay:.1f}초 후")
+                    self._set_state(BACKOFF)
+                    await self._wait(delay)
+                    # 백오프 중 재시작 요청은 바로 시작하는 것으로 처리
+                    self._restart_requested = False
+                    self._wake.clear()
+        finally:
+            await self._terminate()
+            self._set_state(STOPPED)
+            if handle_signals:
+                self._remove_signal_handlers(loop)
+            self._log_handler.close()
+            self._log_handler = None
+            logger.info("vLLM 슈퍼바이저 종료")
+
 
 def main():
     """메인 실행 함수"""
     import argparse
-    
+
     parser = argparse.ArgumentParser(description="vLLM 서버 런처")
-    parser.add_argument("--action", choices=["start", "stop", "restart"], required=True)
-    
+    parser.add_argument("--action", choices=["start", "stop", "restart", "supervise"], required=True)
+
     args = parser.parse_args()
     launcher = VLLMLauncher()
-    
+
     if args.action == "start":
         success = launcher.start_server()
     elif args.action == "stop":
         success = launcher.stop_server()
     elif args.action == "restart":
         success = launcher.restart_server()
-    
+    elif args.action == "supervise":
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(launcher.supervise())
+        success = True
+
     exit(0 if success else 1)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
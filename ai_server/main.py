@@ -1,9 +1,18 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from ai_server.router.api import api_router
+from ai_server.router.api import api_router, ROUTER_PREFIXES
+from ai_server.core.metrics import MetricsMiddleware, registry
+from ai_server.core.tracing import TracingMiddleware
+from ai_server.core.responses import FastJSONResponse
+from ai_server.core.config import get_admin_config, get_warmup_config
+from ai_server.core.readiness import WARMUP_STEPS, get_readiness_tracker, warm_up_tokenizer
+from ai_server.core.profiler import install_profile_signal_handler
+from ai_server.external.vLLM import get_vllm_client, get_vllm_config
+from ai_server.external.vLLM.server.vllm_launcher import read_supervisor_status
+import asyncio
 import logging
 import threading
 import os
@@ -26,11 +35,13 @@ def build_image_database_background():
         # ChromaDB telemetry 비활성화
         os.environ["ANONYMIZED_TELEMETRY"] = "False"
         
-        from ai_server.scripts.build_image_database import build_database
-        build_database()
+        # 멀티 워커 환경에서는 파일 잠금을 얻은 한 프로세스만 구축하고 나머지는 완료를 기다림
+        from ai_server.scripts.build_image_database import build_database_once
+        from ai_server.model.image_search import get_image_search_service
+        result = build_database_once(service=get_image_search_service())
         
         image_db_status["status"] = "completed"
-        image_db_status["message"] = "이미지 데이터베이스 구축 완료"
+        image_db_status["message"] = "이미지 데이터베이스 구축 완료" if result == "built" else "기존 이미지 데이터베이스 사용"
         logger.info("이미지 데이터베이스 구축 완료!")
         
     except Exception as e:
@@ -44,8 +55,12 @@ app = FastAPI(
     description="SNS 포스팅/댓글/채팅을 고양이/강아지 말투로 변환하고 유사 이미지를 검색하는 AI API 서버",
     version="3.0.0",
     docs_url="/docs",
+    default_response_class=FastJSONResponse,
 )
 
+# 시작 시 띄운 백그라운드 작업 (참조 유지용)
+startup_tasks = []
+
 @app.on_event("startup")
 async def startup_event():
     """앱 시작 시 실행되는 이벤트"""
@@ -55,8 +70,28 @@ async def startup_event():
     thread = threading.Thread(target=build_image_database_background, daemon=True)
     thread.start()
     
+    # vLLM 레플리카 주기적 헬스 체크 시작
+    get_vllm_client().start_health_checks()
+    
+    # 서브시스템 워밍업 (완료 전까지 /ready는 503)
+    warmup_config = get_warmup_config()
+    get_readiness_tracker().start(WARMUP_STEPS, warmup_config)
+    if not warmup_config.enabled:
+        # 워밍업을 꺼도 토크나이저는 요청 경로가 아닌 시작 시점에 스레드에서 로드
+        startup_tasks.append(asyncio.create_task(warm_up_tokenizer()))
+    
+    # SIGUSR2로 재시작 없이 프로파일 저장 (ADMIN_PROFILE_SIGNAL=true)
+    if get_admin_config().profile_signal:
+        install_profile_signal_handler()
+    
     logger.info("FastAPI 서버 시작 완료")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """앱 종료 시 실행되는 이벤트"""
+    await get_readiness_tracker().close()
+    await get_vllm_client().close()
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -86,6 +121,12 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# 라우터별 요청 수/지연 시간/처리 중 요청 수 메트릭
+app.add_middleware(MetricsMiddleware, router_prefixes=ROUTER_PREFIXES)
+
+# 요청 ID 부여 및 단계별 소요 시간 Server-Timing 헤더 (TRACE_EXPORT 설정 시 OTLP 내보내기)
+app.add_middleware(TracingMiddleware)
+
 # 검증 오류 처리기
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -160,6 +201,40 @@ async def health_check():
     """헬스체크 엔드포인트"""
     return {"status": "healthy"}
 
+# /ready, /metrics는 프로세스별 상태이므로 (멀티 워커 모드에서는 요청을 받은 워커 기준) 응답한 워커를 헤더로 표시
+WORKER_HEADER = "X-Worker-Pid"
+
+# 준비 상태 엔드포인트 (로드 밸런서용)
+@app.get("/ready")
+async def readiness_check():
+    """서브시스템별 워밍업 상태 - 필수 서브시스템이 모두 준비되면 200, 아니면 503"""
+    tracker = get_readiness_tracker()
+    return JSONResponse(
+        status_code=200 if tracker.ready else 503,
+        content=tracker.snapshot(),
+        headers={WORKER_HEADER: str(os.getpid())}
+    )
+
+# Prometheus 메트릭 엔드포인트
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 텍스트 형식 메트릭 (이 프로세스의 값)"""
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4",
+        headers={WORKER_HEADER: str(os.getpid())}
+    )
+
+# vLLM 상태 확인 엔드포인트
+@app.get("/vllm-status")
+async def get_vllm_status():
+    """vLLM 슈퍼바이저 상태(같은 호스트에서 실행 중인 경우), 레플리카별 라우팅 상태, 서킷/데드라인"""
+    return {
+        "supervisor": read_supervisor_status(get_vllm_config().supervisor_status_path),
+        "replicas": get_vllm_client().get_status(),
+        **get_vllm_client().get_protection_status(),
+    }
+
 # 이미지 데이터베이스 상태 확인 엔드포인트
 @app.get("/image-db-status")
 async def get_image_db_status():
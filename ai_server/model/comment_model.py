@@ -1,70 +1,89 @@
 from ai_server.schemas.converter_schemas import CommentType, CommentEmotion
 from ai_server.util.comment_prompt import CommentPromptGenerator
-from ai_server.external.vLLM import VLLMAsyncClient, CompletionRequest
+from ai_server.external.vLLM import VLLMAsyncClient, CompletionRequest, get_vllm_client
+from ai_server.util.prompt_layout import PROMPT_SUFFIX
+from ai_server.util.token_budget import get_token_budgeter
+from ai_server.util.fast_path import RuleFastPath, TransformResult, rule_fallback
+from ai_server.util.postprocess import output_char_limit, postprocess
 from ai_server.core.config import get_inference_config
+from ai_server.core.tracing import traced
+from ai_server.core.metrics import stage_timer
+from ai_server.schemas.post_schemas import TransformEngine
+from typing import List, Optional, Union
 import logging
-import re
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
 
 # comment 변환 서비스
 class CommentTransformationService:
-    def __init__(self, vllm_base_url: str = "http://localhost:8002"):
+    def __init__(self, vllm_base_url: Optional[Union[str, List[str]]] = None):
+        # URL을 지정하지 않으면 설정된 레플리카들을 공유하는 전역 클라이언트 사용
         self.vllm_base_url = vllm_base_url
+        self._owns_client = vllm_base_url is not None
+        self.client = VLLMAsyncClient(base_url=vllm_base_url) if self._owns_client else get_vllm_client()
         self.inference_config = get_inference_config()
+        self.token_budgeter = get_token_budgeter()
+        # 짧은 입력은 vLLM 대신 규칙 기반 변환기로 처리
+        self.fast_path = RuleFastPath("comment")
         
-    # comment 변환 서비스 메서드 (vLLM 추론 로직만 사용)
-    async def transform_comment(self, content: str, emotion: CommentEmotion, post_type: CommentType) -> str:
+    # comment 변환 서비스 메서드 (짧은 입력은 규칙 기반, 나머지는 vLLM 추론)
+    @traced("comment_transform")
+    async def transform_comment(self, content: str, emotion: CommentEmotion, post_type: CommentType) -> TransformResult:
         try:
+            # 0. 짧은 입력(ㅋㅋㅋ, ㅠㅠ, 안녕 등)은 규칙 기반 빠른 경로
+            fast_result = self.fast_path.try_convert(content, post_type.value)
+            if fast_result is not None:
+                return fast_result
+
             # 감정은 무조건 normal로 고정
             fixed_emotion = "normal"
             
-            # 1. 프롬프트 생성기 통해 텍스트 프롬프트 생성
-            prompt_generator = CommentPromptGenerator(
-                emotion=fixed_emotion,
-                post_type=post_type.value,
-                content=content
-            )
-            formatted_prompt = prompt_generator.get_formatted_prompt()
+            with stage_timer("prompt_build"):
+                # 1. 프롬프트 생성기 통해 텍스트 프롬프트 생성
+                prompt_generator = CommentPromptGenerator(
+                    emotion=fixed_emotion,
+                    post_type=post_type.value,
+                    content=content
+                )
 
-            # 2. VLLMAsyncClient를 사용하여 vLLM 서버에 요청
-            async with VLLMAsyncClient(base_url=self.vllm_base_url) as client:
-                completion_request = CompletionRequest(
-                    prompt=formatted_prompt,
-                    max_tokens=self.inference_config.comment_max_tokens,
-                    temperature=self.inference_config.comment_temperature,
-                    top_p=self.inference_config.comment_top_p,
-                    top_k=self.inference_config.comment_top_k,
-                    stop=self.inference_config.comment_stop_tokens
+                # 2. 토큰 예산에 맞춰 입력 길이와 max_tokens 결정
+                token_plan = self.token_budgeter.plan(
+                    overhead=prompt_generator.get_prompt_prefix() + PROMPT_SUFFIX,
+                    content=prompt_generator.preprocess(content),
+                    max_tokens_cap=self.inference_config.comment_max_tokens
                 )
-                
-                result = await client.completion(completion_request)
-                generated_text = result["choices"][0]["text"].strip()
+                # 이미 전처리된 텍스트이므로 다시 전처리하지 않고 예산을 계산한 그대로 프롬프트 조립
+                formatted_prompt = prompt_generator.format_prompt(token_plan.content)
 
-                processed_text = self.postprocess(generated_text)
-                return processed_text
+            # 3. VLLMAsyncClient를 사용하여 vLLM 서버에 요청
+            completion_request = CompletionRequest(
+                prompt=formatted_prompt,
+                max_tokens=token_plan.max_tokens,
+                temperature=self.inference_config.comment_temperature,
+                top_p=self.inference_config.comment_top_p,
+                top_k=self.inference_config.comment_top_k,
+                stop=self.inference_config.comment_stop_tokens
+            )
+            
+            with stage_timer("vllm_request"):
+                result = await self.client.completion(completion_request)
+
+            with stage_timer("postprocess"):
+                # 공용 후처리 (입력 길이에 비례한 최대 길이, n-gram 반복 자르기)
+                processed_text = postprocess(
+                    result["choices"][0]["text"],
+                    max_chars=output_char_limit(token_plan.content, self.inference_config),
+                    ngram=self.inference_config.postprocess_ngram,
+                    max_repeat=self.inference_config.postprocess_max_repeat
+                )
+            return TransformResult(processed_text, TransformEngine.LLM)
 
         except Exception as e:
-            logger.error(f"댓글 변환 실패: {str(e)}")
-            # 오류 시 원본 반환
-            return content
-    
-    def postprocess(self, text: str, max_repeat: int = 3, max_len: int = 180) -> str:
-        """
-        - 모델 특수 토큰 및 불필요한 출력 제거
-        - 반복 단어/구절 간단 제거
-        - 출력이 너무 길 경우 문장 경계 기준 자르기
-        - 남은 불필요 공백 정리
-        """
-        # 0. 모델 특수 토큰 및 불필요한 출력 제거
-        if "Output:" in text:
-            text = text.split("Output:", 1)[-1]
-        text = text.strip().split('\n')[0]
-        text = re.sub(r'</s>', '', text)
-        text = re.sub(r'<\|endof.*?\|>', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'<\|.*?\|>', '', text)
-        text = text.replace('<s>', '')
-        text = text.strip()
-        
-        return text 
\ No newline at end of file
+            logger.error(f"댓글 변환 실패, 규칙 기반 변환 사용: {str(e)}")
+            # 오류 시 규칙 기반 변환기로 대체 (서킷 open, 대기열 가득 참, 데드라인 초과 등)
+            return rule_fallback("comment", content, post_type.value, e)
+
+        finally:
+            if self._owns_client:
+                await self.client.close()
@@ -0,0 +1,453 @@
+"""
+프로세스 분리형 이미지 임베딩 서비스
+
+CLIP 추론을 HTTP 서버 프로세스 밖의 워커 프로세스 풀에서 수행합니다.
+사이드카 프로세스가 Unix 소켓으로 이미지 바이트 배치를 받아 워커들에 나눠 주고(multiprocessing 큐),
+정규화된 벡터를 돌려줍니다. 죽은 워커는 감시 태스크가 백오프(연속 비정상 종료마다 2배, 상한 있음) 후 다시 띄우고,
+처리 중이던 요청은 오류로 응답합니다.
+
+EMBEDDING_BACKEND=worker인 API 프로세스는 EmbeddingClient(요청마다 Unix 소켓 연결)만 가지며,
+image_search는 local 백엔드에서 CLIP을 로드할 때만 torch/transformers를 import하므로 torch를 로드하지 않습니다.
+
+사이드카 실행:
+    python -m ai_server.model.embedding_worker --socket /tmp/meow-embedding.sock --workers 2
+
+프레임 형식: [4바이트 헤더 길이][헤더 JSON][바이너리 본문]
+    이미지 요청 헤더 {"sizes": [이미지별 바이트 수]}, 본문: 이미지 바이트 연결
+    텍스트 요청 헤더 {"texts": [검색어, ...]}, 본문 없음
+    응답 헤더 {"count": n, "dim": d, "errors": [None | 메시지]}, 본문: float32 (n, d)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import os
+import struct
+import threading
+import time
+from io import BytesIO
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ai_server.core.config import get_embedding_config
+
+logger = logging.getLogger(__name__)
+
+HEADER_STRUCT = struct.Struct(">I")
+MIN_IMAGE_SIZE = 32
+
+# 이미지 목록 -> (n, dim) 정규화 벡터
+# 텍스트 검색을 지원하는 임베더는 embed_text 속성(텍스트 목록 -> (n, dim) 정규화 벡터)을 가짐
+Embedder = Callable[[List[Image.Image]], np.ndarray]
+
+
+def decode_image(data: bytes) -> Image.Image:
+    """이미지 바이트를 RGB 이미지로 디코딩하고 최소 크기 검증"""
+    try:
+        image = Image.open(BytesIO(data)).convert("RGB")
+    except Exception as e:
+        raise ValueError(f"이미지 디코딩 실패: {e}")
+    if image.size[0] < MIN_IMAGE_SIZE or image.size[1] < MIN_IMAGE_SIZE:
+        raise ValueError(f"이미지가 너무 작습니다 (최소 {MIN_IMAGE_SIZE}x{MIN_IMAGE_SIZE})")
+    return image
+
+
+def load_clip_embedder() -> Embedder:
+    """CLIP 이미지 임베더 (워커 프로세스에서만 torch 로드)"""
+    import torch
+    from transformers import CLIPModel, CLIPProcessor
+
+    model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
+    processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
+    model.eval()
+
+    def embed(images: List[Image.Image]) -> np.ndarray:
+        inputs = processor(images=images, return_tensors="pt")
+        with torch.no_grad():
+            features = model.get_image_features(**inputs).cpu().numpy()
+        return features / np.linalg.norm(features, axis=1, keepdims=True)
+
+    def embed_text(texts: List[str]) -> np.ndarray:
+        inputs = processor(text=texts, return_tensors="pt", padding=True, truncation=True)
+        with torch.no_grad():
+            features = model.get_text_features(**inputs).cpu().numpy()
+        return features / np.linalg.norm(features, axis=1, keepdims=True)
+
+    embed.embed_text = embed_text
+    return embed
+
+
+def load_hash_embedder(dim: int = 512) -> Embedder:
+    """픽셀 해시 기반 결정적 임베더 (GPU/모델 없이 테스트, 부하 측정용)"""
+    def vectorize(payloads: List[bytes]) -> np.ndarray:
+        vectors = []
+        for payload in payloads:
+            seed = int.from_bytes(hashlib.sha256(payload).digest()[:8], "big")
+            vectors.append(np.random.default_rng(seed).standard_normal(dim))
+        matrix = np.asarray(vectors, dtype=np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    def embed(images: List[Image.Image]) -> np.ndarray:
+        return vectorize([image.tobytes() for image in images])
+
+    def embed_text(texts: List[str]) -> np.ndarray:
+        return vectorize([text.encode("utf-8") for text in texts])
+
+    embed.embed_text = embed_text
+    return embed
+
+
+def _import_embedder(path: str) -> Embedder:
+    module_name, attr = path.split(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def embed_batch(embedder: Embedder, images: Sequence[bytes]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """이미지별 디코딩 오류는 개별 처리하고 정상 이미지는 한 배치로 임베딩 (오류 항목은 0 벡터)"""
+    decoded, errors = [], []
+    for data in images:
+        try:
+            decoded.append(decode_image(data))
+            errors.append(None)
+        except ValueError as e:
+            decoded.append(None)
+            errors.append(str(e))
+
+    valid = [image for image in decoded if image is not None]
+    vectors = embedder(valid) if valid else np.zeros((0, 0), dtype=np.float32)
+    dim = vectors.shape[1] if len(valid) else 0
+    result = np.zeros((len(images), dim), dtype=np.float32)
+    rows = iter(vectors)
+    for i, image in enumerate(decoded):
+        if image is not None:
+            result[i] = next(rows)
+    return result, errors
+
+
+def embed_texts(embedder: Embedder, texts: Sequence[str]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """텍스트 배치 임베딩 (embed_text를 지원하지 않는 임베더면 RuntimeError)"""
+    embed_text = getattr(embedder, "embed_text", None)
+    if embed_text is None:
+        raise RuntimeError("이 임베더는 텍스트 임베딩을 지원하지 않습니다")
+    return np.asarray(embed_text(list(texts)), dtype=np.float32), [None] * len(texts)
+
+
+def _worker_main(embedder_path: str, requests: mp.Queue, results: Connection):
+    """워커 프로세스: 작업 큐에서 이미지/텍스트 배치를 받아 벡터를 결과 파이프로 반환"""
+    embedder = _import_embedder(embedder_path)
+    results.send(("ready", os.getpid(), None))
+    while True:
+        job = requests.get()
+        if job is None:
+            break
+        job_id, kind, payload = job
+        try:
+            if kind == "text":
+                vectors, errors = embed_texts(embedder, payload)
+            else:
+                vectors, errors = embed_batch(embedder, payload)
+            results.send((job_id, vectors, errors))
+        except Exception as e:
+            results.send((job_id, None, f"임베딩 실패: {e}"))
+
+
+class _WorkerHandle:
+    def __init__(self, process: mp.Process, requests: mp.Queue, failures: int = 0):
+        self.process = process
+        self.requests = requests
+        self.jobs: set = set()
+        self.started = time.monotonic()
+        self.failures = failures                 # 이 슬롯의 연속 비정상 종료 횟수 (백오프 계산)
+        self.respawn_at: Optional[float] = None  # 비정상 종료 후 재시작 예정 시각 (monotonic)
+
+
+class EmbeddingWorkerPool:
+    """임베딩 워커 프로세스 풀 (처리 중 작업이 가장 적은 워커로 분배, 죽으면 백오프 후 재시작)
+
+    Args:
+        workers: 워커 프로세스 수
+        embedder_path: 워커에서 호출할 임베더 팩토리 (module:function)
+        restart_backoff_initial: 재시작 백오프 초기값(초, 같은 슬롯이 연속으로 죽을 때마다 2배)
+        restart_backoff_max: 재시작 백오프 최대값(초)
+        restart_stable_period: 이 시간 이상 살아 있다가 죽으면 백오프 초기화(초)
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        embedder_path: str = "ai_server.model.embedding_worker:load_clip_embedder",
+        restart_backoff_initial: float = 0.5,
+        restart_backoff_max: float = 30.0,
+        restart_stable_period: float = 60.0,
+    ):
+        self.num_workers = workers
+        self.embedder_path = embedder_path
+        self.restart_backoff_initial = restart_backoff_initial
+        self.restart_backoff_max = restart_backoff_max
+        self.restart_stable_period = restart_stable_period
+        # torch/CUDA 상태를 물려받지 않도록 spawn 사용
+        self._ctx = mp.get_context("spawn")
+        self._workers: List[_WorkerHandle] = []
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._job_ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self.restarts = 0
+
+    def _spawn(self, failures: int = 0) -> _WorkerHandle:
+        # 결과 채널은 워커마다 따로 둠: 공유 큐는 SIGKILL된 워커가 쓰기 잠금을 쥔 채 죽으면
+        # 살아 있는 다른 워커의 결과까지 막힘
+        requests = self._ctx.Queue()
+        requests.cancel_join_thread()
+        receiver, sender = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main, args=(self.embedder_path, requests, sender), daemon=True
+        )
+        process.start()
+        # 부모 쪽 송신 끝을 닫아 워커가 죽으면 수신 스레드가 EOF로 종료되게 함
+        sender.close()
+        threading.Thread(
+            target=self._read_results, args=(receiver,), name=f"embedding-results-{process.pid}", daemon=True
+        ).start()
+        logger.info(f"임베딩 워커 시작: pid={process.pid}")
+        return _WorkerHandle(process, requests, failures)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._workers = [self._spawn() for _ in range(self.num_workers)]
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    def _read_results(self, receiver: Connection):
+        try:
+            while True:
+                message = receiver.recv()
+                self._loop.call_soon_threadsafe(self._resolve, *message)
+        except (EOFError, OSError, RuntimeError):
+            # 워커 종료(EOF) 또는 이벤트 루프 종료
+            pass
+        finally:
+            receiver.close()
+
+    def _resolve(self, job_id, vectors, errors):
+        if job_id == "ready":
+            return
+        for worker in self._workers:
+            worker.jobs.discard(job_id)
+        future = self._pending.pop(job_id, None)
+        if future is None or future.done():
+            return
+        if vectors is None:
+            future.set_exception(RuntimeError(errors))
+        else:
+            future.set_result((vectors, errors))
+
+    def backoff_delay(self, failures: int) -> float:
+        """연속 비정상 종료 횟수별 재시작 대기 시간"""
+        delay = self.restart_backoff_initial * (2 ** max(failures - 1, 0))
+        return min(delay, self.restart_backoff_max)
+
+    async def _monitor(self, interval: float = 0.1):
+        """죽은 워커의 처리 중 작업은 바로 실패 처리하고, 백오프가 지나면 재시작"""
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for index, worker in enumerate(self._workers):
+                if worker.respawn_at is None:
+                    if worker.process.is_alive():
+                        continue
+                    for job_id in worker.jobs:
+                        future = self._pending.pop(job_id, None)
+                        if future and not future.done():
+                            future.set_exception(RuntimeError("임베딩 워커가 비정상 종료되었습니다"))
+                    worker.jobs.clear()
+                    stable = now - worker.started >= self.restart_stable_period
+                    worker.failures = 1 if stable else worker.failures + 1
+                    delay = self.backoff_delay(worker.failures)
+                    worker.respawn_at = now + delay
+                    logger.error(
+                        f"임베딩 워커 비정상 종료 (pid={worker.process.pid}, exit={worker.process.exitcode}), "
+                        f"{delay:.1f}초 후 재시작"
+                    )
+                if now >= worker.respawn_at:
+                    self._workers[index] = self._spawn(worker.failures)
+                    self.restarts += 1
+
+    async def _submit(self, kind: str, payload: list) -> Tuple[np.ndarray, List[Optional[str]]]:
+        # 재시작 대기 중인 슬롯에는 보내지 않음 (작업 큐를 읽을 프로세스가 없음)
+        alive = [w for w in self._workers if w.respawn_at is None]
+        if not alive:
+            raise RuntimeError("사용 가능한 임베딩 워커가 없습니다 (재시작 대기 중)")
+        worker = min(alive, key=lambda w: len(w.jobs))
+        job_id = next(self._job_ids)
+        future = self._loop.create_future()
+        self._pending[job_id] = future
+        worker.jobs.add(job_id)
+        worker.requests.put((job_id, kind, payload))
+        return await future
+
+    async def embed(self, images: List[bytes]) -> Tuple[np.ndarray, List[Optional[str]]]:
+        return await self._submit("image", images)
+
+    async def embed_texts(self, texts: List[str]) -> Tuple[np.ndarray, List[Optional[str]]]:
+        return await self._submit("text", texts)
+
+    def worker_pids(self) -> List[int]:
+        return [worker.process.pid for worker in self._workers]
+
+    async def close(self):
+        if self._monitor_task:
+            self._monitor_task.cancel()
+        for worker in self._workers:
+            worker.requests.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[Dict, bytes]:
+    (header_len,) = HEADER_STRUCT.unpack(await reader.readexactly(HEADER_STRUCT.size))
+    header = json.loads(await reader.readexactly(header_len))
+    body = await reader.readexactly(header.get("body_size", 0))
+    return header, body
+
+
+def _encode_frame(header: Dict, body: bytes = b"") -> bytes:
+    header = {**header, "body_size": len(body)}
+    encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return HEADER_STRUCT.pack(len(encoded)) + encoded + body
+
+
+class EmbeddingServer:
+    """Unix 소켓으로 이미지 배치를 받아 워커 풀에 위임하는 사이드카 서버"""
+
+    def __init__(self, socket_path: str, pool: EmbeddingWorkerPool):
+        self.socket_path = socket_path
+        self.pool = pool
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            header, body = await _read_frame(reader)
+            try:
+                if "texts" in header:
+                    vectors, errors = await self.pool.embed_texts(header["texts"])
+                else:
+                    images, offset = [], 0
+                    for size in header["sizes"]:
+                        images.append(body[offset:offset + size])
+                        offset += size
+                    vectors, errors = await self.pool.embed(images)
+                response = _encode_frame(
+                    {"count": len(errors), "dim": int(vectors.shape[1]), "errors": errors},
+                    vectors.astype(np.float32).tobytes(),
+                )
+            except Exception as e:
+                response = _encode_frame({"error": str(e)})
+            writer.write(response)
+            await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        await self.pool.start()
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        logger.info(f"임베딩 서버 시작: {self.socket_path} (workers={self.pool.num_workers})")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.pool.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class EmbeddingClient:
+    """임베딩 사이드카용 얇은 비동기 클라이언트 (요청마다 Unix 소켓 연결)"""
+
+    def __init__(self, socket_path: str, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    async def _request(self, header: Dict, body: bytes = b"") -> Tuple[np.ndarray, List[Optional[str]]]:
+        async def request():
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            try:
+                writer.write(_encode_frame(header, body))
+                await writer.drain()
+                return await _read_frame(reader)
+            finally:
+                writer.close()
+
+        response, data = await asyncio.wait_for(request(), timeout=self.timeout)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        vectors = np.frombuffer(data, dtype=np.float32).reshape(response["count"], response["dim"])
+        return vectors, response["errors"]
+
+    async def embed_with_errors(self, images: List[bytes]) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """이미지 바이트 배치 -> ((n, dim) 벡터, 이미지별 오류 메시지)"""
+        return await self._request({"sizes": [len(data) for data in images]}, b"".join(images))
+
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """텍스트 배치 -> (n, dim) 벡터"""
+        vectors, _ = await self._request({"texts": list(texts)})
+        return vectors
+
+    async def embed(self, images: List[bytes]) -> np.ndarray:
+        """이미지 바이트 배치 -> (n, dim) 벡터 (오류 항목이 있으면 ValueError)"""
+        vectors, errors = await self.embed_with_errors(images)
+        for error in errors:
+            if error:
+                raise ValueError(error)
+        return vectors
+
+    def embed_sync(self, images: List[bytes]) -> np.ndarray:
+        """이벤트 루프 밖(백그라운드 스레드 등)에서 사용하는 동기 버전"""
+        return asyncio.run(self.embed(images))
+
+
+def main():
+    """메인 함수"""
+    config = get_embedding_config()
+    parser = argparse.ArgumentParser(description="이미지 임베딩 사이드카")
+    parser.add_argument("--socket", default=config.socket_path, help="Unix 소켓 경로")
+    parser.add_argument("--workers", type=int, default=config.workers, help="임베딩 워커 프로세스 수")
+    parser.add_argument("--embedder", default=config.embedder, help="임베더 팩토리 (module:function)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pool = EmbeddingWorkerPool(
+        args.workers,
+        args.embedder,
+        restart_backoff_initial=config.restart_backoff_initial,
+        restart_backoff_max=config.restart_backoff_max,
+        restart_stable_period=config.restart_stable_period,
+    )
+    server = EmbeddingServer(args.socket, pool)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
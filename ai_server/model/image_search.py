@@ -1,34 +1,78 @@
 import requests
-import torch
 import numpy as np
 from PIL import Image
 from io import BytesIO
-from transformers import CLIPProcessor, CLIPModel
 import chromadb
 from chromadb.errors import NotFoundError
-from typing import List, Optional, Dict
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Dict, Sequence, Tuple, Union
+import asyncio
+import json
 import logging
 import os
 import threading
 import time
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from ai_server.core.tracing import traced
+from ai_server.core.metrics import stage_timer
+from ai_server.core.config import get_embedding_config
+from ai_server.model.embedding_worker import EmbeddingClient, decode_image, embed_batch
+from ai_server.schemas.image_schemas import AnimalPrediction, ImageMatch
+from ai_server.util.mmr import candidate_pool_size, mmr
+from ai_server.util.text_embedding_cache import TextEmbeddingCache
+from ai_server.util.zero_shot import ZeroShotClassifier
+
+# torch/transformers는 local 백엔드에서 CLIP을 로드할 때만 import (worker 백엔드의 API 프로세스는 로드하지 않음)
+if TYPE_CHECKING:
+    from transformers import CLIPModel, CLIPProcessor
 
 logger = logging.getLogger(__name__)
 
+# 배치 검색 시 동시 다운로드 수
+BATCH_DOWNLOAD_CONCURRENCY = 8
+
+# 쿼리 이미지 최대 크기 (다운로드/업로드 공통)
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+class ImageQuery(NamedTuple):
+    """배치 검색의 항목 하나"""
+    image_url: str
+    animal_type: str
+    n_results: int = 3
+    where: Optional[Dict[str, Any]] = None
+    min_similarity: Optional[float] = None
+    diversity: float = 0.0
+
+
+class ImageSearchResult(NamedTuple):
+    """검색 결과와 (animal_type=auto 일 때) 동물 판별 결과"""
+    matches: List[ImageMatch]
+    animal: Optional[AnimalPrediction] = None
+
+
+def build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """단순 동등 조건 dict를 ChromaDB where 절로 변환 (여러 키는 $and로 묶음, 연산자 절은 그대로 전달)"""
+    if not filters:
+        return None
+    if len(filters) == 1 or any(key.startswith("$") for key in filters):
+        return filters
+    return {"$and": [{key: value} for key, value in filters.items()]}
+
 class ImageSearchService:
     """이미지 유사도 검색 서비스"""
     
-    def __init__(self, db_base_path: str = "./image_embeddings_db"):
+    def __init__(self, db_base_path: str = "./image_embeddings_db", embedding_backend: Optional[str] = None):
         """
         초기화
         
         Args:
             db_base_path: ChromaDB 기본 저장 경로
+            embedding_backend: "local"(프로세스 내 CLIP) 또는 "worker"(임베딩 사이드카), 미지정 시 설정값
         """
         self.db_base_path = db_base_path
-        self.model: Optional[CLIPModel] = None
-        self.processor: Optional[CLIPProcessor] = None
+        self.model: Optional["CLIPModel"] = None
+        self.processor: Optional["CLIPProcessor"] = None
         self.collections: Dict[str, any] = {}
         self.clients: Dict[str, any] = {}  # ChromaDB 클라이언트 캐시
         self._initialization_lock = threading.Lock()
@@ -45,13 +89,31 @@ class ImageSearchService:
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
         
-        # CLIP 모델 초기화 (즉시 로드)
-        self._initialize_clip_model()
+        # 임베딩 백엔드: worker면 사이드카 클라이언트만 두고 CLIP은 로드하지 않음
+        embedding_config = get_embedding_config()
+        self.embedding_client: Optional[EmbeddingClient] = None
+        if (embedding_backend or embedding_config.backend) == "worker":
+            self.embedding_client = EmbeddingClient(embedding_config.socket_path, embedding_config.timeout)
+            logger.info(f"Using embedding worker at {embedding_config.socket_path}")
+        else:
+            # CLIP 모델 초기화 (즉시 로드)
+            self._initialize_clip_model()
+        
+        # 텍스트 검색어 임베딩 캐시 (같은 CLIP 모델의 텍스트 인코더 사용)
+        self.text_cache = TextEmbeddingCache(
+            self.embed_texts,
+            maxsize=embedding_config.text_cache_size,
+            max_batch=embedding_config.text_batch_size,
+            max_wait=embedding_config.text_batch_wait_ms / 1000
+        )
+        # animal_type=auto 판별용 제로샷 분류기 (프롬프트 임베딩은 첫 사용 시 계산)
+        self.animal_classifier = ZeroShotClassifier()
     
     def _initialize_clip_model(self):
         """CLIP 모델 초기화 (한 번만 실행)"""
         try:
             if self.model is None:
+                from transformers import CLIPModel, CLIPProcessor
                 logger.info("Loading CLIP model...")
                 self.model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
                 self.processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
@@ -103,8 +165,8 @@ class ImageSearchService:
                 logger.error(f"ChromaDB initialization failed for {animal_type}: {e}")
                 raise
 
-    def download_image_from_url(self, image_url: str) -> Image.Image:
-        """웹 URL에서 이미지 다운로드 (최적화된 타임아웃 및 재시도)"""
+    def download_image_bytes(self, image_url: str) -> bytes:
+        """웹 URL에서 이미지 바이트 다운로드 (최적화된 타임아웃 및 재시도)"""
         try:
             # 세션을 사용하여 연결 풀링 활용, 타임아웃 5초로 단축
             response = self.session.get(
@@ -119,18 +181,13 @@ class ImageSearchService:
             
             # 이미지 크기 체크 (10MB 제한)
             content_length = response.headers.get('content-length')
-            if content_length and int(content_length) > 10 * 1024 * 1024:
+            if content_length and int(content_length) > MAX_IMAGE_BYTES:
                 raise ValueError("이미지 파일이 너무 큽니다 (10MB 초과)")
             
-            image = Image.open(BytesIO(response.content)).convert('RGB')
-            
-            # 이미지 크기 검증
-            if image.size[0] < 32 or image.size[1] < 32:
-                raise ValueError("이미지가 너무 작습니다 (최소 32x32)")
-            
-            logger.debug(f"Image downloaded: {image.size}")
-            return image
+            return response.content
             
+        except ValueError:
+            raise
         except requests.exceptions.Timeout:
             logger.warning(f"Image download timeout: {image_url}")
             raise ValueError("이미지 다운로드 시간 초과 (5초)")
@@ -144,9 +201,21 @@ class ImageSearchService:
             logger.error(f"Image download failed: {e}")
             raise ValueError(f"이미지 다운로드 실패: {e}")
 
+    def download_image_from_url(self, image_url: str) -> Image.Image:
+        """웹 URL에서 이미지 다운로드 후 디코딩 (최소 32x32 검증)"""
+        image = decode_image(self.download_image_bytes(image_url))
+        logger.debug(f"Image downloaded: {image.size}")
+        return image
+
     def extract_query_embedding(self, image: Image.Image) -> np.ndarray:
         """쿼리 이미지에서 CLIP 임베딩 추출"""
+        if self.embedding_client is not None:
+            # 사이드카 사용 시 (DB 구축 등 이벤트 루프 밖에서 호출)
+            buffer = BytesIO()
+            image.save(buffer, format="PNG")
+            return self.embedding_client.embed_sync([buffer.getvalue()])[0]
         try:
+            import torch
             inputs = self.processor(images=image, return_tensors="pt")
             
             with torch.no_grad():
@@ -161,8 +230,75 @@ class ImageSearchService:
             logger.error(f"Embedding extraction failed: {e}")
             raise
 
-    def search_chromadb(self, query_embedding: np.ndarray, animal_type: str, n_results: int = 3) -> List[str]:
-        """ChromaDB에서 유사도 검색"""
+    def extract_query_embeddings(self, images: List[Image.Image]) -> np.ndarray:
+        """여러 이미지를 한 번의 CLIP 배치로 임베딩 (행별 정규화)"""
+        try:
+            import torch
+            inputs = self.processor(images=images, return_tensors="pt")
+            
+            with torch.no_grad():
+                embeddings = self.model.get_image_features(**inputs).cpu().numpy()
+            
+            return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        except Exception as e:
+            logger.error(f"Batch embedding extraction failed: {e}")
+            raise
+
+    def extract_text_embeddings(self, texts: List[str]) -> np.ndarray:
+        """검색어 배치에서 CLIP 텍스트 임베딩 추출 (행별 정규화)"""
+        try:
+            import torch
+            inputs = self.processor(text=texts, return_tensors="pt", padding=True, truncation=True)
+            
+            with torch.no_grad():
+                embeddings = self.model.get_text_features(**inputs).cpu().numpy()
+            
+            return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        except Exception as e:
+            logger.error(f"Text embedding extraction failed: {e}")
+            raise
+
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """검색어 배치 임베딩 (local: 스레드에서 CLIP, worker: 사이드카)"""
+        if self.embedding_client is not None:
+            return await self.embedding_client.embed_texts(texts)
+        return await asyncio.to_thread(self.extract_text_embeddings, texts)
+
+    async def embed_image_bytes(self, images: List[bytes]) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """이미지 바이트 배치 임베딩 (이미지별 디코딩 오류는 개별 반환)"""
+        if self.embedding_client is not None:
+            return await self.embedding_client.embed_with_errors(images)
+        return await asyncio.to_thread(embed_batch, self.extract_query_embeddings, images)
+
+    def search_chromadb(
+        self,
+        query_embedding: np.ndarray,
+        animal_type: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        min_similarity: Optional[float] = None,
+        diversity: float = 0.0,
+    ) -> List[ImageMatch]:
+        """ChromaDB에서 유사도 검색 (메타데이터 필터/최소 유사도/MMR 다양화 적용)"""
+        return self.search_chromadb_batch(
+            query_embedding[np.newaxis, :], animal_type, [n_results], where=where,
+            min_similarity=[min_similarity], diversity=[diversity]
+        )[0]
+
+    def search_chromadb_batch(
+        self,
+        query_embeddings: np.ndarray,
+        animal_type: str,
+        n_results: Sequence[int],
+        where: Optional[Dict[str, Any]] = None,
+        min_similarity: Optional[Sequence[Optional[float]]] = None,
+        diversity: Optional[Sequence[float]] = None,
+    ) -> List[List[ImageMatch]]:
+        """
+        여러 쿼리 벡터를 한 번의 ChromaDB 조회로 검색 (쿼리별 결과 개수/최소 유사도/다양성은 개별 지정)
+        
+        diversity가 0보다 큰 쿼리는 후보를 더 가져와 저장된 임베딩으로 MMR 재순위화합니다.
+        """
         try:
             # 동물 타입 검증
             if animal_type not in ["cat", "dog"]:
@@ -171,30 +307,233 @@ class ImageSearchService:
             # ChromaDB 지연 초기화
             self._ensure_chromadb_initialized(animal_type)
             
-            collection = self.collections[animal_type]
-            results = collection.query(
-                query_embeddings=[query_embedding.tolist()],
-                n_results=n_results
+            thresholds = min_similarity or [None] * len(n_results)
+            diversities = diversity or [0.0] * len(n_results)
+            fetch_counts = [candidate_pool_size(n) if d > 0 else n for n, d in zip(n_results, diversities)]
+            rerank = any(d > 0 for d in diversities)
+            
+            results = self.collections[animal_type].query(
+                query_embeddings=query_embeddings.tolist(),
+                n_results=max(fetch_counts),
+                where=build_where(where),
+                include=["distances", "metadatas", "embeddings"] if rerank else ["distances", "metadatas"]
             )
             
-            image_urls = results['ids'][0] if results['ids'] else []
-            return image_urls
+            ids = results['ids'] or [[] for _ in n_results]
+            distances = results.get('distances') or [[] for _ in n_results]
+            metadatas = results.get('metadatas') or [[None] * len(row) for row in ids]
+            candidate_embeddings = results.get('embeddings') if rerank else None
+            matches = []
+            for row, (row_ids, n, fetch, threshold, row_diversity) in enumerate(
+                zip(ids, n_results, fetch_counts, thresholds, diversities)
+            ):
+                # 최소 유사도는 MMR 전에 후보에 적용 (MMR이 고른 뒤 거르면 통과한 후보가 있어도 n개보다 적게 남음)
+                eligible = [
+                    j for j in range(min(fetch, len(row_ids)))
+                    if threshold is None or 1.0 - distances[row][j] >= threshold
+                ]
+                order = eligible[:n]
+                if row_diversity > 0 and eligible:
+                    with stage_timer("mmr_rerank"):
+                        picked = mmr(query_embeddings[row], np.asarray(candidate_embeddings[row])[eligible], n, row_diversity)
+                    order = [eligible[i] for i in picked]
+                matches.append([
+                    ImageMatch(
+                        url=row_ids[j],
+                        distance=distances[row][j],
+                        similarity=1.0 - distances[row][j],
+                        animal_type=animal_type,
+                        metadata=metadatas[row][j]
+                    )
+                    for j in order
+                ])
+            return matches
             
         except Exception as e:
             logger.error(f"ChromaDB search failed: {e}")
             raise
 
-    def search_similar_images(self, image_url: str, animal_type: str, n_results: int = 3) -> List[str]:
+    def search_chromadb_candidates(
+        self,
+        query_embedding: np.ndarray,
+        animal_type: str,
+        n_candidates: int,
+        where: Optional[Dict[str, Any]] = None,
+        min_similarity: Optional[float] = None,
+    ) -> Tuple[List[ImageMatch], np.ndarray]:
+        """MMR 후보 조회: 최소 유사도를 통과한 상위 후보와 저장된 임베딩 (여러 컬렉션 후보를 합쳐 한 번에 재순위화할 때 사용)"""
+        if animal_type not in ["cat", "dog"]:
+            raise ValueError(f"지원하지 않는 동물 타입: {animal_type}")
+        self._ensure_chromadb_initialized(animal_type)
+        results = self.collections[animal_type].query(
+            query_embeddings=[query_embedding.tolist()],
+            n_results=n_candidates,
+            where=build_where(where),
+            include=["distances", "metadatas", "embeddings"]
+        )
+        ids = (results['ids'] or [[]])[0]
+        distances = (results.get('distances') or [[]])[0]
+        metadatas = (results.get('metadatas') or [[None] * len(ids)])[0]
+        embeddings = results.get('embeddings')
+        eligible = [j for j in range(len(ids)) if min_similarity is None or 1.0 - distances[j] >= min_similarity]
+        matches = [
+            ImageMatch(
+                url=ids[j],
+                distance=distances[j],
+                similarity=1.0 - distances[j],
+                animal_type=animal_type,
+                metadata=metadatas[j]
+            )
+            for j in eligible
+        ]
+        vectors = np.asarray(embeddings[0], dtype=np.float32)[eligible] if eligible else np.empty((0, len(query_embedding)), dtype=np.float32)
+        return matches, vectors
+
+    async def classify_animals(self, embeddings: np.ndarray) -> List[AnimalPrediction]:
+        """이미지 임베딩으로 동물 종류 판별 (CLIP 제로샷, 프롬프트 임베딩은 처음 한 번만 계산)"""
+        await self.animal_classifier.ensure_ready(self.embed_texts)
+        with stage_timer("animal_classify"):
+            return self.animal_classifier.classify(embeddings)
+
+    @staticmethod
+    def _searchable_animal(prediction: AnimalPrediction) -> str:
+        """판별된 동물의 검색 컬렉션 (cat/dog가 아니면 ValueError)"""
+        if prediction.animal_type not in ["cat", "dog"]:
+            raise ValueError(
+                f"고양이나 강아지 사진이 아닌 것 같습니다 ({prediction.animal_type}, 신뢰도 {prediction.confidence:.2f})"
+            )
+        return prediction.animal_type
+
+    async def _search_embedding(
+        self,
+        query_embedding: np.ndarray,
+        animal_type: str,
+        n_results: int,
+        where: Optional[Dict[str, Any]],
+        min_similarity: Optional[float],
+        diversity: float,
+    ) -> ImageSearchResult:
+        """계산된 쿼리 임베딩으로 검색 (auto면 먼저 동물 종류 판별)"""
+        animal = None
+        if animal_type == "auto":
+            animal = (await self.classify_animals(query_embedding))[0]
+            animal_type = self._searchable_animal(animal)
+        with stage_timer("vector_query"):
+            matches = await asyncio.to_thread(
+                self.search_chromadb, query_embedding, animal_type, n_results, where, min_similarity, diversity
+            )
+        return ImageSearchResult(matches, animal)
+
+    @traced("image_search_batch")
+    async def search_similar_images_batch(self, items: Sequence[Union[ImageQuery, Tuple]]) -> List[Union[ImageSearchResult, Exception]]:
+        """
+        여러 이미지의 유사 이미지 검색
+        
+        다운로드는 동시에, 임베딩은 한 번의 CLIP 배치로, 검색은 (동물 컬렉션, 필터)별 한 번의 조회로 처리합니다.
+        animal_type이 auto인 항목은 배치 임베딩으로 한 번에 동물 종류를 판별합니다.
+        
+        Args:
+            items: ImageQuery (또는 같은 순서의 튜플) 목록
+            
+        Returns:
+            입력 순서대로 검색 결과 또는 해당 항목의 예외 (ValueError: 잘못된 입력)
+        """
+        queries = [ImageQuery(*item) for item in items]
+        results: List[Union[ImageSearchResult, Exception, None]] = [None] * len(queries)
+        for i, query in enumerate(queries):
+            if query.animal_type not in ["cat", "dog", "auto"]:
+                results[i] = ValueError("동물 타입은 'cat', 'dog' 또는 'auto'여야 합니다")
+
+        # 1. 동시 다운로드 (동시성 상한 적용)
+        semaphore = asyncio.Semaphore(BATCH_DOWNLOAD_CONCURRENCY)
+
+        async def download(url: str) -> bytes:
+            async with semaphore:
+                return await asyncio.to_thread(self.download_image_bytes, url)
+
+        pending = [i for i in range(len(queries)) if results[i] is None]
+        with stage_timer("image_download"):
+            downloads = await asyncio.gather(*(download(queries[i].image_url) for i in pending), return_exceptions=True)
+        image_bytes: Dict[int, bytes] = {}
+        for i, data in zip(pending, downloads):
+            if isinstance(data, Exception):
+                results[i] = data
+            else:
+                image_bytes[i] = data
+        pending = list(image_bytes)
+
+        # 2. 한 번의 배치 임베딩
+        embeddings: Dict[int, np.ndarray] = {}
+        if pending:
+            with stage_timer("clip_embed"):
+                vectors, errors = await self.embed_image_bytes([image_bytes[i] for i in pending])
+            for row, (i, error) in enumerate(zip(pending, errors)):
+                if error:
+                    results[i] = ValueError(error)
+                else:
+                    embeddings[i] = vectors[row]
+
+        # 3. auto 항목 동물 판별 (한 번의 내적)
+        animal_types = {i: queries[i].animal_type for i in embeddings}
+        predictions: Dict[int, AnimalPrediction] = {}
+        auto = [i for i in embeddings if animal_types[i] == "auto"]
+        if auto:
+            for i, prediction in zip(auto, await self.classify_animals(np.stack([embeddings[i] for i in auto]))):
+                predictions[i] = prediction
+                try:
+                    animal_types[i] = self._searchable_animal(prediction)
+                except ValueError as e:
+                    results[i] = e
+                    del embeddings[i]
+
+        # 4. (동물 컬렉션, 필터)별 한 번의 다중 벡터 조회
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i in embeddings:
+            key = (animal_types[i], json.dumps(queries[i].where, sort_keys=True))
+            groups.setdefault(key, []).append(i)
+        with stage_timer("vector_query"):
+            for (animal_type, _), group in groups.items():
+                try:
+                    matches = await asyncio.to_thread(
+                        self.search_chromadb_batch,
+                        np.stack([embeddings[i] for i in group]),
+                        animal_type,
+                        [queries[i].n_results for i in group],
+                        queries[group[0]].where,
+                        [queries[i].min_similarity for i in group],
+                        [queries[i].diversity for i in group],
+                    )
+                    for i, row in zip(group, matches):
+                        results[i] = ImageSearchResult(row, predictions.get(i))
+                except Exception as e:
+                    for i in group:
+                        results[i] = e
+
+        return results
+
+    @traced("image_search")
+    def search_similar_images(
+        self,
+        image_url: str,
+        animal_type: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        min_similarity: Optional[float] = None,
+        diversity: float = 0.0,
+    ) -> List[ImageMatch]:
         """
-        메인 함수: 이미지 URL을 받아서 유사한 이미지 URL 반환
+        메인 함수: 이미지 URL을 받아서 유사한 이미지 반환
         
         Args:
             image_url (str): 검색할 이미지의 웹 URL
-            animal_type (str): 동물 종류 ("cat" 또는 "dog")
+            animal_type (str): 동물 종류 ("cat" 또는 "dog", 자동 판별은 비동기 버전에서 지원)
             n_results (int): 반환할 결과 개수 (기본값: 3)
+            where (dict): 메타데이터 필터 (예: {"breed": "persian"})
+            min_similarity (float): 최소 코사인 유사도 (미만인 결과 제외)
+            diversity (float): MMR 다양성 가중치 (0이면 유사도 순 그대로)
             
         Returns:
-            List[str]: 유사한 이미지 URL 리스트
+            List[ImageMatch]: 유사도 순 검색 결과 (URL, 거리, 유사도, 메타데이터)
         """
         start_time = time.time()
         
@@ -204,21 +543,156 @@ class ImageSearchService:
                 raise ValueError("동물 타입은 'cat' 또는 'dog'여야 합니다")
             
             # 이미지 다운로드 및 임베딩 추출
-            image = self.download_image_from_url(image_url)
-            query_embedding = self.extract_query_embedding(image)
+            with stage_timer("image_download"):
+                image = self.download_image_from_url(image_url)
+            with stage_timer("clip_embed"):
+                query_embedding = self.extract_query_embedding(image)
             
             # 유사도 검색
-            similar_urls = self.search_chromadb(query_embedding, animal_type, n_results)
+            with stage_timer("vector_query"):
+                matches = self.search_chromadb(query_embedding, animal_type, n_results, where, min_similarity, diversity)
             
             elapsed_time = time.time() - start_time
-            logger.info(f"Found {len(similar_urls)} similar images for {animal_type} in {elapsed_time:.2f}s")
-            return similar_urls
+            logger.info(f"Found {len(matches)} similar images for {animal_type} in {elapsed_time:.2f}s")
+            return matches
             
         except Exception as e:
             elapsed_time = time.time() - start_time
             logger.error(f"Image search failed in {elapsed_time:.2f}s: {e}")
             raise
     
+    async def search_similar_images_async(
+        self,
+        image_url: str,
+        animal_type: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        min_similarity: Optional[float] = None,
+        diversity: float = 0.0,
+    ) -> ImageSearchResult:
+        """
+        search_similar_images의 비동기 버전 (이벤트 루프를 막지 않음, animal_type="auto" 지원)
+        
+        local 백엔드에서 동물 타입을 지정하면 전체 검색을 스레드에서 실행하고,
+        그 외에는 다운로드/DB 조회만 스레드에서 하고 임베딩은 배치 임베딩 경로(스레드 또는 사이드카)를 사용합니다.
+        """
+        if self.embedding_client is None and animal_type != "auto":
+            matches = await asyncio.to_thread(self.search_similar_images, image_url, animal_type, n_results, where, min_similarity, diversity)
+            return ImageSearchResult(matches)
+        return await self._search_pipelined(image_url, animal_type, n_results, where, min_similarity, diversity)
+
+    @traced("image_search")
+    async def search_similar_image_bytes_async(
+        self,
+        image_bytes: bytes,
+        animal_type: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        min_similarity: Optional[float] = None,
+        diversity: float = 0.0,
+    ) -> ImageSearchResult:
+        """
+        업로드된 이미지 바이트로 유사 이미지 검색 (URL 다운로드 단계 없음)
+        
+        Raises:
+            ValueError: 잘못된 동물 타입 또는 디코딩할 수 없는 이미지
+        """
+        if animal_type not in ["cat", "dog", "auto"]:
+            raise ValueError("동물 타입은 'cat', 'dog' 또는 'auto'여야 합니다")
+
+        with stage_timer("clip_embed"):
+            embeddings, errors = await self.embed_image_bytes([image_bytes])
+        if errors[0]:
+            raise ValueError(errors[0])
+        return await self._search_embedding(embeddings[0], animal_type, n_results, where, min_similarity, diversity)
+
+    @traced("image_text_search")
+    async def search_by_text(
+        self,
+        query: str,
+        animal_types: Sequence[str] = ("cat", "dog"),
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        min_similarity: Optional[float] = None,
+        diversity: float = 0.0,
+    ) -> List[ImageMatch]:
+        """
+        텍스트 검색어로 유사 이미지 검색 (CLIP 텍스트 임베딩, 이미지 다운로드 없음)
+        
+        여러 동물 컬렉션을 지정하면 컬렉션별로 동시에 검색한 뒤 유사도 순으로 합쳐 n_results개를 반환합니다.
+        diversity > 0이면 컬렉션별 MMR 결과를 유사도로 다시 정렬하면 다양화 순서가 깨지므로,
+        컬렉션별 후보를 합친 풀에서 MMR을 한 번만 적용합니다.
+        """
+        for animal_type in animal_types:
+            if animal_type not in ["cat", "dog"]:
+                raise ValueError("동물 타입은 'cat' 또는 'dog'여야 합니다")
+
+        with stage_timer("text_embed"):
+            query_embedding = await self.text_cache.get(query)
+        if len(animal_types) > 1 and diversity > 0:
+            with stage_timer("vector_query"):
+                pools = await asyncio.gather(*(
+                    asyncio.to_thread(
+                        self.search_chromadb_candidates, query_embedding, animal_type,
+                        candidate_pool_size(n_results), where, min_similarity
+                    )
+                    for animal_type in animal_types
+                ))
+            candidates = [match for matches, _ in pools for match in matches]
+            if not candidates:
+                return []
+            with stage_timer("mmr_rerank"):
+                picked = mmr(query_embedding, np.concatenate([vectors for _, vectors in pools]), n_results, diversity)
+            return [candidates[i] for i in picked]
+
+        with stage_timer("vector_query"):
+            rows = await asyncio.gather(*(
+                asyncio.to_thread(self.search_chromadb, query_embedding, animal_type, n_results, where, min_similarity, diversity)
+                for animal_type in animal_types
+            ))
+        if len(rows) == 1:
+            return rows[0]
+        return sorted((match for row in rows for match in row), key=lambda match: -match.similarity)[:n_results]
+
+    @traced("image_search")
+    async def _search_pipelined(
+        self,
+        image_url: str,
+        animal_type: str,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        min_similarity: Optional[float] = None,
+        diversity: float = 0.0,
+    ) -> ImageSearchResult:
+        """단계별 비동기 검색: 다운로드(스레드) -> 임베딩(스레드 또는 사이드카) -> 동물 판별(auto) -> DB 조회(스레드)"""
+        if animal_type not in ["cat", "dog", "auto"]:
+            raise ValueError("동물 타입은 'cat', 'dog' 또는 'auto'여야 합니다")
+
+        with stage_timer("image_download"):
+            image_bytes = await asyncio.to_thread(self.download_image_bytes, image_url)
+        with stage_timer("clip_embed"):
+            embeddings, errors = await self.embed_image_bytes([image_bytes])
+        if errors[0]:
+            raise ValueError(errors[0])
+        return await self._search_embedding(embeddings[0], animal_type, n_results, where, min_similarity, diversity)
+    
+    async def warm_up_embeddings(self):
+        """더미 이미지/프롬프트 임베딩으로 첫 추론 비용을 미리 지불 (auto 분류기 준비 포함)"""
+        buffer = BytesIO()
+        Image.new("RGB", (224, 224), (128, 128, 128)).save(buffer, format="PNG")
+        _, errors = await self.embed_image_bytes([buffer.getvalue()])
+        if errors[0]:
+            raise RuntimeError(f"워밍업 이미지 임베딩 실패: {errors[0]}")
+        await self.animal_classifier.ensure_ready(self.embed_texts)
+
+    def warm_up_collections(self, animal_types: Sequence[str] = ("cat", "dog")) -> Dict[str, int]:
+        """검색 컬렉션을 미리 열고 동물별 색인 수 반환"""
+        counts = {}
+        for animal_type in animal_types:
+            self._ensure_chromadb_initialized(animal_type)
+            counts[animal_type] = self.collections[animal_type].count()
+        return counts
+
     def cleanup(self):
         """모든 리소스 명시적 정리"""
         try:
@@ -1,89 +1,138 @@
-from ai_server.schemas.post_schemas import Emotion, PostType
+from ai_server.schemas.post_schemas import Emotion, PostType, TransformEngine
 from ai_server.util.post_prompt import PostPromptGenerator
-from ai_server.external.vLLM import VLLMAsyncClient, CompletionRequest
+from ai_server.external.vLLM import VLLMAsyncClient, CompletionRequest, get_vllm_client
+from ai_server.util.prompt_layout import PROMPT_SUFFIX
+from ai_server.util.token_budget import get_token_budgeter
+from ai_server.util.fast_path import RuleFastPath, TransformResult, rule_fallback
+from ai_server.util.postprocess import output_char_limit, postprocess
+from ai_server.util.candidate_validator import select_candidate
 from ai_server.core.config import get_inference_config
+from ai_server.core.tracing import span, traced
+from ai_server.core.metrics import stage_timer, CANDIDATE_SELECTIONS
+from typing import List, Optional, Union
+import asyncio
 import logging
-import re
 # 로깅 설정
 logger = logging.getLogger(__name__)
 
 # post 변환 서비스
 class PostTransformationService:
-    def __init__(self, vllm_base_url: str = "http://localhost:8002"):
+    def __init__(self, vllm_base_url: Optional[Union[str, List[str]]] = None):
+        # URL을 지정하지 않으면 설정된 레플리카들을 공유하는 전역 클라이언트 사용
         self.vllm_base_url = vllm_base_url
+        self._owns_client = vllm_base_url is not None
+        self.client = VLLMAsyncClient(base_url=vllm_base_url) if self._owns_client else get_vllm_client()
         self.inference_config = get_inference_config()
+        self.token_budgeter = get_token_budgeter()
+        # 짧은 입력은 vLLM 대신 규칙 기반 변환기로 처리
+        self.fast_path = RuleFastPath("post")
         
     # post 변환 서비스 메서드
-    async def transform_post(self, content: str, emotion: Emotion, post_type: PostType) -> str:
+    @traced("post_transform")
+    async def transform_post(self, content: str, emotion: Emotion, post_type: PostType) -> TransformResult:
         try:
-            # 1. 프롬프트 생성기 통해 텍스트 프롬프트 생성
-            prompt_generator = PostPromptGenerator(
-                emotion=emotion.value,
-                post_type=post_type.value,
-                content=content
-            )
-            formatted_prompt = prompt_generator.get_formatted_prompt()
+            # 0. 짧은 입력(ㅋㅋㅋ, ㅠㅠ, 안녕 등)은 규칙 기반 빠른 경로
+            fast_result = self.fast_path.try_convert(content, post_type.value)
+            if fast_result is not None:
+                return fast_result
+
+            with stage_timer("prompt_build"):
+                # 1. 프롬프트 생성기 통해 텍스트 프롬프트 생성
+                prompt_generator = PostPromptGenerator(
+                    emotion=emotion.value,
+                    post_type=post_type.value,
+                    content=content
+                )
 
-            # 2. VLLMAsyncClient를 사용하여 vLLM 서버에 요청 (최적화된 파라미터)
-            async with VLLMAsyncClient(base_url=self.vllm_base_url) as client:
-                completion_request = CompletionRequest(
-                    prompt=formatted_prompt,
-                    max_tokens=self.inference_config.post_max_tokens,
-                    temperature=self.inference_config.post_temperature,
-                    top_p=self.inference_config.post_top_p,
-                    top_k=self.inference_config.post_top_k,
-                    stop=self.inference_config.post_stop_tokens
+                # 2. 모델 윈도우에 들어가도록 문장 경계 기준으로 분할
+                chunks = self.token_budgeter.chunk(
+                    overhead=prompt_generator.get_prompt_prefix() + PROMPT_SUFFIX,
+                    content=prompt_generator.preprocess(content)
                 )
-                
-                result = await client.completion(completion_request)
-                generated_text = result["choices"][0]["text"].strip()
+            if len(chunks) == 1:
+                return TransformResult(await self._transform_chunk(prompt_generator, chunks[0]), TransformEngine.LLM)
+
+            # 3. 긴 포스트는 청크별로 동시에 변환 (동시성 상한 적용) 후 순서대로 이어붙이기
+            logger.info(f"긴 포스트를 {len(chunks)}개 청크로 나누어 변환합니다")
+            semaphore = asyncio.Semaphore(self.inference_config.post_chunk_concurrency)
+
+            async def transform_with_limit(chunk: str) -> TransformResult:
+                # 동시성 상한으로 대기한 시간은 별도 구간으로 기록
+                with span("chunk_queue"):
+                    await semaphore.acquire()
+                try:
+                    return TransformResult(await self._transform_chunk(prompt_generator, chunk), TransformEngine.LLM)
+                except Exception as e:
+                    logger.warning(f"포스트 청크 변환 실패, 규칙 기반 변환 사용: {str(e)}")
+                    return rule_fallback("post_chunk", chunk, post_type.value, e)
+                finally:
+                    semaphore.release()
+
+            results = await asyncio.gather(*(transform_with_limit(chunk) for chunk in chunks))
 
-         
-                processed_text = self.postprocess(generated_text)
-                return processed_text
+            # 빈 결과인 청크는 원문 청크로 채움
+            engines = {result.engine for result in results}
+            return TransformResult(
+                " ".join(result.text or chunk for result, chunk in zip(results, chunks)),
+                engines.pop() if len(engines) == 1 else TransformEngine.MIXED
+            )
 
         except Exception as e:
-            logger.error(f"포스트 변환 실패: {str(e)}")
-            # 오류 시 원본 반환
-            return content
-    
-    def postprocess(self, text: str, max_repeat: int = 3, max_len: int = 180) -> str:
-        """
-        - 모델 특수 토큰 및 불필요한 출력 제거
-        - 반복 단어/구절 간단 제거
-        - 출력이 너무 길 경우 문장 경계 기준 자르기
-        - 남은 불필요 공백 정리
-        """
-        # 0. 모델 특수 토큰 및 불필요한 출력 제거
-        if "Output:" in text:
-            text = text.split("Output:", 1)[-1]
-        text = text.strip().split('\n')[0]
-        text = re.sub(r'</s>', '', text)
-        text = re.sub(r'<\|endof.*?\|>', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'<\|.*?\|>', '', text)
-        text = text.replace('<s>', '')
-        text = text.strip()
+            logger.error(f"포스트 변환 실패, 규칙 기반 변환 사용: {str(e)}")
+            # 오류 시 규칙 기반 변환기로 대체 (서킷 open, 대기열 가득 참, 데드라인 초과 등)
+            return rule_fallback("post", content, post_type.value, e)
+
+        finally:
+            if self._owns_client:
+                await self.client.close()
+
+    async def _transform_chunk(self, prompt_generator: PostPromptGenerator, chunk: str) -> str:
+        """예산 내 입력 하나를 vLLM으로 변환"""
+        with stage_timer("prompt_build"):
+            # 토큰 예산에 맞춰 max_tokens 결정
+            token_plan = self.token_budgeter.plan(
+                overhead=prompt_generator.get_prompt_prefix() + PROMPT_SUFFIX,
+                content=chunk,
+                max_tokens_cap=self.inference_config.post_max_tokens
+            )
+            # 청크는 이미 전처리된 텍스트이므로 다시 전처리하지 않고 예산을 계산한 그대로 프롬프트 조립
+            formatted_prompt = prompt_generator.format_prompt(token_plan.content)
+
+        # VLLMAsyncClient를 사용하여 vLLM 서버에 요청 (최적화된 파라미터)
+        # 후보 모드(n > 1)는 후보끼리 달라지도록 top_k를 넓혀 한 요청에서 함께 생성
+        n = max(self.inference_config.post_candidates, 1)
+        completion_request = CompletionRequest(
+            prompt=formatted_prompt,
+            max_tokens=token_plan.max_tokens,
+            temperature=self.inference_config.post_temperature,
+            top_p=self.inference_config.post_top_p,
+            top_k=self.inference_config.post_candidate_top_k if n > 1 else self.inference_config.post_top_k,
+            stop=self.inference_config.post_stop_tokens,
+            n=n
+        )
         
-        # 1. 반복 단어/구(띄어쓰기 단위, 연속 N회 이상 반복되면 자르기)
-        #words = text.split()
-        #seen = {}
-        #for idx, word in enumerate(words):
-        #    seen[word] = seen.get(word, 0) + 1
-        #    if seen[word] > max_repeat:
-        #        text = ' '.join(words[:idx])
-        #        break
+        with stage_timer("vllm_request"):
+            result = await self.client.completion(completion_request)
+
+        if n == 1:
+            with stage_timer("postprocess"):
+                processed_text = self._postprocess(result["choices"][0]["text"], token_plan.content)
+            return processed_text
 
-        # 2. 너무 긴 답변은 문장 경계(마침표, 느낌표, 물음표) 기준으로 자르기
-        #if len(text) > max_len:
-        #    cut = text[:max_len]
-        #    m = re.search(r'[.!?](?=[^.!?]*$)', cut)
-        #    if m:
-        #        text = cut[:m.end()]
-        #    else:
-        #        text = cut
+        with stage_timer("postprocess"):
+            candidates = [self._postprocess(choice["text"], token_plan.content) for choice in result["choices"]]
+        with stage_timer("candidate_select"):
+            processed_text, outcome = select_candidate(candidates, prompt_generator.post_type)
+        CANDIDATE_SELECTIONS.inc(outcome=outcome)
+        if processed_text is None:
+            raise ValueError(f"후보 {len(candidates)}개가 모두 비어 있습니다")
+        return processed_text
 
-        # 3. 남은 중복 공백 및 앞뒤 공백 정리
-        #text = re.sub(r'\s+', ' ', text)
-        #return text.strip()
-        return text
- 
\ No newline at end of file
+    def _postprocess(self, text: str, content: str) -> str:
+        """공용 후처리 (입력 길이에 비례한 최대 길이, n-gram 반복 자르기)"""
+        return postprocess(
+            text,
+            max_chars=output_char_limit(content, self.inference_config),
+            ngram=self.inference_config.postprocess_ngram,
+            max_repeat=self.inference_config.postprocess_max_repeat
+        )
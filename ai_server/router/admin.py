@@ -0,0 +1,64 @@
+import asyncio
+import hmac
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from ai_server.core.config import AdminConfig, get_admin_config
+from ai_server.core.profiler import ProfilerBusyError, SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def verify_admin_token(
+    x_admin_token: Optional[str] = Header(default=None),
+    config: AdminConfig = Depends(get_admin_config),
+) -> AdminConfig:
+    """X-Admin-Token 검증 (ADMIN_TOKEN 미설정 시 관리자 엔드포인트 비활성화)"""
+    if not config.token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, config.token):
+        raise HTTPException(status_code=403, detail="forbidden")
+    return config
+
+
+@router.post(
+    "/profile",
+    response_class=PlainTextResponse,
+    summary="샘플링 프로파일",
+    description="워커 프로세스의 모든 스레드 스택을 일정 시간 샘플링해 collapsed stack 형식으로 반환합니다."
+)
+async def run_profile(
+    duration: Optional[float] = Query(default=None, gt=0, description="수집 시간(초)"),
+    rate: Optional[int] = Query(default=None, gt=0, description="초당 샘플 수 (Hz)"),
+    include_idle: bool = Query(default=False, description="대기 중인 스레드 포함 여부"),
+    config: AdminConfig = Depends(verify_admin_token),
+):
+    """
+    프로파일 결과는 flamegraph.pl 또는 speedscope 에 그대로 넣을 수 있습니다.
+
+    - **duration**: 수집 시간 (기본 ADMIN_PROFILE_DEFAULT_DURATION, 최대 ADMIN_PROFILE_MAX_DURATION)
+    - **rate**: 샘플링 주기 (기본 ADMIN_PROFILE_DEFAULT_RATE, 최대 ADMIN_PROFILE_MAX_RATE)
+    """
+    duration = min(duration or config.profile_default_duration, config.profile_max_duration)
+    rate = min(rate or config.profile_default_rate, config.profile_max_rate)
+    profiler = SamplingProfiler(rate=rate, duration=duration, include_idle=include_idle)
+
+    try:
+        # 샘플러는 별도 스레드에서 실행 (이벤트 루프는 계속 요청 처리)
+        collapsed = await asyncio.to_thread(profiler.run)
+    except ProfilerBusyError:
+        raise HTTPException(status_code=409, detail="profile already running")
+
+    logger.info(f"관리자 프로파일 완료: {duration}s @ {rate}Hz, {profiler.samples} samples")
+    return PlainTextResponse(
+        collapsed,
+        headers={
+            "X-Profile-Samples": str(profiler.samples),
+            "Content-Disposition": "attachment; filename=profile.collapsed",
+        },
+    )
@@ -3,29 +3,45 @@ from ai_server.router.posts import router as posts_router
 from ai_server.router.comments import router as comments_router
 from ai_server.router.images import router as images_router
 from ai_server.router.chat import router as chat_router
+from ai_server.router.admin import router as admin_router
 
 api_router = APIRouter()
 
+# 라우터 접두사 (메트릭 라우터 레이블에도 사용)
+POSTS_PREFIX = "/generate/post"
+COMMENTS_PREFIX = "/generate/comment"
+IMAGES_PREFIX = "/images"
+CHAT_PREFIX = "/generate/chat"
+ADMIN_PREFIX = "/admin"
+ROUTER_PREFIXES = [POSTS_PREFIX, COMMENTS_PREFIX, IMAGES_PREFIX, CHAT_PREFIX, ADMIN_PREFIX]
+
 api_router.include_router(
     posts_router, 
-    prefix="/generate/post", 
+    prefix=POSTS_PREFIX, 
     tags=["Posts"]
 )
 
 api_router.include_router(
     comments_router, 
-    prefix="/generate/comment", 
+    prefix=COMMENTS_PREFIX, 
     tags=["Comments"]
 )
 
 api_router.include_router(
     images_router,
-    prefix="/images",
+    prefix=IMAGES_PREFIX,
     tags=["Images"]
 )
 
 api_router.include_router(
     chat_router,
-    prefix="/generate/chat",
+    prefix=CHAT_PREFIX,
     tags=["Chat"]
-)
\ No newline at end of file
+)
+
+api_router.include_router(
+    admin_router,
+    prefix=ADMIN_PREFIX,
+    tags=["Admin"],
+    include_in_schema=False
+)
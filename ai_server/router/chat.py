@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from ai_server.schemas.chat_schemas import ChatRequest, ChatResponse
 from ai_server.model.chat_model import ChatTransformationService
+from ai_server.core.responses import lean_response
 
 router = APIRouter()
 
@@ -28,10 +29,10 @@ async def generate_chat(request: ChatRequest):
         )
         
         # 성공 응답
-        return ChatResponse(
+        return lean_response(ChatResponse(
             status_code=200,
             message=transformed_content
-        )
+        ))
         
     except ValueError as ve:
         # Enum 값이 잘못된 경우 등
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from ai_server.schemas.converter_schemas import CommentRequest, CommentResponse
 from ai_server.model.comment_model import CommentTransformationService
+from ai_server.core.responses import lean_response
 
 router = APIRouter()
 
@@ -22,18 +23,19 @@ async def generate_comment(request: CommentRequest):
     try:
         # CommentTransformationService를 사용하여 vLLM 추론 로직 적용
         comment_service = CommentTransformationService()
-        transformed_content = await comment_service.transform_comment(
+        result = await comment_service.transform_comment(
             content=request.content,
             emotion=request.emotion,
             post_type=request.post_type
         )
         
         # 성공 응답
-        return CommentResponse(
+        return lean_response(CommentResponse(
             status_code=200,
             message="Successfully transformed text",
-            data=transformed_content
-        )
+            data=result.text,
+            engine=result.engine
+        ))
         
     except ValueError as ve:
         # Enum 값이 잘못된 경우 등
@@ -1,16 +1,136 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from typing import AsyncGenerator, AsyncIterator, List, Optional
 from ai_server.schemas.image_schemas import (
+    AnimalType,
     ImageSearchRequest, 
+    TextSearchRequest,
     ImageSearchResponse, 
+    ImageBatchSearchRequest,
+    ImageBatchSearchItem,
+    ImageBatchSearchResponse,
     ErrorResponse
 )
-from ai_server.model.image_search import get_image_search_service, ImageSearchService
+from ai_server.model.image_search import get_image_search_service, ImageSearchService, ImageQuery, MAX_IMAGE_BYTES
+from ai_server.core.responses import lean_response
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 업로드 스트림을 읽는 단위
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# 업로드 요청 본문 문서 (본문은 직접 스트리밍으로 읽으므로 OpenAPI에만 명시)
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            },
+            "image/*": {"schema": {"type": "string", "format": "binary"}},
+            "application/octet-stream": {"schema": {"type": "string", "format": "binary"}}
+        }
+    }
+}
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"이미지 파일이 너무 큽니다 ({limit // (1024 * 1024)}MB 초과)")
+
+
+async def _capped_stream(chunks: AsyncIterator[bytes], limit: int) -> AsyncGenerator[bytes, None]:
+    """스트림을 그대로 전달하되 누적 limit 바이트를 넘는 순간 413으로 중단"""
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > limit:
+            raise _too_large(limit)
+        yield chunk
+
+
+async def _read_capped(chunks: AsyncIterator[bytes], limit: int) -> bytes:
+    """스트림을 읽되 limit를 넘는 순간 413으로 중단 (전체 본문을 먼저 받지 않음)"""
+    buffer = bytearray()
+    async for chunk in _capped_stream(chunks, limit):
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+class _UploadFormParser(MultiPartParser):
+    """파싱 도중 중단돼도 이미 연 임시 파일을 닫을 수 있도록 만든 UploadFile을 기록하는 파서
+
+    Starlette 버전에 따라 파싱 실패 시 임시 파일을 닫아 주지 않으므로 직접 정리합니다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened_files: List[UploadFile] = []
+
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        if self._current_part.file is not None:
+            self.opened_files.append(self._current_part.file)
+
+    async def close_files(self):
+        for upload in self.opened_files:
+            await upload.close()
+
+
+async def _iter_upload_file(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
+async def read_upload_image(request: Request) -> bytes:
+    """multipart(file 필드) 또는 raw 본문(image/*, application/octet-stream)에서 이미지 바이트 읽기"""
+    # multipart 본문은 이미지 외에 경계/파트 헤더가 붙으므로 한 청크만큼 여유를 둠
+    body_limit = MAX_IMAGE_BYTES + UPLOAD_CHUNK_SIZE
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > body_limit:
+        raise _too_large(MAX_IMAGE_BYTES)
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "multipart/form-data":
+        # request.form()은 본문 전체를 임시 파일로 받은 뒤에야 돌려주므로, 파서에 넣기 전에 스트림에서 크기를 제한
+        # (Content-Length 없이 청크 전송된 큰 본문도 파싱 도중 413으로 중단)
+        # (contextlib.aclosing은 Python 3.10+라서 try/finally로 스트림을 닫음)
+        stream = _capped_stream(request.stream(), body_limit)
+        parser = _UploadFormParser(request.headers, stream, max_files=1, max_fields=10)
+        try:
+            form = await parser.parse()
+        except MultiPartException as e:
+            await parser.close_files()
+            raise HTTPException(status_code=400, detail=e.message)
+        except BaseException:
+            # 413 등으로 중단되면 이미 만든 임시 파일을 닫음
+            await parser.close_files()
+            raise
+        finally:
+            await stream.aclose()
+        try:
+            upload = form.get("file")
+            if not isinstance(upload, UploadFile):
+                raise HTTPException(status_code=400, detail="multipart 요청에는 file 필드가 필요합니다")
+            data = await _read_capped(_iter_upload_file(upload), MAX_IMAGE_BYTES)
+        finally:
+            await form.close()
+    elif content_type.startswith("image/") or content_type == "application/octet-stream":
+        data = await _read_capped(request.stream(), MAX_IMAGE_BYTES)
+    else:
+        raise HTTPException(status_code=415, detail="multipart/form-data, image/* 또는 application/octet-stream 본문만 지원합니다")
+
+    if not data:
+        raise HTTPException(status_code=400, detail="이미지 본문이 비어 있습니다")
+    return data
+
 @router.post(
     "/search",
     response_model=ImageSearchResponse,
@@ -31,27 +151,35 @@ async def search_similar_images(
     이미지 유사도 검색 API
     
     - **image_url**: 검색할 이미지의 URL
-    - **animal_type**: 동물 종류 (cat 또는 dog)
+    - **animal_type**: 동물 종류 (cat, dog 또는 auto: 쿼리 이미지로 자동 판별)
     - **n_results**: 반환할 유사 이미지 개수 (1-10, 기본값: 3)
+    - **where**: 메타데이터 필터 (선택)
+    - **min_similarity**: 최소 코사인 유사도 (선택)
+    - **diversity**: 결과 다양성 가중치 0-1 (선택, 기본값: 0)
     
     Returns:
-        ImageSearchResponse: 유사한 이미지 URL 리스트
+        ImageSearchResponse: 유사한 이미지 URL 리스트와 유사도/메타데이터
     """
     try:
         # 이미지 검색 실행
-        similar_images = image_service.search_similar_images(
+        matches, animal = await image_service.search_similar_images_async(
             image_url=str(request.image_url),
             animal_type=request.animal_type.value,
-            n_results=request.n_results
+            n_results=request.n_results,
+            where=request.where,
+            min_similarity=request.min_similarity,
+            diversity=request.diversity
         )
         
-        logger.info(f"Image search completed: {len(similar_images)} results")
+        logger.info(f"Image search completed: {len(matches)} results")
         
-        return ImageSearchResponse(
+        return lean_response(ImageSearchResponse(
             status_code=200,
             message="이미지 검색 성공",
-            data=similar_images
-        )
+            data=[match.url for match in matches],
+            matches=matches,
+            animal=animal
+        ))
         
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
@@ -64,4 +192,192 @@ async def search_similar_images(
         raise HTTPException(
             status_code=500,
             detail="이미지 검색 중 오류가 발생했습니다"
-        ) 
\ No newline at end of file
+        )
+
+@router.post(
+    "/search/batch",
+    response_model=ImageBatchSearchResponse,
+    responses={
+        200: {"model": ImageBatchSearchResponse, "description": "배치 검색 완료 (항목별 결과 포함)"},
+        422: {"model": ErrorResponse, "description": "검증 오류"},
+        500: {"model": ErrorResponse, "description": "서버 오류"}
+    },
+    summary="이미지 유사도 배치 검색",
+    description="여러 이미지를 한 번에 검색합니다. 임베딩과 벡터 검색을 배치로 처리하고, 실패한 항목은 개별 오류로 반환합니다."
+)
+async def search_similar_images_batch(
+    request: ImageBatchSearchRequest,
+    image_service: ImageSearchService = Depends(get_image_search_service)
+) -> ImageBatchSearchResponse:
+    """
+    이미지 유사도 배치 검색 API
+    
+    - **items**: 이미지 검색 요청 목록 (image_url, animal_type, n_results)
+    
+    Returns:
+        ImageBatchSearchResponse: 요청 순서대로 항목별 결과
+    """
+    try:
+        results = await image_service.search_similar_images_batch([
+            ImageQuery(str(item.image_url), item.animal_type.value, item.n_results, item.where, item.min_similarity, item.diversity)
+            for item in request.items
+        ])
+    except Exception as e:
+        logger.error(f"Image batch search failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="이미지 검색 중 오류가 발생했습니다"
+        )
+    
+    items = []
+    for result in results:
+        if isinstance(result, ValueError):
+            items.append(ImageBatchSearchItem(status_code=400, message=str(result)))
+        elif isinstance(result, Exception):
+            logger.error(f"Image batch search item failed: {result}")
+            items.append(ImageBatchSearchItem(status_code=500, message="이미지 검색 중 오류가 발생했습니다"))
+        else:
+            items.append(ImageBatchSearchItem(
+                status_code=200,
+                message="이미지 검색 성공",
+                data=[match.url for match in result.matches],
+                matches=result.matches,
+                animal=result.animal
+            ))
+    
+    succeeded = sum(item.status_code == 200 for item in items)
+    logger.info(f"Image batch search completed: {succeeded}/{len(items)} succeeded")
+    
+    return lean_response(ImageBatchSearchResponse(
+        status_code=200,
+        message="이미지 배치 검색 완료",
+        data=items
+    ))
+
+@router.post(
+    "/search/upload",
+    response_model=ImageSearchResponse,
+    responses={
+        200: {"model": ImageSearchResponse, "description": "이미지 검색 성공"},
+        400: {"model": ErrorResponse, "description": "잘못된 요청"},
+        413: {"model": ErrorResponse, "description": "이미지 크기 초과"},
+        415: {"model": ErrorResponse, "description": "지원하지 않는 본문 형식"},
+        422: {"model": ErrorResponse, "description": "검증 오류"},
+        500: {"model": ErrorResponse, "description": "서버 오류"}
+    },
+    summary="업로드 이미지 유사도 검색",
+    description="이미지 바이트를 직접 받아 유사한 이미지를 검색합니다. URL 다운로드 단계가 없어 왕복 지연이 줄어듭니다.",
+    openapi_extra=UPLOAD_REQUEST_BODY
+)
+async def search_uploaded_image(
+    request: Request,
+    animal_type: AnimalType = Query(..., description="동물 종류 (cat, dog 또는 auto)"),
+    n_results: int = Query(3, ge=1, le=10, description="반환할 유사 이미지 개수 (1-10)"),
+    breed: Optional[str] = Query(None, description="품종 메타데이터 필터"),
+    min_similarity: Optional[float] = Query(None, ge=-1.0, le=1.0, description="최소 코사인 유사도"),
+    diversity: float = Query(0.0, ge=0.0, le=1.0, description="결과 다양성 가중치 (MMR)"),
+    image_service: ImageSearchService = Depends(get_image_search_service)
+) -> ImageSearchResponse:
+    """
+    업로드 이미지 유사도 검색 API
+    
+    - **본문**: multipart/form-data의 file 필드 또는 raw 이미지 바이트 (최대 10MB)
+    - **animal_type**: 동물 종류 (쿼리 파라미터)
+    - **n_results**: 반환할 유사 이미지 개수 (쿼리 파라미터, 1-10, 기본값: 3)
+    - **breed**, **min_similarity**, **diversity**: 품종 필터, 최소 유사도, 결과 다양성 (쿼리 파라미터, 선택)
+    
+    Returns:
+        ImageSearchResponse: 유사한 이미지 URL 리스트
+    """
+    image_bytes = await read_upload_image(request)
+    
+    try:
+        matches, animal = await image_service.search_similar_image_bytes_async(
+            image_bytes=image_bytes,
+            animal_type=animal_type.value,
+            n_results=n_results,
+            where={"breed": breed} if breed else None,
+            min_similarity=min_similarity,
+            diversity=diversity
+        )
+        
+        logger.info(f"Uploaded image search completed: {len(matches)} results")
+        
+        return lean_response(ImageSearchResponse(
+            status_code=200,
+            message="이미지 검색 성공",
+            data=[match.url for match in matches],
+            matches=matches,
+            animal=animal
+        ))
+        
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Uploaded image search failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="이미지 검색 중 오류가 발생했습니다"
+        )
+
+@router.post(
+    "/search/text",
+    response_model=ImageSearchResponse,
+    responses={
+        200: {"model": ImageSearchResponse, "description": "이미지 검색 성공"},
+        400: {"model": ErrorResponse, "description": "잘못된 요청"},
+        422: {"model": ErrorResponse, "description": "검증 오류"},
+        500: {"model": ErrorResponse, "description": "서버 오류"}
+    },
+    summary="텍스트로 이미지 검색",
+    description="검색어와 어울리는 이미지를 CLIP 텍스트 임베딩으로 검색합니다. 이미지 다운로드 없이 처리되며 자주 쓰는 검색어는 캐시됩니다."
+)
+async def search_images_by_text(
+    request: TextSearchRequest,
+    image_service: ImageSearchService = Depends(get_image_search_service)
+) -> ImageSearchResponse:
+    """
+    텍스트 이미지 검색 API
+    
+    - **query**: 검색어 (예: "sleepy orange cat")
+    - **animal_type**: 검색할 동물 컬렉션 (생략하거나 auto면 cat, dog 모두)
+    - **n_results**, **where**, **min_similarity**, **diversity**: 이미지 검색과 동일
+    
+    Returns:
+        ImageSearchResponse: 유사한 이미지 URL 리스트와 유사도/메타데이터
+    """
+    try:
+        matches = await image_service.search_by_text(
+            query=request.query,
+            animal_types=("cat", "dog") if request.animal_type in (None, AnimalType.AUTO) else (request.animal_type.value,),
+            n_results=request.n_results,
+            where=request.where,
+            min_similarity=request.min_similarity,
+            diversity=request.diversity
+        )
+        
+        logger.info(f"Text image search completed: {len(matches)} results")
+        
+        return lean_response(ImageSearchResponse(
+            status_code=200,
+            message="이미지 검색 성공",
+            data=[match.url for match in matches],
+            matches=matches
+        ))
+        
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Text image search failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="이미지 검색 중 오류가 발생했습니다"
+        )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from ai_server.schemas.post_schemas import PostRequest, PostResponse
 from ai_server.model.post_model import PostTransformationService
+from ai_server.core.responses import lean_response
 
 router = APIRouter()
 
@@ -22,18 +23,19 @@ async def generate_post(request: PostRequest):
     try:
         # 스키마에서 정의된 타입을 사용하여 포스트 변환 서비스 실행
         post_service = PostTransformationService()  # 기본 모델 사용
-        transformed_content = await post_service.transform_post(
+        result = await post_service.transform_post(
             content=request.content,
             emotion=request.emotion,
             post_type=request.post_type
         )
         
         # 성공 응답
-        return PostResponse(
+        return lean_response(PostResponse(
             status_code=200,
             message="Successfully transformed text",
-            data=transformed_content
-        )
+            data=result.text,
+            engine=result.engine
+        ))
         
     except ValueError as ve:
         # Enum 값이 잘못된 경우 등
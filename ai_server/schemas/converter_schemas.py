@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from enum import Enum
 from typing import Optional
+from ai_server.schemas.post_schemas import TransformEngine
 
 # 댓글 타입 
 class CommentType(str, Enum):
@@ -19,4 +20,5 @@ class CommentRequest(BaseModel):
 class CommentResponse(BaseModel):
     status_code: int = Field(..., description="응답 상태 코드")
     message: str = Field(..., description="응답 메시지")
-    data: Optional[str] = Field(None, description="변환된 텍스트, 에러 발생 시 None")
\ No newline at end of file
+    data: Optional[str] = Field(None, description="변환된 텍스트, 에러 발생 시 None")
+    engine: Optional[TransformEngine] = Field(None, description="변환된 텍스트를 만든 엔진 (llm, rule, original)")
\ No newline at end of file
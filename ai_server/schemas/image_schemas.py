@@ -1,13 +1,43 @@
 from pydantic import BaseModel, Field, HttpUrl
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 from enum import Enum
 
 class AnimalType(str, Enum):
-    """동물 타입 열거형"""
+    """동물 타입 열거형 (auto: 쿼리 이미지로 자동 판별)"""
     CAT = "cat"
     DOG = "dog"
+    AUTO = "auto"
 
-class ImageSearchRequest(BaseModel):
+class SearchOptions(BaseModel):
+    """검색 요청 공통 옵션"""
+    n_results: int = Field(
+        default=3,
+        ge=1,
+        le=10,
+        description="반환할 유사 이미지 개수 (1-10)",
+        example=3
+    )
+    where: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="메타데이터 필터 (여러 키는 AND, ChromaDB 연산자 사용 가능: $eq, $in, $gte 등)",
+        example={"breed": "persian"}
+    )
+    min_similarity: Optional[float] = Field(
+        default=None,
+        ge=-1.0,
+        le=1.0,
+        description="최소 코사인 유사도 (미만인 결과 제외)",
+        example=0.8
+    )
+    diversity: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="결과 다양성 가중치 (0: 유사도 순, 1에 가까울수록 서로 다른 이미지 우선, MMR 재순위화)",
+        example=0.3
+    )
+
+class ImageSearchRequest(SearchOptions):
     """이미지 검색 요청 스키마"""
     image_url: HttpUrl = Field(
         ...,
@@ -16,15 +46,68 @@ class ImageSearchRequest(BaseModel):
     )
     animal_type: AnimalType = Field(
         ...,
-        description="동물 종류 (cat 또는 dog)",
+        description="동물 종류 (cat, dog 또는 auto: CLIP 제로샷으로 자동 판별)",
         example="cat"
     )
-    n_results: int = Field(
-        default=3,
-        ge=1,
-        le=10,
-        description="반환할 유사 이미지 개수 (1-10)",
-        example=3
+
+class TextSearchRequest(SearchOptions):
+    """텍스트 이미지 검색 요청 스키마"""
+    query: str = Field(
+        ...,
+        min_length=1,
+        max_length=200,
+        description="검색어 (CLIP 텍스트 인코더는 영어 검색어에서 가장 정확함)",
+        example="sleepy orange cat"
+    )
+    animal_type: Optional[AnimalType] = Field(
+        default=None,
+        description="검색할 동물 컬렉션 (생략하거나 auto면 cat과 dog 모두 검색)",
+        example="cat"
+    )
+
+class ImageMatch(BaseModel):
+    """유사 이미지 검색 결과 한 건"""
+    url: str = Field(
+        ...,
+        description="이미지 URL",
+        example="https://example.com/similar1.jpg"
+    )
+    similarity: float = Field(
+        ...,
+        description="코사인 유사도 (1에 가까울수록 유사)",
+        example=0.93
+    )
+    distance: float = Field(
+        ...,
+        description="코사인 거리 (1 - 유사도)",
+        example=0.07
+    )
+    animal_type: Optional[str] = Field(
+        default=None,
+        description="결과가 속한 동물 컬렉션",
+        example="cat"
+    )
+    metadata: Optional[Dict[str, Union[str, int, float, bool]]] = Field(
+        default=None,
+        description="색인 시 기록한 메타데이터 (source_file, breed, width, height, content_hash, indexed_at)"
+    )
+
+class AnimalPrediction(BaseModel):
+    """animal_type=auto 일 때 쿼리 이미지의 동물 판별 결과"""
+    animal_type: str = Field(
+        ...,
+        description="판별된 동물 종류",
+        example="cat"
+    )
+    confidence: float = Field(
+        ...,
+        description="판별 신뢰도 (0-1, 후보 동물에 대한 softmax 확률)",
+        example=0.97
+    )
+    scores: Dict[str, float] = Field(
+        default_factory=dict,
+        description="후보 동물별 확률",
+        example={"cat": 0.97, "dog": 0.02, "hamster": 0.01}
     )
 
 class ImageSearchResponse(BaseModel):
@@ -48,6 +131,65 @@ class ImageSearchResponse(BaseModel):
             "https://example.com/similar3.jpg"
         ]
     )
+    matches: Optional[List[ImageMatch]] = Field(
+        default=None,
+        description="유사도/거리/메타데이터를 포함한 검색 결과 (data와 같은 순서)"
+    )
+    animal: Optional[AnimalPrediction] = Field(
+        default=None,
+        description="animal_type=auto 요청의 동물 판별 결과"
+    )
+
+class ImageBatchSearchRequest(BaseModel):
+    """이미지 배치 검색 요청 스키마"""
+    items: List[ImageSearchRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=32,
+        description="검색할 이미지 목록 (1-32개)"
+    )
+
+class ImageBatchSearchItem(BaseModel):
+    """이미지 배치 검색의 항목별 결과"""
+    status_code: int = Field(
+        ...,
+        description="항목별 상태 코드 (200, 400, 500)",
+        example=200
+    )
+    message: str = Field(
+        ...,
+        description="항목별 결과 메시지",
+        example="이미지 검색 성공"
+    )
+    data: Optional[List[str]] = Field(
+        default=None,
+        description="유사한 이미지 URL 리스트 (실패 시 null)"
+    )
+    matches: Optional[List[ImageMatch]] = Field(
+        default=None,
+        description="유사도/거리/메타데이터를 포함한 검색 결과 (실패 시 null)"
+    )
+    animal: Optional[AnimalPrediction] = Field(
+        default=None,
+        description="animal_type=auto 항목의 동물 판별 결과"
+    )
+
+class ImageBatchSearchResponse(BaseModel):
+    """이미지 배치 검색 응답 스키마"""
+    status_code: int = Field(
+        ...,
+        description="HTTP 상태 코드",
+        example=200
+    )
+    message: str = Field(
+        ...,
+        description="응답 메시지",
+        example="이미지 배치 검색 완료"
+    )
+    data: List[ImageBatchSearchItem] = Field(
+        ...,
+        description="요청 순서대로 정렬된 항목별 결과"
+    )
 
 class ErrorResponse(BaseModel):
     """에러 응답 스키마"""
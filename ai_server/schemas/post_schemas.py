@@ -15,6 +15,13 @@ class Emotion(str, Enum):
     GRUMPY = "grumpy"
     ANGRY = "angry"
 
+# 변환 결과를 만든 엔진
+class TransformEngine(str, Enum):
+    LLM = "llm"            # vLLM 생성
+    RULE = "rule"          # 규칙 기반 변환기 (짧은 입력 빠른 경로 또는 vLLM 장애 시 대체)
+    MIXED = "mixed"        # 긴 포스트의 일부 청크만 규칙 기반으로 대체
+    ORIGINAL = "original"  # 규칙 기반 변환도 실패해 원문 반환
+
 class PostRequest(BaseModel):
     content: str = Field(..., description="변환할 원본 텍스트")
     emotion: Emotion = Field(..., description="감정 상태")
@@ -23,4 +30,5 @@ class PostRequest(BaseModel):
 class PostResponse(BaseModel):
     status_code: int = Field(..., description="응답 상태 코드")
     message: str = Field(..., description="응답 메시지")
-    data: Optional[str] = Field(None, description="변환된 텍스트, 에러 발생 시 None")
\ No newline at end of file
+    data: Optional[str] = Field(None, description="변환된 텍스트, 에러 발생 시 None")
+    engine: Optional[TransformEngine] = Field(None, description="변환된 텍스트를 만든 엔진 (llm, rule, mixed, original)")
\ No newline at end of file
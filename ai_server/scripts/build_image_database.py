@@ -4,8 +4,13 @@ data 디렉토리의 URL 파일들을 읽어서 ChromaDB에 저장
 """
 import os
 import sys
+import hashlib
+import json
 import logging
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
 
 # ChromaDB telemetry 비활성화 (hang 방지)
 os.environ["ANONYMIZED_TELEMETRY"] = "False"
@@ -15,6 +20,9 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from ai_server.model.image_search import ImageSearchService
+from ai_server.model.embedding_worker import decode_image
+from ai_server.util.image_dedup import DedupSummary, DuplicateIndex, dhash
+from ai_server.core.file_lock import run_once
 
 # 로깅 설정
 logging.basicConfig(
@@ -23,13 +31,194 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def build_database():
-    """이미지 데이터베이스 구축"""
-    service = None
+# 구축 잠금/완료 표시 파일 (DB 디렉토리 안에 두어 DB를 지우면 함께 사라짐)
+BUILD_LOCK_FILE = ".build.lock"
+BUILD_MARKER_FILE = ".build_complete"
+
+# 색인 형식 버전 (저장 항목이 바뀌면 올려서 기존 DB를 다시 구축)
+INDEX_FORMAT_VERSION = "3"
+
+ANIMAL_LABELS = {"cat": "고양이", "dog": "강아지"}
+
+# 다운로드/임베딩 실패 비율이 이 값을 넘으면 구축 실패로 보고 완료 표시를 남기지 않음 (다음 시작 때 다시 시도)
+MAX_FAILURE_RATIO = 0.2
+
+
+class ImageDatabaseBuildError(RuntimeError):
+    """색인된 이미지가 없거나 실패가 너무 많아 구축을 완료로 볼 수 없음"""
+
+
+@dataclass
+class BuildStats:
+    """구축 결과 집계"""
+    indexed: int = 0  # 저장했거나 대표 항목에 병합한 이미지 수
+    failed: int = 0  # 다운로드/디코딩/임베딩에 실패한 이미지 수
+    removed: int = 0  # 데이터 파일에서 빠져 컬렉션에서 지운 항목 수
+
+    @property
+    def failure_ratio(self) -> float:
+        attempted = self.indexed + self.failed
+        return self.failed / attempted if attempted else 0.0
+
+    def check(self, max_failure_ratio: float = MAX_FAILURE_RATIO):
+        """색인 결과가 없거나 실패 비율이 기준을 넘으면 ImageDatabaseBuildError"""
+        if self.indexed == 0:
+            raise ImageDatabaseBuildError(f"색인된 이미지가 없습니다 (실패 {self.failed}개)")
+        if self.failure_ratio > max_failure_ratio:
+            raise ImageDatabaseBuildError(
+                f"이미지 색인 실패 비율이 너무 높습니다: {self.failed}/{self.indexed + self.failed} "
+                f"(허용 {max_failure_ratio:.0%})"
+            )
+
+
+def data_fingerprint() -> str:
+    """색인 형식 버전과 이미지 URL 파일 내용 해시 (둘 중 하나가 바뀌면 다시 구축)"""
+    digest = hashlib.sha256(INDEX_FORMAT_VERSION.encode())
+    for name in ("cat_image_url.txt", "dog_image_url.txt"):
+        path = project_root / "data" / name
+        digest.update(name.encode())
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def build_database_once(db_base_path: str = "./image_embeddings_db", service: Optional[ImageSearchService] = None) -> str:
+    """여러 워커 중 한 프로세스만 DB를 구축하도록 파일 잠금으로 조정
+
+    같은 데이터로 이미 구축된 DB가 있으면 건너뛰고, 다른 프로세스가 구축 중이면 끝날 때까지 기다립니다.
+    구축이 실패하면(ImageDatabaseBuildError 등) 완료 표시를 남기지 않으므로 다음 시작 때 다시 시도합니다.
+
+    Returns:
+        "built" (직접 구축) 또는 "skipped" (이미 구축됨)
+    """
+    built = run_once(
+        lock_path=os.path.join(db_base_path, BUILD_LOCK_FILE),
+        marker_path=os.path.join(db_base_path, BUILD_MARKER_FILE),
+        fingerprint=data_fingerprint(),
+        task=lambda: build_database(service=service),
+    )
+    if not built:
+        logger.info("이미 구축된 이미지 데이터베이스를 사용합니다")
+    return "built" if built else "skipped"
+
+
+def parse_url_line(line: str) -> Optional[Tuple[str, Optional[str]]]:
+    """URL 파일 한 줄 파싱: "URL [품종]" (빈 줄/주석은 None)"""
+    parts = line.split()
+    if not parts or parts[0].startswith("#"):
+        return None
+    return parts[0], (parts[1].lower() if len(parts) > 1 else None)
+
+
+def remove_stale_entries(collection, listed_urls: Set[str]) -> int:
+    """데이터 파일에 더 이상 없는 URL을 컬렉션에서 삭제하고 삭제 수 반환
+
+    upsert만으로는 파일에서 지운 URL이 남으므로 다시 구축할 때마다 정리합니다.
+    이번 구축에서 일시적으로 실패한 URL은 파일에 남아 있으므로 지우지 않습니다.
+    """
+    stale = [id_ for id_ in collection.get(include=[])["ids"] if id_ not in listed_urls]
+    if stale:
+        collection.delete(ids=stale)
+    return len(stale)
+
+
+def index_url_file(
+    service: ImageSearchService,
+    animal_type: str,
+    url_file: Path,
+    dedup: Optional[DuplicateIndex] = None,
+    stats: Optional[BuildStats] = None,
+) -> DedupSummary:
+    """URL 파일의 이미지를 색인하고 중복 요약 반환
+
+    각 이미지는 메타데이터와 함께 upsert하고, 유사 중복은 저장하지 않고 대표 항목의 aliases에 기록합니다.
+    실패한 이미지는 기록 후 건너뛰고 stats에 집계하며, 파일에 없는 기존 항목은 삭제합니다.
+    """
+    label = ANIMAL_LABELS[animal_type]
+    collection = service.collections[animal_type]
+    dedup = dedup or DuplicateIndex()
+    stats = stats if stats is not None else BuildStats()
+    canonical_metadata: Dict[str, Dict[str, Any]] = {}
+    listed_urls: Set[str] = set()
+    with open(url_file, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f, 1):
+            parsed = parse_url_line(line)
+            if parsed is None:  # 빈 줄 건너뛰기
+                continue
+            url, breed = parsed
+            listed_urls.add(url)
+            try:
+                # 이미지 다운로드 및 임베딩 추출
+                image_bytes = service.download_image_bytes(url)
+                image = decode_image(image_bytes)
+                embedding = service.extract_query_embedding(image)
+                content_hash = hashlib.sha256(image_bytes).hexdigest()
+                phash = dhash(image)
+                
+                canonical = dedup.add(url, phash, embedding, content_hash)
+                if canonical is not None:
+                    # 유사 중복: 대표 항목에 별칭으로 기록 (이전 구축에서 남은 항목은 삭제)
+                    metadata = canonical_metadata[canonical]
+                    metadata["aliases"] = json.dumps(dedup.aliases(canonical), ensure_ascii=False)
+                    metadata["alias_count"] = len(dedup.aliases(canonical))
+                    collection.update(ids=[canonical], metadatas=[metadata])
+                    collection.delete(ids=[url])
+                    stats.indexed += 1
+                    logger.info(f"[{i}] {label} 중복 이미지 병합: {url[:50]}... -> {canonical[:50]}...")
+                    continue
+                
+                metadata: Dict[str, Any] = {
+                    "source_file": url_file.name,
+                    "width": image.width,
+                    "height": image.height,
+                    "content_hash": content_hash,
+                    "phash": f"{phash:016x}",
+                    "indexed_at": int(time.time()),
+                }
+                if breed:
+                    metadata["breed"] = breed
+                canonical_metadata[url] = metadata
+                
+                # ChromaDB에 저장 (다시 구축해도 중복되지 않도록 upsert)
+                collection.upsert(
+                    ids=[url],
+                    embeddings=[embedding.tolist()],
+                    metadatas=[metadata]
+                )
+                stats.indexed += 1
+                logger.info(f"[{i}] {label} 이미지 추가 완료: {url[:50]}...")
+                
+            except Exception as e:
+                stats.failed += 1
+                logger.error(f"[{i}] {label} 이미지 추가 실패: {url[:50]}... - {e}")
+    stats.removed += remove_stale_entries(collection, listed_urls)
+    return dedup.summary
+
+
+def log_dedup_summary(label: str, summary: DedupSummary):
+    """중복 검출 요약 출력"""
+    logger.info(f"{label} 중복 검출: 전체 {summary.total}개 중 고유 {summary.unique}개, 중복 {summary.duplicates}개 ({len(summary.groups)}개 그룹)")
+    for canonical, aliases in summary.groups.items():
+        logger.info(f"   - {canonical} <- {', '.join(aliases)}")
+
+
+def build_database(service: Optional[ImageSearchService] = None, max_failure_ratio: float = MAX_FAILURE_RATIO) -> BuildStats:
+    """이미지 데이터베이스 구축
+
+    Args:
+        service: 재사용할 이미지 검색 서비스 (없으면 새로 만들고 끝나면 정리)
+        max_failure_ratio: 허용할 실패 비율 (넘으면 ImageDatabaseBuildError)
+
+    Returns:
+        색인/실패/삭제 수
+    """
+    stats = BuildStats()
+    owns_service = service is None
     try:
         # 이미지 검색 서비스 초기화
-        logger.info("이미지 검색 서비스 초기화 중...")
-        service = ImageSearchService()
+        if owns_service:
+            logger.info("이미지 검색 서비스 초기화 중...")
+            service = ImageSearchService()
         
         # data 디렉토리 경로
         data_dir = project_root / "data"
@@ -39,51 +228,14 @@ def build_database():
         service._ensure_chromadb_initialized("cat")
         service._ensure_chromadb_initialized("dog")
         
-        # 고양이 이미지 URL 파일 처리
-        cat_url_file = data_dir / "cat_image_url.txt"
-        if cat_url_file.exists():
-            logger.info("고양이 이미지 DB 구축 시작...")
-            with open(cat_url_file, 'r', encoding='utf-8') as f:
-                for i, line in enumerate(f, 1):
-                    url = line.strip()
-                    if url:  # 빈 줄 건너뛰기
-                        try:
-                            # 이미지 다운로드 및 임베딩 추출
-                            image = service.download_image_from_url(url)
-                            embedding = service.extract_query_embedding(image)
-                            
-                            # ChromaDB에 저장
-                            service.collections["cat"].add(
-                                ids=[url],
-                                embeddings=[embedding.tolist()]
-                            )
-                            logger.info(f"[{i}] 고양이 이미지 추가 완료: {url[:50]}...")
-                            
-                        except Exception as e:
-                            logger.error(f"[{i}] 고양이 이미지 추가 실패: {url[:50]}... - {e}")
-        
-        # 강아지 이미지 URL 파일 처리
-        dog_url_file = data_dir / "dog_image_url.txt"
-        if dog_url_file.exists():
-            logger.info("강아지 이미지 DB 구축 시작...")
-            with open(dog_url_file, 'r', encoding='utf-8') as f:
-                for i, line in enumerate(f, 1):
-                    url = line.strip()
-                    if url:  # 빈 줄 건너뛰기
-                        try:
-                            # 이미지 다운로드 및 임베딩 추출
-                            image = service.download_image_from_url(url)
-                            embedding = service.extract_query_embedding(image)
-                            
-                            # ChromaDB에 저장
-                            service.collections["dog"].add(
-                                ids=[url],
-                                embeddings=[embedding.tolist()]
-                            )
-                            logger.info(f"[{i}] 강아지 이미지 추가 완료: {url[:50]}...")
-                            
-                        except Exception as e:
-                            logger.error(f"[{i}] 강아지 이미지 추가 실패: {url[:50]}... - {e}")
+        # 동물별 이미지 URL 파일 처리
+        for animal_type, label in ANIMAL_LABELS.items():
+            url_file = data_dir / f"{animal_type}_image_url.txt"
+            if url_file.exists():
+                logger.info(f"{label} 이미지 DB 구축 시작...")
+                log_dedup_summary(label, index_url_file(service, animal_type, url_file, stats=stats))
+            else:
+                stats.removed += remove_stale_entries(service.collections[animal_type], set())
         
         # 결과 출력
         cat_count = service.collections["cat"].count()
@@ -94,13 +246,17 @@ def build_database():
         logger.info(f"   - 고양이 이미지: {cat_count}개")
         logger.info(f"   - 강아지 이미지: {dog_count}개")
         logger.info(f"   - 총 이미지: {cat_count + dog_count}개")
+        logger.info(f"   - 색인 {stats.indexed}개, 실패 {stats.failed}개, 삭제 {stats.removed}개")
+        
+        stats.check(max_failure_ratio)
+        return stats
         
     except Exception as e:
         logger.error(f"데이터베이스 구축 실패: {e}")
         raise
     finally:
-        # 명시적 리소스 정리
-        if service:
+        # 명시적 리소스 정리 (직접 만든 서비스만)
+        if owns_service and service:
             logger.info("리소스 정리 시작...")
             service.cleanup()
             logger.info("리소스 정리 완료")
@@ -0,0 +1,180 @@
+"""
+멀티 워커 실행기 (프리포킹 마스터)
+
+마스터 프로세스가 소켓을 열고 CLIP 모델/토크나이저 같은 무거운 상태를 한 번만 로드한 뒤
+uvicorn 워커들을 fork 합니다. 워커는 copy-on-write로 모델 가중치를 공유하고 같은 소켓에서 요청을 받습니다.
+워커가 비정상 종료되면 마스터가 다시 띄우고, SIGTERM/SIGINT를 받으면 워커에 전달한 뒤 종료합니다.
+
+기본값은 워커 1개이며, 이때는 fork 없이 현재 프로세스에서 바로 서버를 실행합니다.
+워커 2개 이상은 명시적으로 선택해야 합니다 (--workers / API_WORKERS). torch를 로드한 프로세스를 fork하면
+torch/OpenMP 내부 스레드 상태가 복사되지 않아 워커가 멈출 수 있으므로, 멀티 워커에서는
+EMBEDDING_BACKEND=worker(CLIP을 사이드카에서 실행)로 마스터가 torch를 로드하지 않게 하거나 --no-preload를 씁니다.
+
+이미지 DB 구축은 각 워커의 startup 이벤트에서 파일 잠금으로 조정되어 한 프로세스만 수행합니다.
+
+사용 예:
+    python -m ai_server.serve --host 0.0.0.0 --port 8000
+    EMBEDDING_BACKEND=worker python -m ai_server.serve --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+import uvicorn.importer
+
+logger = logging.getLogger("ai_server.serve")
+
+# 짧은 시간 안에 반복해서 죽는 워커는 재시작 간격을 둠
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def preload_models():
+    """fork 전에 공유할 무거운 상태 로드 (CPU 전용: CUDA 컨텍스트는 fork 후 사용할 수 없음)"""
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    from ai_server.model.image_search import get_image_search_service
+    from ai_server.util.token_budget import get_token_budgeter
+
+    start = time.perf_counter()
+    get_image_search_service()
+    # 워커의 tokenizer 워밍업은 이미 로드된 토크나이저를 그대로 사용 (로드 실패 시 추정치 사용)
+    get_token_budgeter().load()
+    logger.info(f"공유 모델 사전 로드 완료 ({time.perf_counter() - start:.1f}s)")
+
+
+def create_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(config: uvicorn.Config, sock: socket.socket, torch_threads: int):
+    """자식 프로세스: 마스터 시그널 핸들러를 되돌리고 uvicorn 서버 실행"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    torch = sys.modules.get("torch")
+    if torch is not None and torch_threads > 0:
+        # 워커 수만큼 코어를 나눠 써서 과다 구독 방지
+        torch.set_num_threads(torch_threads)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class PreforkMaster:
+    """워커 프로세스 생성/감시/종료"""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int, torch_threads: int):
+        self.config = config
+        self.sock = sock
+        self.num_workers = workers
+        self.torch_threads = torch_threads
+        self.workers: Dict[int, float] = {}  # pid -> 시작 시각
+        self.shutting_down = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                run_worker(self.config, self.sock, self.torch_threads)
+            except BaseException:
+                logger.exception("워커 실행 실패")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.workers[pid] = time.monotonic()
+        logger.info(f"워커 시작: pid={pid}")
+
+    def handle_shutdown(self, signum, frame):
+        if self.shutting_down:
+            return
+        self.shutting_down = True
+        logger.info(f"{signal.Signals(signum).name} 수신, 워커 종료 중...")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.handle_shutdown)
+        signal.signal(signal.SIGINT, self.handle_shutdown)
+
+        for _ in range(self.num_workers):
+            self.spawn()
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            if self.shutting_down:
+                logger.info(f"워커 종료: pid={pid}")
+                continue
+
+            logger.warning(f"워커 비정상 종료, 재시작: pid={pid}, status={status}")
+            if time.monotonic() - started < RESTART_BACKOFF_SECONDS:
+                time.sleep(RESTART_BACKOFF_SECONDS)
+            if not self.shutting_down:
+                self.spawn()
+
+        self.sock.close()
+        logger.info("마스터 종료")
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="FastAPI 멀티 워커 실행기")
+    parser.add_argument("--app", default="ai_server.main:app", help="ASGI 앱 경로 (module:attr)")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"), help="바인드 주소")
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")), help="포트")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "1")),
+                        help="워커 프로세스 수 (1이면 fork 없이 실행, 2 이상은 멀티 워커 모드)")
+    parser.add_argument("--backlog", type=int, default=2048, help="listen backlog")
+    parser.add_argument("--no-preload", action="store_true", help="모델 사전 로드 생략 (워커별 지연 로드)")
+    parser.add_argument("--torch-threads", type=int, default=int(os.getenv("API_TORCH_THREADS", "0")),
+                        help="워커별 PyTorch 스레드 수 (0: CPU 수 / 워커 수)")
+    parser.add_argument("--log-level", default="info", help="uvicorn 로그 레벨")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sock = create_socket(args.host, args.port, args.backlog)
+
+    if not args.no_preload:
+        preload_models()
+
+    # 앱 import는 사전 로드 이후 (워커는 fork로 같은 모듈 상태를 물려받음)
+    app = uvicorn.importer.import_from_string(args.app)
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level=args.log_level, backlog=args.backlog)
+    if args.workers <= 1:
+        # 단일 워커: fork 없이 현재 프로세스에서 실행 (재시작은 supervisord 등 외부 관리자에 맡김)
+        logger.info(f"단일 워커 모드: {args.host}:{args.port}")
+        uvicorn.Server(config).run(sockets=[sock])
+        sys.exit(0)
+
+    if "torch" in sys.modules:
+        logger.warning("torch를 로드한 뒤 fork합니다. 워커가 멈추면 EMBEDDING_BACKEND=worker 또는 --no-preload를 사용하세요")
+    torch_threads = args.torch_threads or max(1, (os.cpu_count() or 1) // args.workers)
+
+    logger.info(f"멀티 워커 모드: {args.workers} workers on {args.host}:{args.port} (torch threads/worker={torch_threads})")
+    PreforkMaster(config, sock, args.workers, torch_threads).run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
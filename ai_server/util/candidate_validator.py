@@ -0,0 +1,95 @@
+"""
+포스트 후보 검증 및 선택
+
+vLLM 요청 하나에 n개 후보를 함께 생성(n 파라미터)한 뒤, 가벼운 규칙으로 후보를 검사해
+통과한 후보 중 점수가 가장 높은 후보를 고릅니다. 통과한 후보가 없으면 전체에서 점수가 가장 높은 후보를 씁니다.
+품질 재시도를 추가 왕복 없이 한 번의 요청 안에서 처리하기 위한 것입니다.
+
+검사 항목:
+- 비어 있지 않을 것
+- 문장 끝 단어에 동물 말투 표지(냥, 멍, 왈 등)가 있을 것 (문장 비율)
+- 같은 단어 n-gram이 반복되지 않을 것 (중복 n-gram 비율)
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# 동물 타입 -> 문장 끝 단어의 말투 어미 (cat.py, dog.py 변환 결과 기준, 끝부분 일치로 검사)
+# "개"/"왕"처럼 일반 단어(무지개, 두개, 대왕)도 끝나는 글자는 변환기가 만드는 어미 형태로만 둠
+ANIMAL_MARKERS: Dict[str, Tuple[str, ...]] = {
+    "cat": ("냥", "냐", "냐아", "옹", "먀", "먀아", "녜", "meow"),
+    "dog": ("멍", "왈", "와알", "컹", "왕왕", "댕", "다개", "냐개", "끼잉", "woof"),
+}
+
+_SENTENCE_PATTERN = re.compile(r"[^.!?~\n]+[.!?~]*")
+# 문장 끝에 붙은 문장부호/이모지 등 (끝 단어를 고르기 전에 제거)
+_TRAILING_SYMBOLS = re.compile(r"[^\w]+$")
+
+# 통과 기준
+MIN_ENDING_RATIO = 0.5
+MAX_REPETITION_RATIO = 0.2
+REPETITION_NGRAM = 3
+
+
+class CandidateScore(NamedTuple):
+    """후보 하나의 검사 결과"""
+    text: str
+    acceptable: bool
+    score: float
+    ending_ratio: float
+    repetition_ratio: float
+
+
+def ending_ratio(text: str, animal_type: str) -> float:
+    """문장 끝 단어에 동물 말투 표지가 있는 문장의 비율"""
+    markers = ANIMAL_MARKERS[animal_type]
+    sentences = [_TRAILING_SYMBOLS.sub("", sentence).split() for sentence in _SENTENCE_PATTERN.findall(text)]
+    sentences = [words for words in sentences if words]
+    if not sentences:
+        return 0.0
+    hits = sum(1 for words in sentences if words[-1].lower().endswith(markers))
+    return hits / len(sentences)
+
+
+def repetition_ratio(text: str, n: int = REPETITION_NGRAM) -> float:
+    """앞에서 이미 나온 단어 n-gram의 비율 (반복이 없으면 0)"""
+    words = text.split()
+    total = len(words) - n + 1
+    if total <= 1:
+        return 0.0
+    seen = set()
+    repeated = 0
+    for i in range(total):
+        ngram = tuple(words[i:i + n])
+        if ngram in seen:
+            repeated += 1
+        else:
+            seen.add(ngram)
+    return repeated / total
+
+
+def score_candidate(text: str, animal_type: str) -> CandidateScore:
+    """후보 하나 검사 (빈 후보는 점수 -1로 항상 불합격)"""
+    text = text.strip()
+    if not text:
+        return CandidateScore(text, False, -1.0, 0.0, 0.0)
+    endings = ending_ratio(text, animal_type)
+    repetition = repetition_ratio(text)
+    acceptable = endings >= MIN_ENDING_RATIO and repetition <= MAX_REPETITION_RATIO
+    return CandidateScore(text, acceptable, endings - repetition, endings, repetition)
+
+
+def select_candidate(candidates: Sequence[str], animal_type: str) -> Tuple[Optional[str], str]:
+    """
+    후보 중 하나 선택
+
+    Returns:
+        (선택한 텍스트, 결과) - 결과는 accepted(통과 후보 중 최고 점수), best_effort(통과 후보 없음, 최고 점수),
+        empty(모든 후보가 비어 있음, 텍스트는 None)
+    """
+    scores: List[CandidateScore] = [score_candidate(text, animal_type) for text in candidates]
+    # 통과 여부 우선, 다음은 점수, 동점이면 앞선 후보 (vLLM choice index 순서)
+    best = max(scores, key=lambda candidate: (candidate.acceptable, candidate.score), default=None)
+    if best is None or not best.text:
+        return None, "empty"
+    return best.text, "accepted" if best.acceptable else "best_effort"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from langchain.prompts import PromptTemplate
+from ai_server.util.prompt_layout import get_prompt_prefix, PROMPT_SUFFIX
 from typing import ClassVar
 import re
 
@@ -46,36 +46,24 @@ class CommentPromptGenerator(BaseModel):
 
         return text
     
-    def create_prompt(self) -> PromptTemplate:
-        """HyperCLOVA X 최적화된 간결한 프롬프트 템플릿 생성"""
-
+    def get_prompt_prefix(self) -> str:
+        """사용자 입력 직전까지의 고정 프리픽스 (프리픽스 캐싱 단위)"""
         # emotion이 normal이 아닐 경우 에러 발생
         if self.emotion != "normal":
             raise ValueError("CommentPromptGenerator는 emotion='normal'만 허용합니다.")
 
-        # SFT 파인튜닝과 동일한 형식으로 프롬프트 구성
         post_type_kr = self.POST_TYPE_KR.get(self.post_type, self.post_type)
         emotion_kr = self.EMOTION_KR.get(self.emotion, self.emotion)
-        content_preprocess =self.preprocess(self.content)
-        system_prompt = "너는 동물 유형과 감정에 맞게 문장을 자연스럽게 변환하는 전문가야."
-        user_prompt = (
-            f"다음 문장을 {emotion_kr}한 {post_type_kr} 말투로 바꿔줘.\n"
-            f"Input: {content_preprocess}\n"
-            f"Output:"
-        )
-        
-        template = (
-            f"<|system|>\n{system_prompt}\n"
-            f"<|user|>\n{user_prompt}\n"
-            f"<|assistant|>\n"
-        )
-
-        return PromptTemplate(
-            input_variables=["content"],
-            template=template
-        )
+        return get_prompt_prefix(emotion_kr, post_type_kr)
 
     def get_formatted_prompt(self) -> str:
-        """포맷팅된 프롬프트 반환"""
-        prompt_template = self.create_prompt()
-        return prompt_template.format(content=self.content)
+        """HyperCLOVA X 최적화된 간결한 프롬프트 반환
+
+        SFT 파인튜닝과 동일한 형식으로, 사용자 입력은 고정 프리픽스 뒤에만 붙입니다.
+        PromptTemplate 포맷팅을 거치지 않으므로 입력에 중괄호가 있어도 안전합니다.
+        """
+        return self.format_prompt(self.preprocess(self.content))
+
+    def format_prompt(self, preprocessed: str) -> str:
+        """이미 전처리된 입력으로 프롬프트 조립 (preprocess는 멱등이 아니므로 다시 적용하지 않음)"""
+        return f"{self.get_prompt_prefix()}{preprocessed}{PROMPT_SUFFIX}"
@@ -0,0 +1,123 @@
+"""
+규칙 기반 변환 경로 - 짧은 입력의 빠른 경로와 vLLM 장애 시 대체 변환
+
+"ㅋㅋㅋ", "ㅠㅠ", ".", "안녕"처럼 자모/기호/이모지뿐이거나 내용 글자가 몇 개 안 되는 입력은
+규칙 기반 변환기(cat.py, dog.py) 결과가 모델과 큰 차이가 없으므로 vLLM을 호출하지 않고 바로 변환합니다.
+기호/이모지만 있는 입력은 변환기의 영어 규칙(" meow")이 적용되지 않도록 그대로 돌려줍니다.
+경로별 요청 수는 transform_path_total{service, path="rule|llm"}로 집계됩니다.
+
+vLLM 호출이 실패하면(서킷 open, 대기열 가득 참, 데드라인 초과 등) 원문 대신 같은 변환기 결과를 돌려주어
+GPU 부하를 덜면서도 동물 말투 변환을 유지합니다. 대체 횟수는 transform_fallback_total{service, reason}로 집계됩니다.
+"""
+
+import logging
+import unicodedata
+from typing import Callable, Dict, NamedTuple, Optional
+
+from ai_server.core.config import FastPathConfig, get_fast_path_config
+from ai_server.core.metrics import FALLBACKS, TRANSFORM_PATHS, stage_timer
+from ai_server.external.vLLM import CircuitOpenError, DeadlineExceededError, QueueFullError
+from ai_server.model.cat import cat_converter
+from ai_server.model.dog import dog_converter
+from ai_server.schemas.post_schemas import TransformEngine
+
+logger = logging.getLogger(__name__)
+
+# 동물 타입 -> 규칙 기반 변환기
+RULE_CONVERTERS: Dict[str, Callable[[str], str]] = {
+    "cat": cat_converter,
+    "dog": dog_converter,
+}
+
+# vLLM 실패 원인 -> 대체 메트릭 레이블 (그 외는 error)
+_FALLBACK_REASONS = (
+    (CircuitOpenError, "circuit_open"),
+    (QueueFullError, "queue_full"),
+    (DeadlineExceededError, "deadline"),
+)
+
+
+class TransformResult(NamedTuple):
+    """변환 결과와 결과를 만든 엔진"""
+    text: str
+    engine: TransformEngine
+
+
+# 한글 호환 자모 (ㅋ, ㅠ 등) - 문자 분류상 글자지만 내용 글자로 세지 않음
+_JAMO_START, _JAMO_END = "ㄱ", "ㆎ"
+
+
+def _is_jamo(ch: str) -> bool:
+    return _JAMO_START <= ch <= _JAMO_END
+
+
+def _is_content_char(ch: str) -> bool:
+    """한글 음절/영문자 등 내용 글자 여부 (자모, 숫자, 기호, 이모지는 제외)"""
+    if _is_jamo(ch):
+        return False
+    return unicodedata.category(ch).startswith("L")
+
+
+def classify_input(text: str, config: FastPathConfig) -> Optional[str]:
+    """
+    빠른 경로 대상이면 사유, 아니면 None
+
+    - punctuation: 기호/이모지/숫자뿐 (".", ";", "👍")
+    - jamo: 내용 글자 없이 자모 포함 ("ㅋㅋㅋ", "ㅠㅠ")
+    - short: 내용 글자가 max_content_chars 이하인 짧은 단어 ("안녕", "ㅋㅋ 대박")
+    """
+    compact = "".join(text.split())
+    if not compact or len(compact) > config.max_chars:
+        return None
+    content_chars = sum(1 for ch in compact if _is_content_char(ch))
+    if content_chars == 0:
+        return "jamo" if any(_is_jamo(ch) for ch in compact) else "punctuation"
+    if content_chars <= config.max_content_chars and len(text.split()) <= config.max_words:
+        return "short"
+    return None
+
+
+class RuleFastPath:
+    """
+    Args:
+        service: 메트릭 레이블 및 설정의 services에 쓰는 서비스 이름 (post, comment)
+        config: 빠른 경로 설정 (미지정 시 환경 변수 설정)
+    """
+
+    def __init__(self, service: str, config: Optional[FastPathConfig] = None):
+        self.service = service
+        self.config = config or get_fast_path_config()
+        self.enabled = self.config.enabled and service in self.config.services
+
+    def try_convert(self, text: str, animal_type: str) -> Optional[TransformResult]:
+        """빠른 경로 대상이면 규칙 기반 변환 결과, 아니면 None (vLLM 경로로 집계)"""
+        reason = classify_input(text, self.config) if self.enabled else None
+        if reason is not None:
+            TRANSFORM_PATHS.inc(service=self.service, path="rule")
+            if reason == "punctuation":
+                return TransformResult(text.strip(), TransformEngine.RULE)
+            with stage_timer("rule_convert"):
+                return TransformResult(RULE_CONVERTERS[animal_type](text.strip()).strip(), TransformEngine.RULE)
+        TRANSFORM_PATHS.inc(service=self.service, path="llm")
+        return None
+
+
+def fallback_reason(error: Exception) -> str:
+    """메트릭 레이블용 vLLM 실패 원인 (circuit_open, queue_full, deadline, error)"""
+    for error_type, reason in _FALLBACK_REASONS:
+        if isinstance(error, error_type):
+            return reason
+    return "error"
+
+
+def rule_fallback(service: str, text: str, animal_type: str, error: Exception) -> TransformResult:
+    """vLLM 실패 시 규칙 기반 변환 결과 (변환기도 실패하면 원문)"""
+    FALLBACKS.inc(service=service, reason=fallback_reason(error))
+    try:
+        with stage_timer("rule_convert"):
+            converted = RULE_CONVERTERS[animal_type](text).strip()
+        if converted:
+            return TransformResult(converted, TransformEngine.RULE)
+    except Exception as e:
+        logger.error(f"규칙 기반 대체 변환 실패: {str(e)}")
+    return TransformResult(text, TransformEngine.ORIGINAL)
@@ -0,0 +1,100 @@
+"""
+색인 시 중복/유사 중복 이미지 검출
+
+같은 사진이 다른 이름(재압축, 리사이즈)으로 여러 번 들어가면 검색 상위 결과를 중복으로 차지하므로,
+지각 해시(dHash)로 후보를 빠르게 거른 뒤 CLIP 임베딩 유사도로 확인해 하나의 대표 항목으로 합칩니다.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+# dHash 해밍 거리 기준 (64비트 중 이 이하이면 후보)
+DEFAULT_HASH_THRESHOLD = 10
+# 후보를 중복으로 확정하는 최소 코사인 유사도
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """difference hash: 흑백 축소 이미지에서 가로로 이웃한 픽셀의 밝기 증감을 비트로 기록"""
+    pixels = np.asarray(
+        image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS),
+        dtype=np.int16,
+    )
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def hamming_distances(value: int, hashes: np.ndarray) -> np.ndarray:
+    """64비트 해시 하나와 해시 배열 사이의 해밍 거리 (벡터화)"""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(xor.view(np.uint8)).reshape(len(hashes), 64).sum(axis=1)
+
+
+@dataclass
+class DedupSummary:
+    """중복 검출 결과 요약"""
+    total: int = 0
+    unique: int = 0
+    # 대표 ID -> 합쳐진 별칭 ID 목록
+    groups: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def duplicates(self) -> int:
+        return self.total - self.unique
+
+
+class DuplicateIndex:
+    """대표 이미지들의 해시/임베딩을 모아 두고 새 이미지가 유사 중복인지 판별
+
+    Args:
+        hash_threshold: dHash 해밍 거리 상한 (후보 선별)
+        similarity_threshold: 임베딩 코사인 유사도 하한 (중복 확정)
+    """
+
+    def __init__(self, hash_threshold: int = DEFAULT_HASH_THRESHOLD, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        self.hash_threshold = hash_threshold
+        self.similarity_threshold = similarity_threshold
+        self._ids: List[str] = []
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._embeddings: Optional[np.ndarray] = None
+        self._content_hashes: Dict[str, str] = {}
+        self.summary = DedupSummary()
+
+    def find(self, phash: int, embedding: np.ndarray, content_hash: Optional[str] = None) -> Optional[str]:
+        """중복이면 대표 ID, 아니면 None (같은 바이트는 해시/유사도와 관계없이 중복)"""
+        if content_hash is not None and content_hash in self._content_hashes:
+            return self._content_hashes[content_hash]
+        if not self._ids:
+            return None
+
+        candidates = np.flatnonzero(hamming_distances(phash, self._hashes) <= self.hash_threshold)
+        if len(candidates) == 0:
+            return None
+        similarities = self._embeddings[candidates] @ (embedding / np.linalg.norm(embedding))
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+        return self._ids[candidates[best]]
+
+    def add(self, image_id: str, phash: int, embedding: np.ndarray, content_hash: Optional[str] = None) -> Optional[str]:
+        """이미지를 등록하고 중복이면 대표 ID 반환 (대표의 별칭으로 기록), 새 대표면 None"""
+        self.summary.total += 1
+        canonical = self.find(phash, embedding, content_hash)
+        if canonical is not None:
+            self.summary.groups.setdefault(canonical, []).append(image_id)
+            return canonical
+
+        vector = (embedding / np.linalg.norm(embedding)).astype(np.float32)[np.newaxis, :]
+        self._ids.append(image_id)
+        self._hashes = np.append(self._hashes, np.uint64(phash))
+        self._embeddings = vector if self._embeddings is None else np.vstack([self._embeddings, vector])
+        if content_hash is not None:
+            self._content_hashes[content_hash] = image_id
+        self.summary.unique += 1
+        return None
+
+    def aliases(self, canonical: str) -> List[str]:
+        return self.summary.groups.get(canonical, [])
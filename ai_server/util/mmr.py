@@ -0,0 +1,68 @@
+"""
+MMR(Maximal Marginal Relevance) 재순위화
+
+최근접 결과는 서로 비슷한 이미지로 채워지기 쉬우므로, 후보를 넉넉히 가져온 뒤
+쿼리와의 유사도는 높고 이미 고른 결과와의 유사도는 낮은 후보를 차례로 고릅니다.
+
+    score(c) = (1 - diversity) * sim(query, c) - diversity * max_{s ∈ selected} sim(c, s)
+
+후보 간 유사도는 전체 k x k 행렬 대신 방금 고른 결과의 행만 계산하고, 선택된 결과와의
+최대 유사도를 누적 갱신하므로 전체 비용은 O(n · k · d) 입니다 (n은 고를 개수, n << k).
+"""
+
+from typing import List
+
+import numpy as np
+
+# diversity 사용 시 n_results 대비 후보를 가져올 배수와 최소 후보 수
+CANDIDATE_MULTIPLIER = 4
+MIN_CANDIDATES = 20
+
+
+def candidate_pool_size(n_results: int) -> int:
+    """MMR에 넘길 후보 수"""
+    return max(n_results * CANDIDATE_MULTIPLIER, MIN_CANDIDATES)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def mmr(query: np.ndarray, candidates: np.ndarray, n_results: int, diversity: float = 0.5) -> List[int]:
+    """
+    MMR로 후보를 골라 선택 순서대로 인덱스 반환
+
+    Args:
+        query: 쿼리 임베딩 (d,)
+        candidates: 후보 임베딩 (k, d)
+        n_results: 고를 개수
+        diversity: 0이면 유사도 순 그대로, 1에 가까울수록 서로 다른 결과 우선
+
+    Returns:
+        candidates 행 인덱스 리스트 (길이 min(n_results, k))
+    """
+    if not 0.0 <= diversity <= 1.0:
+        raise ValueError("diversity는 0과 1 사이여야 합니다")
+    count = min(n_results, len(candidates))
+    if count <= 0:
+        return []
+
+    candidates = _normalize(np.asarray(candidates, dtype=np.float32))
+    relevance = candidates @ _normalize(np.asarray(query, dtype=np.float32))
+    if diversity == 0.0:
+        return np.argsort(-relevance, kind="stable")[:count].tolist()
+
+    # 후보별 "이미 고른 결과와의 최대 유사도" (처음엔 고른 결과가 없으므로 패널티 0)
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected: List[int] = []
+    for _ in range(count):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = (1.0 - diversity) * relevance - diversity * penalty
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, candidates @ candidates[best], out=redundancy)
+    return selected
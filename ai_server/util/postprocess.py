@@ -0,0 +1,255 @@
+"""
+LLM 출력 후처리 (포스트/댓글 공용, 전체 문자열과 토큰 스트림 모두 지원)
+
+- 모델 특수 토큰(</s>, <s>, <|...|>) 제거
+- 앞쪽 "Output:" 또는 템플릿 반복("Input: ...\\nOutput: ...") 제거 후 첫 줄만 사용
+- 같은 단어 n-gram이 max_repeat번 나오면 반복 루프로 보고 두 번째 등장 위치에서 자름
+  (n-gram별 등장 횟수 사전을 단어마다 한 번 갱신하므로 전체 O(n))
+- max_chars를 넘으면 자름
+- 자를 때는 자르는 위치 앞의 마지막 문장 경계(. ! ? ~ …)에서, 없으면 단어 경계에서 자름
+
+StreamingPostprocessor는 토큰이 올 때마다 feed()로 받아 이후 어떤 자르기로도 바뀌지 않는 문장까지만 돌려주고,
+자를 위치가 정해지면 stopped가 되어 남은 생성을 중단할 수 있게 합니다.
+postprocess()는 같은 처리기에 문자열을 한 번에 넣은 결과이므로, 스트리밍 출력을 이어붙이면 항상 같은 문자열이 됩니다.
+"""
+
+import bisect
+import re
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ai_server.core.config import InferenceConfig
+
+_SPECIAL_TOKENS = re.compile(r"</?s>|<\|.*?\|>")
+# 입력 끝에 걸친 미완성 특수 토큰 ("<", "</", "<|endof" 등) - 다음 토큰과 합쳐 다시 판단
+_PARTIAL_SPECIAL = re.compile(r"<(?:/s?|s|\|[^\n]*)?\Z")
+_WORD = re.compile(r"\S+")
+_SPACE = re.compile(r"\s")
+_SENTENCE_END = re.compile(r"[.!?~…]+[\"'”’)\]]*\Z")
+
+_OUTPUT_MARKER = "Output:"
+_INPUT_MARKER = "Input:"
+
+DEFAULT_NGRAM = 3
+DEFAULT_MAX_REPEAT = 3
+
+# 자른 이유
+STOP_NEWLINE = "newline"
+STOP_REPETITION = "repetition"
+STOP_LENGTH = "length"
+
+
+def _remove_special_tokens(raw: str) -> Tuple[str, str]:
+    """
+    특수 토큰 제거 - (정리된 텍스트, 다음 입력과 합쳐 다시 볼 미완성 토큰)
+
+    정규식이 한 번에 처리할 때와 같은 순서로 왼쪽부터 훑어, 완성된 토큰보다 앞에서 시작하는
+    미완성 토큰("<|..."가 아직 닫히지 않음)이 있으면 그 위치부터 보류합니다.
+    """
+    parts = []
+    pos = 0
+    while True:
+        match = _SPECIAL_TOKENS.search(raw, pos)
+        partial = _PARTIAL_SPECIAL.search(raw, pos)
+        if partial and (match is None or partial.start() < match.start()):
+            parts.append(raw[pos:partial.start()])
+            return "".join(parts), raw[partial.start():]
+        if match is None:
+            parts.append(raw[pos:])
+            return "".join(parts), ""
+        parts.append(raw[pos:match.start()])
+        pos = match.end()
+
+
+class StreamingPostprocessor:
+    """
+    Args:
+        max_chars: 최대 글자 수 (None이면 제한 없음)
+        ngram: 반복 판단에 쓰는 단어 n-gram 크기
+        max_repeat: 같은 n-gram이 이 횟수만큼 나오면 반복 루프로 보고 자름 (2 이상)
+    """
+
+    def __init__(self, max_chars: Optional[int] = None, ngram: int = DEFAULT_NGRAM, max_repeat: int = DEFAULT_MAX_REPEAT):
+        if ngram < 1 or max_repeat < 2:
+            raise ValueError("ngram은 1 이상, max_repeat은 2 이상이어야 합니다")
+        self.max_chars = max_chars
+        self.ngram = ngram
+        self.max_repeat = max_repeat
+        self.stop_reason: Optional[str] = None
+
+        self._pending = ""         # 미완성 특수 토큰으로 보류한 원문
+        self._head = ""            # 본문 시작 전 (Output:/Input: 접두어 판단 중)
+        self._started = False
+        self._finished = False
+        self._text = ""            # 정리된 첫 줄 본문
+        self._scan = 0             # 다음 단어 탐색 위치
+        self._window: Deque[Tuple[str, int]] = deque(maxlen=ngram)  # 최근 단어 (단어, 시작 위치)
+        self._ngrams: Dict[Tuple[str, ...], Tuple[int, int]] = {}     # n-gram -> (등장 횟수, 두 번째 등장 위치)
+        self._first_repeat: Optional[int] = None                      # 가장 먼저 두 번 나온 n-gram의 두 번째 위치
+        self._boundaries: List[int] = []                              # 문장 경계 (끝 위치, 오름차순)
+        self._cut: Optional[int] = None                               # 확정된 본문 끝 위치
+        self._emitted = 0
+
+    @property
+    def stopped(self) -> bool:
+        """자를 위치가 정해져 더 받을 필요가 없음 (남은 생성 중단 가능)"""
+        return self.stop_reason is not None
+
+    def feed(self, token: str) -> str:
+        """토큰(또는 문자열 조각)을 받아 새로 확정된 출력 반환"""
+        if self._cut is None and not self._finished:
+            self._consume(token)
+        return self._emit()
+
+    def finish(self) -> str:
+        """입력 종료 - 보류했던 나머지 출력 반환"""
+        if not self._finished:
+            self._finished = True
+            if self._cut is None:
+                self._consume("")
+        return self._emit()
+
+    def text(self) -> str:
+        """현재까지의 후처리 결과 (finish 이후에는 최종 결과)"""
+        end = self._cut if self._cut is not None else len(self._text)
+        return self._text[:end].strip()
+
+    def _consume(self, chunk: str):
+        raw = self._pending + chunk
+        if self._finished:
+            raw, self._pending = _SPECIAL_TOKENS.sub("", raw), ""
+        else:
+            raw, self._pending = _remove_special_tokens(raw)
+        if not self._started:
+            raw = self._strip_prefix(raw)
+            if not self._started:
+                return
+        self._append(raw)
+
+    def _strip_prefix(self, raw: str) -> str:
+        """본문 앞의 Output:/Input: 접두어 제거 (판단할 수 없으면 보류하고 빈 문자열)"""
+        head = (self._head + raw).lstrip()
+        if head.startswith(_INPUT_MARKER):
+            marker = head.find(_OUTPUT_MARKER)
+            if marker < 0 and not self._finished:
+                self._head = head
+                return ""
+            if marker >= 0:
+                head = head[marker + len(_OUTPUT_MARKER):]
+        elif head.startswith(_OUTPUT_MARKER):
+            head = head[len(_OUTPUT_MARKER):]
+        elif not self._finished and (_OUTPUT_MARKER.startswith(head) or _INPUT_MARKER.startswith(head)):
+            self._head = head
+            return ""
+        self._head = ""
+        self._started = True
+        return head
+
+    def _append(self, text: str):
+        if not self._text:
+            text = text.lstrip()
+        newline = text.find("\n")
+        if newline >= 0:
+            text = text[:newline]
+        overflow = False
+        if self.max_chars is not None and len(self._text) + len(text) > self.max_chars:
+            text = text[:self.max_chars - len(self._text)]
+            overflow = True
+        self._text += text
+
+        complete = newline >= 0 or overflow or self._finished
+        # 공백 없는 조각은 끝에 걸친 단어만 늘리므로 다시 훑지 않음 (긴 단어 스트리밍이 O(n²)이 되지 않게)
+        if complete or _SPACE.search(text):
+            self._scan_words(complete)
+        if self._cut is not None:
+            return
+        if overflow:
+            self._stop(self._length_cut(), STOP_LENGTH)
+        elif newline >= 0:
+            self._stop(len(self._text), STOP_NEWLINE)
+
+    def _scan_words(self, complete: bool):
+        """새로 완성된 단어들로 n-gram 반복 검사 (끝에 걸친 단어는 완성될 때까지 보류)"""
+        text = self._text
+        for match in _WORD.finditer(text, self._scan):
+            if match.end() == len(text) and not complete:
+                self._scan = match.start()
+                return
+            self._scan = match.end()
+            self._add_word(match.group(), match.start(), match.end())
+            if self._cut is not None:
+                return
+        self._scan = len(text)
+
+    def _add_word(self, word: str, start: int, end: int):
+        if _SENTENCE_END.search(word):
+            self._boundaries.append(end)
+        self._window.append((word, start))
+        if len(self._window) < self.ngram:
+            return
+
+        key = tuple(w for w, _ in self._window)
+        count, second = self._ngrams.get(key, (0, -1))
+        count += 1
+        if count == 2:
+            second = self._window[0][1]
+            if self._first_repeat is None:
+                self._first_repeat = second
+        self._ngrams[key] = (count, second)
+        if count >= self.max_repeat:
+            self._stop(self._sentence_cut(second), STOP_REPETITION)
+
+    def _sentence_cut(self, pos: int) -> int:
+        """pos 이하의 마지막 문장 경계 (없으면 pos)"""
+        i = bisect.bisect_right(self._boundaries, pos)
+        return self._boundaries[i - 1] if i else pos
+
+    def _length_cut(self) -> int:
+        """max_chars 이하의 마지막 문장 경계, 없으면 마지막 단어 경계"""
+        i = bisect.bisect_right(self._boundaries, self.max_chars)
+        if i:
+            return self._boundaries[i - 1]
+        space = self._text.rfind(" ", 0, self.max_chars)
+        return space if space > 0 else self.max_chars
+
+    def _stop(self, cut: int, reason: str):
+        self._cut = cut
+        self.stop_reason = reason
+
+    def _safe_limit(self) -> int:
+        """이후 어떤 자르기로도 잘리지 않는 위치 상한"""
+        # 다음 반복은 빨라도 아직 n-gram을 다 채우지 않은 단어(끝에서 n-1번째)부터 시작
+        if self.ngram == 1:
+            limit = self._scan
+        elif len(self._window) == self.ngram:
+            limit = self._window[1][1]
+        else:
+            return 0
+        if self._first_repeat is not None:
+            limit = min(limit, self._first_repeat)
+        return limit
+
+    def _emit(self) -> str:
+        if self._cut is not None or self._finished:
+            end = len(self.text())
+        else:
+            i = bisect.bisect_right(self._boundaries, self._safe_limit())
+            end = self._boundaries[i - 1] if i else 0
+        if end <= self._emitted:
+            return ""
+        output = self._text[self._emitted:end]
+        self._emitted = end
+        return output
+
+
+def postprocess(text: str, max_chars: Optional[int] = None, ngram: int = DEFAULT_NGRAM, max_repeat: int = DEFAULT_MAX_REPEAT) -> str:
+    """완성된 문자열 후처리 (StreamingPostprocessor에 한 번에 넣은 결과)"""
+    processor = StreamingPostprocessor(max_chars=max_chars, ngram=ngram, max_repeat=max_repeat)
+    processor.feed(text)
+    processor.finish()
+    return processor.text()
+
+
+def output_char_limit(content: str, config: InferenceConfig) -> int:
+    """입력 길이에 비례한 출력 최대 글자 수 (하한 postprocess_min_chars)"""
+    return max(config.postprocess_min_chars, int(len(content) * config.postprocess_length_ratio))
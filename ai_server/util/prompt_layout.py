@@ -0,0 +1,34 @@
+"""
+포스트/댓글 공용 프롬프트 레이아웃
+
+vLLM 자동 프리픽스 캐싱(APC)은 프롬프트 앞부분이 바이트 단위로 같을 때만 KV 캐시를 재사용합니다.
+포스트와 댓글 프롬프트를 한 곳에서 조립해 공통 프리픽스가 어긋나지 않도록 하고,
+사용자 입력은 항상 맨 뒤(Input: 이후)에만 오도록 유지합니다.
+
+레이아웃 (SFT 파인튜닝 형식과 동일):
+    <|system|>\\n{SYSTEM_PROMPT}\\n<|user|>\\n다음 문장을       ← 모든 조합 공통
+    {감정}한 {동물} 말투로 바꿔줘.\\nInput:                  ← (emotion, post_type) 조합별 고정
+    {content}\\nOutput:\\n<|assistant|>\\n                   ← 요청마다 다름
+"""
+
+from functools import lru_cache
+
+SYSTEM_PROMPT = "너는 동물 유형과 감정에 맞게 문장을 자연스럽게 변환하는 전문가야."
+
+# 모든 (emotion, post_type) 조합이 공유하는 프리픽스
+SHARED_PREFIX = (
+    f"<|system|>\n{SYSTEM_PROMPT}\n"
+    f"<|user|>\n다음 문장을 "
+)
+
+PROMPT_SUFFIX = (
+    "\nOutput:\n"
+    "<|assistant|>\n"
+)
+
+
+@lru_cache(maxsize=None)
+def get_prompt_prefix(emotion_kr: str, post_type_kr: str) -> str:
+    """조합별 고정 프리픽스 (사용자 입력 직전까지)"""
+    return f"{SHARED_PREFIX}{emotion_kr}한 {post_type_kr} 말투로 바꿔줘.\nInput: "
+
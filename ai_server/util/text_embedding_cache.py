@@ -0,0 +1,111 @@
+"""
+텍스트 임베딩 LRU 캐시 + 마이크로 배칭
+
+텍스트 검색어는 소수의 인기 검색어가 반복되는 경우가 많으므로 정규화한 검색어별로 임베딩을 캐시하고,
+캐시에 없는 검색어는 짧은 대기 시간(max_wait) 동안 모아 한 번의 배치로 임베딩합니다.
+같은 검색어가 동시에 들어오면 한 번만 계산해 결과를 공유합니다.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ai_server.core.metrics import registry
+
+TEXT_EMBEDDING_CACHE = registry.counter(
+    "text_embedding_cache_total", "텍스트 임베딩 캐시 조회 수", ("result",)
+)
+TEXT_EMBEDDING_BATCHES = registry.counter(
+    "text_embedding_batches_total", "텍스트 임베딩 배치 호출 수"
+)
+
+# 텍스트 목록 -> (n, dim) 정규화 벡터
+TextEmbedder = Callable[[List[str]], Awaitable[np.ndarray]]
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키: 소문자 + 공백 정리"""
+    return " ".join(text.lower().split())
+
+
+class TextEmbeddingCache:
+    """
+    Args:
+        embed: 텍스트 배치 임베딩 코루틴 함수
+        maxsize: 캐시할 검색어 수
+        max_batch: 한 번에 임베딩할 최대 검색어 수
+        max_wait: 배치를 모으는 최대 대기 시간(초)
+    """
+
+    def __init__(self, embed: TextEmbedder, maxsize: int = 1024, max_batch: int = 32, max_wait: float = 0.005):
+        self._embed = embed
+        self.maxsize = maxsize
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: List[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def get(self, text: str) -> np.ndarray:
+        """검색어 임베딩 (캐시 적중 시 즉시 반환, 아니면 다음 배치에 합류)"""
+        key = normalize_query(text)
+        if not key:
+            raise ValueError("검색어가 비어 있습니다")
+
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+            TEXT_EMBEDDING_CACHE.inc(result="hit")
+            return vector
+        TEXT_EMBEDDING_CACHE.inc(result="miss")
+
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._queue.append(key)
+            if len(self._queue) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush)
+        # 대기 중인 요청 하나가 취소돼도 같은 검색어를 기다리는 다른 요청에는 영향 없음
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        keys, self._queue = self._queue, []
+        if keys:
+            asyncio.get_running_loop().create_task(self._run(keys))
+
+    async def _run(self, keys: List[str]):
+        TEXT_EMBEDDING_BATCHES.inc()
+        try:
+            vectors = await self._embed(keys)
+        except Exception as e:
+            for key in keys:
+                future = self._inflight.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+                    # 기다리던 요청이 모두 취소된 경우 경고 방지
+                    future.exception()
+            return
+
+        for key, vector in zip(keys, vectors):
+            vector = np.array(vector, dtype=np.float32)
+            vector.flags.writeable = False
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            future = self._inflight.pop(key)
+            if not future.done():
+                future.set_result(vector)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
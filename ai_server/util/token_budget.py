@@ -0,0 +1,194 @@
+"""
+토큰 예산 관리
+
+vLLM 서버는 max_model_len(기본 512) 안에서 프롬프트와 생성 토큰을 모두 처리해야 합니다.
+프롬프트 토큰 수를 세어 긴 입력은 문장 경계에서 자르거나 나누고,
+생성 토큰 수(max_tokens)는 입력 길이에 비례하도록 정합니다.
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+from ai_server.core.config import get_inference_config
+from ai_server.external.vLLM.server.vllm_config import get_vllm_config
+
+logger = logging.getLogger(__name__)
+
+# 문장 경계: 종결 부호(. ! ? … ~) 뒤 공백, 또는 줄바꿈
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?…~])\s+|\n+')
+
+
+class TokenPlan(BaseModel):
+    """하나의 vLLM 요청에 대한 토큰 배분 결과"""
+    content: str = Field(..., description="예산에 맞춘 입력 텍스트")
+    prompt_tokens: int = Field(..., description="프롬프트 전체 토큰 수")
+    max_tokens: int = Field(..., description="요청에 사용할 생성 토큰 수")
+    truncated: bool = Field(default=False, description="입력이 잘렸는지 여부")
+
+
+@lru_cache()
+def load_tokenizer(model_path: str) -> Optional[Any]:
+    """토크나이저 로드 (모델 경로별 1회, 실패 시 None) - 블로킹이므로 이벤트 루프 밖에서 호출"""
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        logger.info(f"토크나이저 로드 완료: {model_path}")
+        return tokenizer
+    except Exception as e:
+        logger.warning(f"토크나이저 로드 실패, 추정치로 대체합니다: {e}")
+        return None
+
+
+def split_sentences(text: str) -> List[str]:
+    """문장 경계 기준 분리 (부호는 앞 문장에 남김)"""
+    return [s.strip() for s in SENTENCE_BOUNDARY_PATTERN.split(text) if s.strip()]
+
+
+class TokenBudgeter:
+    """프롬프트 토큰 계산 및 입력/생성 길이 배분
+
+    tokenizer를 넘기지 않으면 load()로 model_path의 토크나이저를 로드합니다.
+    load()는 블로킹이므로 시작 시 스레드에서 호출하고(워밍업 단계), 요청 경로에서는 로드하지 않습니다.
+    토크나이저가 아직 없거나 쓸 수 없으면 UTF-8 바이트 기반의 보수적 추정치를 사용합니다.
+    """
+
+    def __init__(
+        self,
+        max_model_len: int,
+        tokenizer: Optional[Any] = None,
+        model_path: Optional[str] = None,
+        output_ratio: float = 1.5,
+        min_output_tokens: int = 32,
+        safety_margin: int = 8,
+    ):
+        self.max_model_len = max_model_len
+        self.model_path = model_path
+        self.output_ratio = output_ratio
+        self.min_output_tokens = min_output_tokens
+        self.safety_margin = safety_margin
+        self._tokenizer = tokenizer
+
+    @property
+    def tokenizer(self) -> Optional[Any]:
+        """로드된 토크나이저 (로드 전이면 None)"""
+        return self._tokenizer
+
+    def load(self) -> bool:
+        """model_path의 토크나이저 로드 (블로킹) - 정확한 토큰 계산을 쓸 수 있으면 True"""
+        if self._tokenizer is None and self.model_path:
+            self._tokenizer = load_tokenizer(self.model_path)
+        return self._tokenizer is not None
+
+    def count_tokens(self, text: str) -> int:
+        """텍스트 토큰 수 (특수 토큰 제외)"""
+        if not text:
+            return 0
+        tokenizer = self.tokenizer
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        # 한글 1자(3바이트)를 1.5토큰으로 보는 보수적 추정
+        return math.ceil(len(text.encode("utf-8")) / 2)
+
+    def output_budget(self, content_tokens: int) -> int:
+        """입력 길이에 비례한 생성 토큰 수 (상한 적용 전)"""
+        return math.ceil(content_tokens * self.output_ratio) + self.min_output_tokens
+
+    def max_content_tokens(self, overhead_tokens: int) -> int:
+        """프롬프트 고정부를 제외하고 입력에 쓸 수 있는 최대 토큰 수"""
+        available = self.max_model_len - overhead_tokens - self.min_output_tokens - self.safety_margin
+        return max(0, int(available / (1 + self.output_ratio)))
+
+    def _cut_to_tokens(self, text: str, limit: int) -> str:
+        """토큰 수가 limit 이하가 되는 가장 긴 앞부분 (어절 경계 우선)"""
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count_tokens(text[:mid]) <= limit:
+                low = mid
+            else:
+                high = mid - 1
+        cut = text[:low]
+        if low < len(text) and " " in cut:
+            cut = cut.rsplit(" ", 1)[0]
+        return cut.strip()
+
+    def split_content(self, content: str, limit: int) -> List[str]:
+        """문장 경계 기준으로 limit 토큰 이하 청크들로 분할"""
+        chunks: List[str] = []
+        current = ""
+        for sentence in split_sentences(content):
+            # 한 문장이 limit보다 길면 어절 단위로 잘라서 이어붙임
+            while self.count_tokens(sentence) > limit:
+                head = self._cut_to_tokens(sentence, limit) or sentence[:1]
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(head)
+                sentence = sentence[len(head):].strip()
+            if not sentence:
+                continue
+
+            candidate = f"{current} {sentence}" if current else sentence
+            if self.count_tokens(candidate) <= limit:
+                current = candidate
+            else:
+                chunks.append(current)
+                current = sentence
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def chunk(self, overhead: str, content: str) -> List[str]:
+        """입력 전체를 모델 윈도우에 들어가는 청크 목록으로 분할"""
+        limit = self.max_content_tokens(self.count_tokens(overhead))
+        if limit <= 0:
+            raise ValueError("프롬프트 고정부가 모델 최대 길이를 초과합니다")
+        if self.count_tokens(content) <= limit:
+            return [content]
+        return self.split_content(content, limit)
+
+    def plan(self, overhead: str, content: str, max_tokens_cap: int) -> TokenPlan:
+        """입력을 예산에 맞추고(필요 시 문장 경계에서 자름) max_tokens 결정
+
+        Args:
+            overhead: 입력을 제외한 프롬프트 고정부 (프리픽스 + 서픽스)
+            content: 전처리된 사용자 입력
+            max_tokens_cap: 설정된 생성 토큰 상한
+        """
+        chunks = self.chunk(overhead, content)
+        fitted = chunks[0]
+        truncated = len(chunks) > 1
+        if truncated:
+            logger.info(f"입력이 토큰 예산을 초과하여 잘렸습니다 ({len(chunks)}개 중 첫 청크 사용)")
+
+        overhead_tokens = self.count_tokens(overhead)
+        content_tokens = self.count_tokens(fitted)
+        prompt_tokens = overhead_tokens + content_tokens
+        remaining = self.max_model_len - prompt_tokens - self.safety_margin
+        max_tokens = max(1, min(max_tokens_cap, self.output_budget(content_tokens), remaining))
+
+        return TokenPlan(
+            content=fitted,
+            prompt_tokens=prompt_tokens,
+            max_tokens=max_tokens,
+            truncated=truncated,
+        )
+
+
+@lru_cache()
+def get_token_budgeter() -> TokenBudgeter:
+    """vLLM/추론 설정 기반 토큰 예산 관리자 반환 (토크나이저는 시작 시 load()로 로드)"""
+    vllm_config = get_vllm_config()
+    inference_config = get_inference_config()
+    return TokenBudgeter(
+        max_model_len=vllm_config.max_model_len,
+        model_path=inference_config.tokenizer_path or vllm_config.model_path,
+        output_ratio=inference_config.output_token_ratio,
+        min_output_tokens=inference_config.min_output_tokens,
+        safety_margin=inference_config.token_safety_margin,
+    )
@@ -0,0 +1,69 @@
+"""
+CLIP 제로샷 동물 분류
+
+동물별 프롬프트("a photo of a cat" 등)의 텍스트 임베딩을 한 번만 계산해 두고,
+검색용으로 이미 계산한 이미지 임베딩과의 내적만으로 동물 종류를 추정합니다 (추가 모델 호출 없음).
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ai_server.schemas.chat_schemas import ChatAnimalType
+from ai_server.schemas.image_schemas import AnimalPrediction
+
+# 분류 후보: 채팅에서 지원하는 모든 동물 (검색 컬렉션이 없는 동물 사진을 걸러내기 위해 함께 비교)
+ANIMAL_LABELS: List[str] = [animal.value for animal in ChatAnimalType]
+PROMPT_TEMPLATE = "a photo of a {}"
+# CLIP 학습 시의 logit scale (softmax 온도)
+CLIP_LOGIT_SCALE = 100.0
+
+
+class ZeroShotClassifier:
+    """
+    Args:
+        labels: 분류할 레이블
+        prompt_template: 레이블을 넣을 프롬프트 템플릿
+    """
+
+    def __init__(self, labels: Sequence[str] = ANIMAL_LABELS, prompt_template: str = PROMPT_TEMPLATE):
+        self.labels = list(labels)
+        self.prompts = [prompt_template.format(label) for label in self.labels]
+        self._label_embeddings: Optional[np.ndarray] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._label_embeddings is not None
+
+    def fit(self, label_embeddings: np.ndarray) -> "ZeroShotClassifier":
+        """프롬프트 임베딩 (labels 순서) 등록"""
+        embeddings = np.asarray(label_embeddings, dtype=np.float32)
+        self._label_embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return self
+
+    async def ensure_ready(self, embed_texts: Callable[[List[str]], Awaitable[np.ndarray]]):
+        """처음 한 번만 프롬프트 임베딩 계산"""
+        if not self.ready:
+            self.fit(await embed_texts(self.prompts))
+
+    def classify(self, image_embeddings: np.ndarray) -> List[AnimalPrediction]:
+        """이미지 임베딩 (n, d) 또는 (d,) -> 이미지별 예측"""
+        if not self.ready:
+            raise RuntimeError("제로샷 분류기가 아직 준비되지 않았습니다")
+        embeddings = np.atleast_2d(np.asarray(image_embeddings, dtype=np.float32))
+        embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        logits = CLIP_LOGIT_SCALE * embeddings @ self._label_embeddings.T
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        predictions = []
+        for row in probabilities:
+            scores: Dict[str, float] = {label: round(float(p), 4) for label, p in zip(self.labels, row)}
+            best = int(np.argmax(row))
+            predictions.append(AnimalPrediction(
+                animal_type=self.labels[best],
+                confidence=float(row[best]),
+                scores=scores,
+            ))
+        return predictions
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+포스트 후보 생성(n > 1) 비용/지연 벤치마크
+
+가짜 vLLM 서버(scripts/fake_vllm_server.py)의 --degenerate-rate로 퇴화한 출력(빈 출력, 반복, 말투 없음)을
+섞어 두고, 같은 프롬프트를 세 가지 방식으로 처리해 비교합니다.
+- single   : n=1 요청 한 번 (현재 기본 동작)
+- retry    : n=1 요청을 검증을 통과할 때까지 최대 --max-attempts번 반복 (왕복마다 지연 추가)
+- n=K      : 한 요청에서 K개 후보를 생성하고 통과한 후보 중 점수가 가장 높은 후보 선택 (ai_server.util.candidate_validator)
+
+방식마다 요청당 평균/p95 지연, 왕복 수, 생성 토큰 수(비용), 통과율을 출력합니다.
+
+사용 예:
+    python scripts/fake_vllm_server.py --port 8002 --degenerate-rate 0.3 --candidate-overhead 0.1 &
+    python scripts/benchmark_candidates.py --endpoint http://localhost:8002 --requests 200 --candidates 2 4 8
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_server.core.config import get_inference_config
+from ai_server.external.vLLM import AdaptiveDeadline, CompletionRequest, VLLMAsyncClient
+from ai_server.util.candidate_validator import score_candidate, select_candidate
+from ai_server.util.post_prompt import PostPromptGenerator
+from ai_server.util.postprocess import output_char_limit, postprocess
+
+SAMPLE_CONTENTS = [
+    "오늘 날씨가 정말 좋네요! 산책 가고 싶어요.",
+    "배가 고파요... 간식 먹고 싶다",
+    "산책 다녀왔는데 너무 피곤하다. 오늘은 일찍 자야지.",
+    "새 장난감을 받았어요. 하루 종일 가지고 놀았어요.",
+    "비가 와서 밖에 못 나가서 심심해",
+]
+EMOTIONS = ["normal", "happy", "curious", "sad", "grumpy", "angry"]
+POST_TYPES = ["cat", "dog"]
+
+
+class Outcome(NamedTuple):
+    latency: float
+    round_trips: int
+    completion_tokens: int
+    accepted: bool
+
+
+def build_requests(n: int) -> List[PostPromptGenerator]:
+    rng = random.Random(0)
+    return [
+        PostPromptGenerator(emotion=rng.choice(EMOTIONS), post_type=rng.choice(POST_TYPES), content=rng.choice(SAMPLE_CONTENTS))
+        for _ in range(n)
+    ]
+
+
+async def run_one(client: VLLMAsyncClient, generator: PostPromptGenerator, candidates: int, max_attempts: int) -> Outcome:
+    """한 요청 처리 (candidates=1이면 max_attempts번까지 재시도)"""
+    config = get_inference_config()
+    request = CompletionRequest(
+        prompt=generator.get_formatted_prompt(),
+        max_tokens=config.post_max_tokens,
+        temperature=config.post_temperature,
+        top_p=config.post_top_p,
+        top_k=config.post_candidate_top_k if candidates > 1 else config.post_top_k,
+        stop=config.post_stop_tokens,
+        n=candidates,
+    )
+    max_chars = output_char_limit(generator.content, config)
+    start = time.perf_counter()
+    tokens = 0
+    for attempt in range(1, max_attempts + 1):
+        result = await client.completion(request)
+        tokens += result.get("usage", {}).get("completion_tokens", 0)
+        texts = [postprocess(choice["text"], max_chars=max_chars) for choice in result["choices"]]
+        text, _ = select_candidate(texts, generator.post_type)
+        accepted = text is not None and score_candidate(text, generator.post_type).acceptable
+        if accepted:
+            break
+    return Outcome(time.perf_counter() - start, attempt, tokens, accepted)
+
+
+async def run_mode(endpoint: str, generators: List[PostPromptGenerator], candidates: int,
+                   max_attempts: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    # 벤치마크는 데드라인/후보 비교가 목적이므로 적응형 데드라인을 끔 (상한만 적용)
+    client = VLLMAsyncClient(base_url=endpoint, deadline=AdaptiveDeadline(max_seconds=120.0, min_samples=10**9))
+
+    async def limited(generator: PostPromptGenerator) -> Outcome:
+        async with semaphore:
+            return await run_one(client, generator, candidates, max_attempts)
+
+    try:
+        outcomes = await asyncio.gather(*(limited(generator) for generator in generators))
+    finally:
+        await client.close()
+
+    latencies = sorted(outcome.latency for outcome in outcomes)
+    return {
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "round_trips": statistics.mean(outcome.round_trips for outcome in outcomes),
+        "tokens": statistics.mean(outcome.completion_tokens for outcome in outcomes),
+        "accepted": sum(outcome.accepted for outcome in outcomes) / len(outcomes),
+    }
+
+
+async def run(endpoint: str, requests: int, candidates_list: List[int], max_attempts: int, concurrency: int):
+    generators = build_requests(requests)
+    modes = [("single", 1, 1), (f"retry<={max_attempts}", 1, max_attempts)]
+    modes += [(f"n={n}", n, 1) for n in candidates_list]
+
+    print(f"=== 후보 생성 벤치마크 ({endpoint}, 요청 {requests}개, 동시 {concurrency}) ===")
+    print(f"{'mode':>10} {'mean(ms)':>10} {'p95(ms)':>10} {'trips':>7} {'tokens':>8} {'accepted':>9}")
+    for name, candidates, attempts in modes:
+        stats = await run_mode(endpoint, generators, candidates, attempts, concurrency)
+        print(
+            f"{name:>10} {stats['mean_ms']:>10.1f} {stats['p95_ms']:>10.1f} {stats['round_trips']:>7.2f} "
+            f"{stats['tokens']:>8.1f} {stats['accepted']:>9.1%}"
+        )
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="포스트 후보 생성 비용/지연 벤치마크")
+    parser.add_argument("--endpoint", default="http://localhost:8002", help="vLLM(또는 가짜 서버) 엔드포인트")
+    parser.add_argument("--requests", type=int, default=200, help="방식별 요청 수")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[2, 4, 8], help="비교할 후보 수 목록")
+    parser.add_argument("--max-attempts", type=int, default=3, help="retry 방식의 최대 시도 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 요청 수")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.endpoint, args.requests, args.candidates, args.max_attempts, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+응답 직렬화 경로 마이크로벤치마크
+
+엔드포인트별 응답 모델에 대해 두 경로의 처리 시간을 비교합니다.
+- default: 모델을 반환하고 FastAPI가 response_model 검증 + jsonable_encoder + json.dumps 수행 (기존 방식)
+- lean   : lean_response() (재검증 생략, pydantic-core에서 바로 JSON 바이트로 직렬화)
+
+네트워크/서비스 로직 없이 ASGI 앱을 직접 호출해 라우팅~응답 전송 구간(asgi)을 측정하고,
+응답 모델 생성~응답 바이트 생성 구간(serialize)만 따로 측정합니다.
+
+사용 예:
+    python scripts/benchmark_json.py --iterations 5000
+"""
+
+import sys
+import time
+import asyncio
+import timeit
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_server.core.responses import lean_response
+from ai_server.schemas.post_schemas import PostResponse
+from ai_server.schemas.converter_schemas import CommentResponse
+from ai_server.schemas.chat_schemas import ChatResponse
+from ai_server.schemas.image_schemas import ImageSearchResponse
+
+POST_TEXT = "오늘은 병원에 다녀왔다냥! 주사를 맞았는데 하나도 안 아팠다냥~ 간식도 받았다냥 😸 " * 4
+IMAGE_URLS = [f"https://meowng-images.s3.ap-northeast-2.amazonaws.com/cat/{i:05d}.jpg" for i in range(3)]
+
+# 엔드포인트별 (응답 모델, 필드)
+ENDPOINTS: Dict[str, Tuple[type, Dict]] = {
+    "post": (PostResponse, {"status_code": 200, "message": "Successfully transformed text", "data": POST_TEXT}),
+    "comment": (CommentResponse, {"status_code": 200, "message": "Successfully transformed text", "data": "너무 귀엽다냥 ㅋㅋㅋ"}),
+    "chat": (ChatResponse, {"status_code": 200, "message": "안녕하냥! 밥 먹었냥?"}),
+    "image": (ImageSearchResponse, {"status_code": 200, "message": "이미지 검색 성공", "data": IMAGE_URLS}),
+}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    for name, (model, fields) in ENDPOINTS.items():
+        def make_routes(model=model, fields=fields):
+            async def default_route():
+                return model(**fields)
+
+            async def lean_route():
+                return lean_response(model(**fields))
+            return default_route, lean_route
+
+        default_route, lean_route = make_routes()
+        app.add_api_route(f"/default/{name}", default_route, methods=["POST"], response_model=model)
+        app.add_api_route(f"/lean/{name}", lean_route, methods=["POST"], response_model=model)
+    return app
+
+
+def make_caller(app: FastAPI, path: str) -> Callable:
+    """ASGI 앱을 직접 호출하는 코루틴 함수와 응답 본문 확인용 리스트 반환"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", b"application/json")], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    body: List[bytes] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    async def call():
+        body.clear()
+        await app(dict(scope), receive, send)
+        return b"".join(body)
+
+    return call
+
+
+async def measure(call: Callable, iterations: int) -> float:
+    """호출당 평균 시간(µs)"""
+    for _ in range(min(200, iterations)):
+        await call()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def measure_serialize(model: type, fields: Dict, iterations: int) -> Tuple[float, float]:
+    """응답 모델 생성~응답 바이트 생성 구간만 측정 (default, lean) 평균 시간(µs)"""
+    def default_path():
+        # FastAPI 기본 경로: 검증된 모델 -> 파이썬 dict -> json.dumps
+        return JSONResponse(model(**fields).model_dump(mode="json"))
+
+    def lean_path():
+        return lean_response(model(**fields))
+
+    return tuple(timeit.timeit(path, number=iterations) / iterations * 1e6 for path in (default_path, lean_path))
+
+
+async def run(iterations: int):
+    app = build_app()
+    print(f"=== 응답 직렬화 벤치마크 ({iterations}회) ===")
+    print(f"{'endpoint':<10} {'asgi default':>13} {'asgi lean':>10} {'serialize default':>18} {'serialize lean':>15} {'speedup':>8}")
+    for name, (model, fields) in ENDPOINTS.items():
+        default_call = make_caller(app, f"/default/{name}")
+        lean_call = make_caller(app, f"/lean/{name}")
+        assert await default_call() == await lean_call(), f"{name}: 두 경로의 응답 바이트가 다릅니다"
+
+        default_us = await measure(default_call, iterations)
+        lean_us = await measure(lean_call, iterations)
+        serialize_default_us, serialize_lean_us = measure_serialize(model, fields, iterations)
+        print(
+            f"{name:<10} {default_us:>11.1f}µs {lean_us:>8.1f}µs {serialize_default_us:>16.1f}µs "
+            f"{serialize_lean_us:>13.1f}µs {serialize_default_us / serialize_lean_us:>7.2f}x"
+        )
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="응답 직렬화 경로 마이크로벤치마크")
+    parser.add_argument("--iterations", type=int, default=5000, help="경로별 반복 횟수")
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
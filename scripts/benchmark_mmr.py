@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+MMR 재순위화 비용 마이크로벤치마크
+
+후보 풀 크기별로 재순위화 한 번에 걸리는 시간을 측정합니다.
+- vectorized: ai_server.util.mmr.mmr (유사도 행렬 한 번 + 최대 유사도 누적 갱신)
+- naive     : 선택할 때마다 후보 x 선택 결과 유사도를 다시 계산하는 파이썬 루프 (비교 기준)
+
+CLIP 임베딩과 같은 512차원 정규화 벡터를 무작위로 만들어 사용하며, 두 구현의 선택 결과가 같은지도 확인합니다.
+
+사용 예:
+    python scripts/benchmark_mmr.py --pool-sizes 20 50 100 500 1000 --n-results 3 10
+"""
+
+import sys
+import timeit
+import argparse
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_server.util.mmr import mmr
+
+DIM = 512
+# naive 구현은 이 크기까지만 측정 (이보다 크면 너무 느림)
+NAIVE_MAX_POOL = 200
+
+
+def naive_mmr(query: np.ndarray, candidates: np.ndarray, n_results: int, diversity: float) -> List[int]:
+    """비교 기준: 매 선택마다 남은 후보와 선택 결과 사이 유사도를 다시 계산"""
+    selected: List[int] = []
+    remaining = list(range(len(candidates)))
+    while remaining and len(selected) < n_results:
+        def score(i):
+            redundancy = max((float(candidates[i] @ candidates[j]) for j in selected), default=0.0)
+            return (1 - diversity) * float(candidates[i] @ query) - diversity * redundancy
+        best = max(remaining, key=score)
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+def random_unit_vectors(rng: np.random.Generator, count: int) -> np.ndarray:
+    vectors = rng.normal(size=(count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run(pool_sizes: List[int], n_results_list: List[int], diversity: float, iterations: int):
+    rng = np.random.default_rng(0)
+    print(f"=== MMR 재순위화 벤치마크 (dim={DIM}, diversity={diversity}, {iterations}회) ===")
+    print(f"{'pool':>6} {'n':>4} {'vectorized':>12} {'naive':>12} {'speedup':>8}")
+    for pool in pool_sizes:
+        query = random_unit_vectors(rng, 1)[0]
+        candidates = random_unit_vectors(rng, pool)
+        for n_results in n_results_list:
+            vectorized_us = timeit.timeit(
+                lambda: mmr(query, candidates, n_results, diversity), number=iterations
+            ) / iterations * 1e6
+            if pool <= NAIVE_MAX_POOL:
+                assert mmr(query, candidates, n_results, diversity) == naive_mmr(query, candidates, n_results, diversity), \
+                    f"pool={pool}, n={n_results}: 두 구현의 선택 결과가 다릅니다"
+                naive_us = timeit.timeit(
+                    lambda: naive_mmr(query, candidates, n_results, diversity), number=max(1, iterations // 10)
+                ) / max(1, iterations // 10) * 1e6
+                print(f"{pool:>6} {n_results:>4} {vectorized_us:>10.1f}µs {naive_us:>10.1f}µs {naive_us / vectorized_us:>7.1f}x")
+            else:
+                print(f"{pool:>6} {n_results:>4} {vectorized_us:>10.1f}µs {'-':>12} {'-':>8}")
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="MMR 재순위화 비용 마이크로벤치마크")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[12, 20, 40, 100, 200, 500, 1000], help="후보 풀 크기")
+    parser.add_argument("--n-results", type=int, nargs="+", default=[3, 10], help="고를 결과 개수")
+    parser.add_argument("--diversity", type=float, default=0.5, help="다양성 가중치")
+    parser.add_argument("--iterations", type=int, default=200, help="측정 반복 횟수")
+    args = parser.parse_args()
+    run(args.pool_sizes, args.n_results, args.diversity, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+LLM 출력 후처리 마이크로벤치마크
+
+퇴화한 긴 출력(같은 구절 반복 루프, 띄어쓰기 없는 글자 반복, 반복 없이 긴 문장 나열)을 만들어 길이별로 측정합니다.
+- shared  : ai_server.util.postprocess.postprocess (미리 컴파일한 패턴 + n-gram 사전, O(n))
+- stream  : StreamingPostprocessor에 --token-chars 글자씩 넣고 stopped가 되면 중단 (읽은 토큰 비율도 출력)
+- naive   : 단어가 늘 때마다 n-gram을 처음부터 다시 세는 반복 검사 (스트리밍에 그대로 쓰면 O(n²), 비교 기준)
+- legacy  : 기존 서비스의 postprocess (정규식 4개, 반복/길이 자르기 없음)
+
+shared와 stream 결과가 같은지도 확인합니다.
+
+사용 예:
+    python scripts/benchmark_postprocess.py --lengths 200 2000 20000 --iterations 20
+"""
+
+import re
+import sys
+import timeit
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_server.util.postprocess import DEFAULT_MAX_REPEAT, DEFAULT_NGRAM, StreamingPostprocessor, postprocess
+
+# naive 구현은 이 길이까지만 측정 (이보다 길면 너무 느림)
+NAIVE_MAX_CHARS = 20000
+
+
+def legacy_postprocess(text: str) -> str:
+    """비교 기준: 기존 PostTransformationService.postprocess"""
+    if "Output:" in text:
+        text = text.split("Output:", 1)[-1]
+    text = text.strip().split('\n')[0]
+    text = re.sub(r'</s>', '', text)
+    text = re.sub(r'<\|endof.*?\|>', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'<\|.*?\|>', '', text)
+    text = text.replace('<s>', '')
+    return text.strip()
+
+
+def naive_repetition_cut(text: str, ngram: int = DEFAULT_NGRAM, max_repeat: int = DEFAULT_MAX_REPEAT) -> int:
+    """비교 기준: 단어가 하나 늘 때마다 지금까지의 n-gram을 다시 세어 반복 위치(단어 수) 반환"""
+    words = text.split()
+    for end in range(ngram, len(words) + 1):
+        counts: Dict[Tuple[str, ...], int] = {}
+        for i in range(end - ngram + 1):
+            key = tuple(words[i:i + ngram])
+            counts[key] = counts.get(key, 0) + 1
+            if counts[key] >= max_repeat:
+                return end
+    return len(words)
+
+
+def build_samples(length: int) -> Dict[str, str]:
+    """길이별 퇴화 출력 샘플"""
+    intro = "Output: 오늘은 공원에 산책을 다녀왔다냥! 날씨가 정말 좋았다냥. "
+    loop = intro + "산책 가자 냥 " * (length // 8)
+    runs = intro + "냥" * length
+    plain = intro + " ".join(f"나뭇잎 {i}장을 주웠다냥." for i in range(length // 14))
+    return {name: text[:length + len(intro)] + "</s>" for name, text in (("loop", loop), ("runs", runs), ("plain", plain))}
+
+
+def stream(text: str, token_chars: int, max_chars: int) -> Tuple[str, float]:
+    """토큰 단위 스트리밍 처리 - (결과, 읽은 입력 비율)"""
+    processor = StreamingPostprocessor(max_chars=max_chars)
+    output, consumed = [], 0
+    for start in range(0, len(text), token_chars):
+        output.append(processor.feed(text[start:start + token_chars]))
+        consumed = start + token_chars
+        if processor.stopped:
+            break
+    output.append(processor.finish())
+    return "".join(output), min(consumed, len(text)) / len(text)
+
+
+def measure(fn, iterations: int) -> float:
+    """1회 평균 시간(ms)"""
+    return timeit.timeit(fn, number=iterations) / iterations * 1000
+
+
+def run(lengths: List[int], iterations: int, token_chars: int, max_chars: int):
+    print(f"=== 후처리 벤치마크 (ngram={DEFAULT_NGRAM}, max_repeat={DEFAULT_MAX_REPEAT}, max_chars={max_chars}, "
+          f"토큰 {token_chars}글자, {iterations}회) ===")
+    print(f"{'sample':>6} {'chars':>7} {'shared(ms)':>11} {'stream(ms)':>11} {'read':>6} {'naive(ms)':>10} {'legacy(ms)':>11} {'out':>6}")
+    for length in lengths:
+        for name, text in build_samples(length).items():
+            full = postprocess(text, max_chars=max_chars)
+            streamed, read = stream(text, token_chars, max_chars)
+            if streamed != full:
+                raise AssertionError(f"{name}/{length}: 스트리밍 결과가 전체 문자열 결과와 다릅니다")
+
+            shared_ms = measure(lambda: postprocess(text, max_chars=max_chars), iterations)
+            stream_ms = measure(lambda: stream(text, token_chars, max_chars), iterations)
+            legacy_ms = measure(lambda: legacy_postprocess(text), iterations)
+            naive = "-"
+            if len(text) <= NAIVE_MAX_CHARS:
+                naive = f"{measure(lambda: naive_repetition_cut(legacy_postprocess(text)), max(iterations // 10, 1)):.2f}"
+            print(
+                f"{name:>6} {len(text):>7} {shared_ms:>11.3f} {stream_ms:>11.3f} {read:>6.1%} {naive:>10} "
+                f"{legacy_ms:>11.3f} {len(full):>6}"
+            )
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="LLM 출력 후처리 마이크로벤치마크")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 2000, 20000], help="샘플 출력 길이(글자)")
+    parser.add_argument("--iterations", type=int, default=20, help="측정 반복 횟수")
+    parser.add_argument("--token-chars", type=int, default=2, help="스트리밍 시 토큰 하나의 글자 수")
+    parser.add_argument("--max-chars", type=int, default=540, help="최대 출력 글자 수 (0이면 제한 없음)")
+    args = parser.parse_args()
+
+    run(args.lengths, args.iterations, args.token_chars, args.max_chars or None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+vLLM TTFT(Time To First Token) 벤치마크
+
+실제 서비스와 같은 포스트/댓글 프롬프트를 스트리밍으로 보내 첫 토큰까지의 시간을 측정합니다.
+같은 서버를 프리픽스 캐싱 on/off로 띄워 각각 실행하거나, --bust-cache 옵션으로
+요청마다 프리픽스를 깨뜨린 결과와 비교해 캐싱 효과를 확인할 수 있습니다.
+
+사용 예:
+    python scripts/benchmark_ttft.py --endpoint http://localhost:8002 --requests 200 --concurrency 4
+    python scripts/benchmark_ttft.py --endpoint http://localhost:8002 --bust-cache
+"""
+
+import sys
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from typing import List
+
+import httpx
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_server.util.post_prompt import PostPromptGenerator
+from ai_server.util.comment_prompt import CommentPromptGenerator
+
+SAMPLE_CONTENTS = [
+    "오늘 날씨가 정말 좋네요!",
+    "배가 고파요...",
+    "산책 다녀왔는데 너무 피곤하다",
+    "새 장난감을 받았어요. 하루 종일 가지고 놀았어요.",
+    "비가 와서 밖에 못 나가서 심심해",
+    "간식 먹고 싶다 ㅋㅋ",
+]
+EMOTIONS = ["normal", "happy", "curious", "sad", "grumpy", "angry"]
+POST_TYPES = ["cat", "dog"]
+
+
+def build_prompts(n: int, bust_cache: bool) -> List[str]:
+    """서비스와 동일한 생성기로 임의의 (emotion, post_type) 조합 프롬프트 생성"""
+    prompts = []
+    for _ in range(n):
+        content = random.choice(SAMPLE_CONTENTS)
+        post_type = random.choice(POST_TYPES)
+        if random.random() < 0.5:
+            prompt = PostPromptGenerator(
+                emotion=random.choice(EMOTIONS), post_type=post_type, content=content
+            ).get_formatted_prompt()
+        else:
+            prompt = CommentPromptGenerator(
+                emotion="normal", post_type=post_type, content=content
+            ).get_formatted_prompt()
+        if bust_cache:
+            # 맨 앞에 고유 토큰을 넣어 프리픽스 공유를 막음 (비교 기준선)
+            prompt = f"{uuid.uuid4().hex}\n{prompt}"
+        prompts.append(prompt)
+    return prompts
+
+
+async def measure_ttft(client: httpx.AsyncClient, endpoint: str, model: str, prompt: str, max_tokens: int) -> float:
+    """스트리밍 요청의 첫 토큰 도착 시간(초) 측정"""
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "max_tokens": max_tokens,
+        "temperature": 0.3,
+        "stream": True,
+    }
+    start = time.perf_counter()
+    async with client.stream("POST", f"{endpoint}/v1/completions", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("data:") and line.strip() != "data: [DONE]":
+                return time.perf_counter() - start
+    raise RuntimeError("스트림에서 토큰을 받지 못했습니다")
+
+
+async def run(args) -> List[float]:
+    prompts = build_prompts(args.requests, args.bust_cache)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
+        # 워밍업 (측정 제외)
+        for prompt in prompts[: args.warmup]:
+            await measure_ttft(client, args.endpoint, args.model, prompt, args.max_tokens)
+
+        async def worker(prompt: str):
+            nonlocal errors
+            async with semaphore:
+                try:
+                    results.append(await measure_ttft(client, args.endpoint, args.model, prompt, args.max_tokens))
+                except Exception as e:
+                    errors += 1
+                    print(f"요청 실패: {e}")
+
+        await asyncio.gather(*(worker(p) for p in prompts))
+
+    if errors:
+        print(f"실패한 요청: {errors}개")
+    return results
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="vLLM TTFT 벤치마크")
+    parser.add_argument("--endpoint", default="http://localhost:8002", help="vLLM 서버 주소")
+    parser.add_argument("--model", default="meow-clovax-v3", help="서빙 모델명")
+    parser.add_argument("--requests", type=int, default=100, help="측정 요청 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 요청 수")
+    parser.add_argument("--max-tokens", type=int, default=16, help="요청당 생성 토큰 수")
+    parser.add_argument("--warmup", type=int, default=5, help="워밍업 요청 수")
+    parser.add_argument("--bust-cache", action="store_true", help="프리픽스 공유를 막은 기준선 측정")
+    parser.add_argument("--seed", type=int, default=0, help="프롬프트 샘플링 시드")
+
+    args = parser.parse_args()
+    args.endpoint = args.endpoint.rstrip("/")
+    random.seed(args.seed)
+
+    results = asyncio.run(run(args))
+    if not results:
+        print("측정 결과가 없습니다")
+        sys.exit(1)
+
+    print("=== TTFT 결과 ===")
+    print(f"모드: {'프리픽스 공유 차단' if args.bust_cache else '서비스 프롬프트'}")
+    print(f"요청 수: {len(results)} (동시성 {args.concurrency})")
+    print(f"평균: {statistics.mean(results) * 1000:.1f} ms")
+    print(f"p50: {percentile(results, 50) * 1000:.1f} ms")
+    print(f"p95: {percentile(results, 95) * 1000:.1f} ms")
+    print(f"p99: {percentile(results, 99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+GPU 없이 FastAPI 계층 용량을 측정하기 위한 가짜 vLLM(OpenAI 호환) 서버
+
+- GET  /v1/models       : 헬스 체크용 모델 목록
+- POST /v1/completions  : 규칙 기반 변환기로 만든 텍스트를 토큰 단위 지연과 함께 반환 (stream 지원)
+
+첫 토큰 지연(--ttft), 토큰당 지연(--per-token-latency), 오류율(--error-rate)을 조절할 수 있습니다.
+n > 1 요청은 후보마다 --degenerate-rate 확률로 빈 출력/반복 출력/말투 없는 원문을 섞어 돌려주고,
+후보 하나가 늘 때마다 디코딩 시간이 --candidate-overhead 비율만큼 늘어납니다 (배치 디코딩 흉내).
+
+사용 예:
+    python scripts/fake_vllm_server.py --port 8002 --ttft 0.05 --per-token-latency 0.01 --error-rate 0.01
+"""
+
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from typing import List, Optional, Union
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_server.model.cat import cat_converter
+from ai_server.model.dog import dog_converter
+
+
+class FakeServerSettings(BaseModel):
+    """가짜 서버 동작 설정"""
+    model_name: str = "meow-clovax-v3"
+    ttft: float = 0.05                 # 첫 토큰까지 지연(초) - 프리필 흉내
+    per_token_latency: float = 0.01    # 토큰당 지연(초) - 디코딩 흉내
+    error_rate: float = 0.0            # 500 응답 비율
+    max_concurrency: int = 0           # 0이면 제한 없음, 초과 시 대기 (max_num_seqs 흉내)
+    degenerate_rate: float = 0.0       # 비스트리밍 후보별로 퇴화한 출력을 낼 확률
+    candidate_overhead: float = 0.1    # 후보 1개 추가당 디코딩 시간 증가 비율
+
+
+class FakeCompletionRequest(BaseModel):
+    model: Optional[str] = None
+    prompt: Union[str, List[str]]
+    max_tokens: int = 16
+    n: int = 1
+    stream: bool = False
+    temperature: Optional[float] = None
+    top_p: Optional[float] = None
+    top_k: Optional[int] = None
+    stop: Optional[List[str]] = None
+
+
+def _prompt_input(prompt: str) -> str:
+    return prompt.rsplit("Input:", 1)[-1].split("\nOutput:", 1)[0].strip() or prompt[-20:]
+
+
+def fake_generate(prompt: str, max_tokens: int) -> List[str]:
+    """프롬프트의 Input을 규칙 기반으로 변환해 글자 단위 '토큰' 목록으로 반환"""
+    text = _prompt_input(prompt)
+    converter = dog_converter if "강아지" in prompt else cat_converter
+    return list(converter(text))[:max_tokens]
+
+
+def degenerate_generate(prompt: str, max_tokens: int) -> List[str]:
+    """모델이 가끔 내는 퇴화한 출력 (빈 출력, 같은 구절 반복, 말투 변환 없는 원문)"""
+    text = _prompt_input(prompt)
+    kind = random.choice(("empty", "repeat", "plain"))
+    if kind == "empty":
+        return []
+    if kind == "repeat":
+        return list(" ".join(text.split()[:3] * 10))[:max_tokens]
+    return list(text)[:max_tokens]
+
+
+def create_app(settings: FakeServerSettings) -> FastAPI:
+    app = FastAPI(title="Fake vLLM Server")
+    semaphore = asyncio.Semaphore(settings.max_concurrency) if settings.max_concurrency > 0 else None
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": settings.model_name, "object": "model"}]}
+
+    @app.post("/v1/completions")
+    async def completions(request: FakeCompletionRequest):
+        if random.random() < settings.error_rate:
+            return JSONResponse(status_code=500, content={"error": "injected failure"})
+
+        prompt = request.prompt if isinstance(request.prompt, str) else request.prompt[0]
+        tokens = fake_generate(prompt, request.max_tokens)
+        request_id = f"cmpl-{uuid.uuid4().hex}"
+
+        async def generate_stream():
+            if semaphore:
+                await semaphore.acquire()
+            try:
+                await asyncio.sleep(settings.ttft)
+                for token in tokens:
+                    chunk = {
+                        "id": request_id,
+                        "object": "text_completion",
+                        "model": settings.model_name,
+                        "choices": [{"index": i, "text": token, "finish_reason": None} for i in range(request.n)],
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(settings.per_token_latency)
+                yield "data: [DONE]\n\n"
+            finally:
+                if semaphore:
+                    semaphore.release()
+
+        if request.stream:
+            return StreamingResponse(generate_stream(), media_type="text/event-stream")
+
+        candidates = [tokens] + [
+            degenerate_generate(prompt, request.max_tokens) if random.random() < settings.degenerate_rate else tokens
+            for _ in range(request.n - 1)
+        ]
+        if random.random() < settings.degenerate_rate:
+            candidates[0] = degenerate_generate(prompt, request.max_tokens)
+        decode_tokens = max(len(candidate) for candidate in candidates)
+        decode_scale = 1 + settings.candidate_overhead * (request.n - 1)
+
+        if semaphore:
+            await semaphore.acquire()
+        try:
+            await asyncio.sleep(settings.ttft + settings.per_token_latency * decode_tokens * decode_scale)
+        finally:
+            if semaphore:
+                semaphore.release()
+
+        return {
+            "id": request_id,
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": settings.model_name,
+            "choices": [
+                {
+                    "index": i,
+                    "text": "".join(candidate),
+                    "finish_reason": "length" if len(candidate) >= request.max_tokens else "stop",
+                }
+                for i, candidate in enumerate(candidates)
+            ],
+            "usage": {"completion_tokens": sum(len(candidate) for candidate in candidates)},
+        }
+
+    return app
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="가짜 vLLM 서버")
+    parser.add_argument("--host", default="127.0.0.1", help="바인드 주소")
+    parser.add_argument("--port", type=int, default=8002, help="포트")
+    parser.add_argument("--served-model-name", default="meow-clovax-v3", help="모델명")
+    parser.add_argument("--ttft", type=float, default=0.05, help="첫 토큰 지연(초)")
+    parser.add_argument("--per-token-latency", type=float, default=0.01, help="토큰당 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 응답 비율 (0~1)")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="동시 처리 상한 (0: 무제한)")
+    parser.add_argument("--degenerate-rate", type=float, default=0.0, help="후보별 퇴화 출력 비율 (0~1)")
+    parser.add_argument("--candidate-overhead", type=float, default=0.1, help="후보 1개 추가당 디코딩 시간 증가 비율")
+
+    # vLLM 런처가 넘기는 나머지 인자는 무시 (런처/슈퍼바이저 테스트용)
+    args, _ = parser.parse_known_args()
+
+    settings = FakeServerSettings(
+        model_name=args.served_model_name,
+        ttft=args.ttft,
+        per_token_latency=args.per_token_latency,
+        error_rate=args.error_rate,
+        max_concurrency=args.max_concurrency,
+        degenerate_rate=args.degenerate_rate,
+        candidate_overhead=args.candidate_overhead,
+    )
+    print(f"fake vLLM server: {args.served_model_name} on {args.host}:{args.port}", flush=True)
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
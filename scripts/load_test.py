@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+FastAPI 서버 부하 테스트
+
+/generate/post, /generate/comment, /generate/chat, /images/search에 실제 서비스와 비슷한
+한국어 요청을 섞어 보내고 처리량, p50/p95/p99 지연 시간, 오류율을 측정합니다.
+결과는 JSON 파일로 저장되어 커밋 간 비교(--compare)에 사용할 수 있습니다.
+
+GPU 없이 측정하려면 가짜 vLLM 서버를 먼저 띄웁니다:
+    python scripts/fake_vllm_server.py --port 8002 --ttft 0.05 --per-token-latency 0.01
+    python -m uvicorn ai_server.main:app --port 8000
+    python scripts/load_test.py --base-url http://localhost:8000 --duration 60 --concurrency 32 --output results.json
+    python scripts/load_test.py --duration 60 --concurrency 32 --output new.json --compare results.json
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# 프로젝트 루트
+project_root = Path(__file__).parent.parent
+
+POST_CONTENTS = [
+    "오늘 날씨가 정말 좋네요!",
+    "배가 고파요...",
+    "산책 다녀왔는데 너무 피곤하다. 그래도 공원에서 친구들을 많이 만나서 즐거웠어.",
+    "새 장난감을 받았어요. 하루 종일 가지고 놀았는데 벌써 망가졌어요 ㅠㅠ",
+    "비가 와서 밖에 못 나가서 심심해. 창밖만 보고 있어.",
+    "주인이 출근해서 집에 혼자 있어. 언제 오는지 모르겠다.",
+    "오늘은 병원에 다녀왔다. 주사를 맞았는데 하나도 안 아팠다! 간식도 받았다.",
+    ("아침에 일어나서 밥을 먹고 창가에서 햇볕을 쬐었다. 점심에는 낮잠을 자고 오후에는 "
+     "장난감 쥐를 쫓아다녔다. 저녁에는 주인이랑 놀다가 간식을 받았다. 정말 완벽한 하루였다. "
+     "내일도 오늘 같았으면 좋겠다. 그런데 내일은 목욕하는 날이라서 조금 걱정된다."),
+]
+COMMENT_CONTENTS = [
+    "ㅋㅋㅋ", "ㅠㅠ", ".", "안녕", "너무 귀여워요!", "사진 잘 찍으셨네요 ㅎㅎ",
+    "우리 집 애도 똑같아요 ㅋㅋㅋㅋ", "헐 대박", "오늘도 힘내세요!", "이름이 뭐예요?",
+]
+CHAT_TEXTS = [
+    "안녕하세요", "밥 먹었어?", "ㅋㅋㅋ 진짜 웃기다", "오늘 뭐해?", "네 알겠어요",
+    "고양이 너무 좋아", "내일 만나요!", "ㅎㅇ", "ㄱㅊ", "맞아 맞아",
+]
+EMOTIONS = ["normal", "happy", "curious", "sad", "grumpy", "angry"]
+POST_TYPES = ["cat", "dog"]
+CHAT_TYPES = ["cat", "dog", "hamster", "monkey", "raccoon"]
+
+DEFAULT_MIX = "post=0.35,comment=0.35,chat=0.25,image=0.05"
+
+
+def load_image_urls() -> Dict[str, List[str]]:
+    """이미지 검색용 URL (data 디렉토리의 실제 이미지 목록)"""
+    urls = {}
+    for animal in ("cat", "dog"):
+        path = project_root / "data" / f"{animal}_image_url.txt"
+        urls[animal] = [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()] if path.exists() else []
+    return urls
+
+
+def build_request(kind: str, image_urls: Dict[str, List[str]]) -> Tuple[str, Dict]:
+    """요청 종류별 (경로, 본문) 생성"""
+    if kind == "post":
+        return "/generate/post", {
+            "content": random.choice(POST_CONTENTS),
+            "emotion": random.choice(EMOTIONS),
+            "post_type": random.choice(POST_TYPES),
+        }
+    if kind == "comment":
+        return "/generate/comment", {
+            "content": random.choice(COMMENT_CONTENTS),
+            "post_type": random.choice(POST_TYPES),
+        }
+    if kind == "chat":
+        return "/generate/chat", {
+            "text": random.choice(CHAT_TEXTS),
+            "post_type": random.choice(CHAT_TYPES),
+        }
+    if kind == "image":
+        animal = random.choice([a for a in POST_TYPES if image_urls.get(a)] or POST_TYPES)
+        return "/images/search", {
+            "image_url": random.choice(image_urls.get(animal) or ["https://example.com/cat.jpg"]),
+            "animal_type": animal,
+            "n_results": 3,
+        }
+    raise ValueError(f"알 수 없는 요청 종류: {kind}")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, weight = item.split("=")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    total = len(latencies) + errors
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies) if latencies else None),
+    }
+
+
+async def run_load(args) -> Dict:
+    weights = parse_mix(args.mix)
+    kinds, probs = list(weights), list(weights.values())
+    image_urls = load_image_urls()
+
+    latencies: Dict[str, List[float]] = {kind: [] for kind in kinds}
+    errors: Dict[str, int] = {kind: 0 for kind in kinds}
+    issued = 0
+    deadline = time.perf_counter() + args.duration
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=httpx.Timeout(args.timeout), limits=limits) as client:
+
+        async def worker():
+            nonlocal issued
+            while time.perf_counter() < deadline and (not args.requests or issued < args.requests):
+                issued += 1
+                kind = random.choices(kinds, probs)[0]
+                path, body = build_request(kind, image_urls)
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    # 정상 입력만 보내므로 4xx/5xx 응답은 모두 오류로 집계
+                    if response.status_code >= 400:
+                        errors[kind] += 1
+                    else:
+                        latencies[kind].append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors[kind] += 1
+
+        fallbacks_before = await fetch_fallbacks(client)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        fallbacks_after = await fetch_fallbacks(client)
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "mix": weights,
+            "seed": args.seed,
+        },
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "endpoints": {kind: summarize(latencies[kind], errors[kind], elapsed) for kind in kinds},
+        # 서비스는 vLLM 실패 시 200과 규칙 기반 변환 결과를 반환하므로 /metrics의 fallback 카운터 증가분을 따로 기록
+        "fallbacks": {
+            service: count - fallbacks_before.get(service, 0)
+            for service, count in fallbacks_after.items()
+        },
+    }
+
+
+async def fetch_fallbacks(client: httpx.AsyncClient) -> Dict[str, float]:
+    """/metrics에서 서비스별 규칙 기반 대체 횟수 조회 (원인별 합계, 실패 시 빈 딕셔너리)"""
+    try:
+        response = await client.get("/metrics")
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    counts = {}
+    for line in response.text.splitlines():
+        if line.startswith('transform_fallback_total{service="'):
+            labels, value = line.rsplit(" ", 1)
+            service = labels.split('"')[1]
+            counts[service] = counts.get(service, 0) + float(value)
+    return counts
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, text=True).strip()
+    except Exception:
+        return None
+
+
+def print_report(results: Dict, baseline: Optional[Dict] = None):
+    """결과 표 출력 (기준 결과가 있으면 변화율 함께 출력)"""
+    def delta(section: str, key: str, metric: str) -> str:
+        if not baseline:
+            return ""
+        old = (baseline.get(section, {}).get(key, {}) if section == "endpoints" else baseline.get(section, {})).get(metric)
+        new = (results[section][key] if section == "endpoints" else results[section]).get(metric)
+        if not old or new is None:
+            return ""
+        return f" ({(new - old) / old * 100:+.1f}%)"
+
+    print(f"=== 부하 테스트 결과 (commit {results['meta']['commit']}) ===")
+    if results.get("fallbacks"):
+        print(f"규칙 기반 대체(fallback): {results['fallbacks']}")
+    header = f"{'endpoint':<10} {'req':>7} {'rps':>8} {'err%':>7} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    rows = [("overall", results["overall"], "overall", None)] + [
+        (kind, stats, "endpoints", kind) for kind, stats in results["endpoints"].items()
+    ]
+    for name, stats, section, key in rows:
+        print(
+            f"{name:<10} {stats['requests']:>7} {stats['throughput_rps']:>8} {stats['error_rate'] * 100:>6.2f}% "
+            f"{stats['p50_ms'] or '-':>9} {stats['p95_ms'] or '-':>9} {stats['p99_ms'] or '-':>9}"
+        )
+        if baseline:
+            print(
+                f"{'':<10} rps{delta(section, key, 'throughput_rps')} p50{delta(section, key, 'p50_ms')} "
+                f"p95{delta(section, key, 'p95_ms')} p99{delta(section, key, 'p99_ms')}"
+            )
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="FastAPI 서버 부하 테스트")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="FastAPI 서버 주소")
+    parser.add_argument("--duration", type=float, default=30.0, help="측정 시간(초)")
+    parser.add_argument("--requests", type=int, default=0, help="최대 요청 수 (0: 시간 기준)")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 사용자 수")
+    parser.add_argument("--timeout", type=float, default=60.0, help="요청 타임아웃(초)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"요청 비율 (기본: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=0, help="요청 샘플링 시드")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    results = asyncio.run(run_load(args))
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_report(results, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,54 @@
 # unit_test.py
 
 import pytest
+import asyncio
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import httpx
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from ai_server.core.config import get_settings
 from ai_server.util.v1.key_manager import APIKeyPool, initialize_key_pool
 from ai_server.model.post_model import PostTransformationService
+from ai_server.model.comment_model import CommentTransformationService
+from ai_server.schemas.converter_schemas import CommentEmotion, CommentType
 from ai_server.schemas.post_schemas import PostRequest, Emotion, PostType
+from ai_server.external.vLLM import VLLMAsyncClient, CompletionRequest, VLLMConfig, VLLMLauncher
+from ai_server.external.vLLM import AdaptiveDeadline, CircuitBreaker, CircuitOpenError, DeadlineExceededError, QueueFullError
+from ai_server.external.vLLM.server.vllm_launcher import read_supervisor_status
+from ai_server.util.post_prompt import PostPromptGenerator
+from ai_server.util.comment_prompt import CommentPromptGenerator
+from ai_server.util.prompt_layout import SHARED_PREFIX
+from ai_server.util.token_budget import TokenBudgeter
+from ai_server.core.metrics import MetricsMiddleware, MetricsRegistry, HTTP_REQUESTS, HTTP_IN_FLIGHT, TRANSFORM_PATHS, FALLBACKS, stage_timer
+from ai_server.core.config import TracingConfig, AdminConfig, WarmupConfig, FastPathConfig, get_admin_config
+from ai_server.util.fast_path import RuleFastPath, classify_input
+from ai_server.util.candidate_validator import score_candidate, select_candidate
+from ai_server.util.postprocess import StreamingPostprocessor, postprocess
+from ai_server.model.cat import cat_converter
+from ai_server.model.dog import dog_converter
+from ai_server.core.readiness import ReadinessTracker
+from ai_server.core.profiler import SamplingProfiler, ProfilerBusyError
+from ai_server.router.admin import router as admin_router
+from ai_server.core import responses
+from ai_server.core.responses import FastJSONResponse, lean_response
+from ai_server.schemas.image_schemas import ImageSearchResponse
+from ai_server.core.file_lock import file_lock, run_once
+from ai_server.util.image_dedup import DuplicateIndex, dhash, hamming_distances
+from ai_server.util.mmr import mmr
+from ai_server.util.text_embedding_cache import TextEmbeddingCache
+from ai_server.util.zero_shot import ANIMAL_LABELS, ZeroShotClassifier
+from ai_server.model.embedding_worker import EmbeddingClient, EmbeddingServer, EmbeddingWorkerPool
+from fastapi.responses import JSONResponse
+from ai_server.core.tracing import TracingMiddleware, get_request_id, span
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 # from ai_server.comment.comment_model import CommentTransformationService  # 더 이상 사용하지 않음
 # from ai_server.comment.comment_schemas import CommentRequest, CommentType  # 더 이상 사용하지 않음
 
@@ -65,7 +109,7 @@ async def test_post_transformation_service():
     
     # 결과 검증 (예상된 결과에 따라 수정 필요)
     assert transformed_content is not None, "변환된 콘텐츠가 없습니다."
-    assert isinstance(transformed_content, str), "변환된 콘텐츠가 문자열이 아닙니다."
+    assert isinstance(transformed_content.text, str), "변환된 콘텐츠가 문자열이 아닙니다."
 
 # test_comment_model.py - 더 이상 사용하지 않는 Gemini API 댓글 변환 테스트 제거
 # @pytest.mark.asyncio
@@ -83,4 +127,1352 @@ async def test_post_transformation_service():
 #     
 #     # 결과 검증 (예상된 결과에 따라 수정 필요)
 #     assert transformed_content is not None, "변환된 콘텐츠가 없습니다."
-#     assert isinstance(transformed_content, str), "변환된 콘텐츠가 문자열이 아닙니다."
\ No newline at end of file
+#     assert isinstance(transformed_content, str), "변환된 콘텐츠가 문자열이 아닙니다."
+
+# test_vllm_client.py
+class _StubVLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI 호환 /v1/completions, /v1/models 응답만 흉내내는 스텁 핸들러"""
+
+    def do_GET(self):
+        if self.server.healthy and self.path == "/v1/models":
+            self._send(200, {"data": [{"id": "meow-clovax-v3"}]})
+        else:
+            self._send(503, {"error": "unavailable"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.server.lock:
+            self.server.hits += 1
+            self.server.last_body = body
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        if self.server.disconnect:
+            # 요청을 받은 뒤 응답 없이 연결 종료 (생성 도중 레플리카가 죽은 경우)
+            with self.server.lock:
+                self.server.active -= 1
+            self.close_connection = True
+            return
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+        if self.server.echo:
+            # 프롬프트의 Input 부분에 '냥'을 붙여 돌려줌
+            text = body["prompt"].split("Input: ", 1)[1].split("\nOutput:", 1)[0] + "냥"
+        else:
+            text = self.server.name
+        choices = self.server.choices or [text]
+        self._send(200, {"choices": [{"index": i, "text": choice} for i, choice in enumerate(choices)]})
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_servers():
+    servers = []
+
+    def start(name, delay=0.0, echo=False, choices=None, disconnect=False):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubVLLMHandler)
+        server.name, server.delay, server.echo, server.healthy = name, delay, echo, True
+        server.disconnect = disconnect
+        server.choices, server.last_body = choices, None
+        server.hits, server.active, server.max_active, server.lock = 0, 0, 0, threading.Lock()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _dead_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def _completion_request():
+    return CompletionRequest(prompt="안녕", max_tokens=8, temperature=0.3, top_p=0.75, top_k=1)
+
+
+@pytest.mark.asyncio
+async def test_vllm_client_failover(stub_servers):
+    _, live_url = stub_servers("live")
+    async with VLLMAsyncClient(base_url=[_dead_url(), live_url]) as client:
+        for _ in range(4):
+            result = await client.completion(_completion_request())
+            assert result["choices"][0]["text"] == "live"
+
+        dead, live = client.endpoints
+        assert not dead.healthy, "연결 실패한 레플리카는 제외되어야 합니다."
+        assert dead.total_requests == 1, "제외된 레플리카로는 쿨다운 동안 라우팅되지 않아야 합니다."
+        assert live.total_requests == 4
+
+
+@pytest.mark.asyncio
+async def test_vllm_client_does_not_resend_after_disconnect(stub_servers):
+    broken, broken_url = stub_servers("broken", disconnect=True)
+    live, live_url = stub_servers("live")
+    async with VLLMAsyncClient(base_url=[broken_url, live_url]) as client:
+        with pytest.raises(httpx.RemoteProtocolError):
+            await client.completion(_completion_request())
+        assert broken.hits == 1 and live.hits == 0, "요청을 받은 뒤 끊긴 경우 다른 레플리카로 다시 보내지 않아야 합니다."
+        assert not client.endpoints[0].healthy
+
+        result = await client.completion(_completion_request())
+        assert result["choices"][0]["text"] == "live"
+
+
+@pytest.mark.asyncio
+async def test_vllm_client_even_load_distribution(stub_servers):
+    urls = [stub_servers(f"s{i}", delay=0.05)[1] for i in range(3)]
+    async with VLLMAsyncClient(base_url=urls) as client:
+        await asyncio.gather(*(client.completion(_completion_request()) for _ in range(30)))
+        counts = [ep.total_requests for ep in client.endpoints]
+        assert counts == [10, 10, 10], f"요청이 고르게 분산되지 않았습니다: {counts}"
+
+
+@pytest.mark.asyncio
+async def test_vllm_client_health_probe_eject_and_recover(stub_servers):
+    server, url = stub_servers("flaky")
+    async with VLLMAsyncClient(base_url=url, eject_cooldown=60.0) as client:
+        server.healthy = False
+        assert await client.check_health() == {url: False}
+        assert not client.endpoints[0].is_available(time.monotonic())
+
+        server.healthy = True
+        assert await client.check_health() == {url: True}
+        assert client.endpoints[0].is_available(time.monotonic())
+
+
+def test_circuit_breaker_states_and_adaptive_deadline():
+    now = [0.0]
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_rate=0.5, slow_call_seconds=1.0,
+                             slow_call_rate=0.75, open_seconds=10.0, half_open_probes=2, clock=lambda: now[0])
+    for success in (True, False, True, False):
+        breaker.before_call()
+        breaker.record(success, 0.1)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # open_seconds 후 half_open: 시험 호출 수만큼만 허용, 실패하면 다시 open
+    now[0] = 10.0
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(False, 0.1)
+    assert breaker.state == "open"
+
+    now[0] = 20.0
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record(True, 0.1)
+    assert breaker.state == "closed"
+
+    # 오류가 없어도 느린 호출 비율이 높으면 open
+    for duration in (2.0, 2.0, 0.1, 2.0):
+        breaker.before_call()
+        breaker.record(True, duration)
+    assert breaker.state == "open"
+
+    deadline = AdaptiveDeadline(percentile=0.9, multiplier=2.0, min_seconds=0.5, max_seconds=30.0, window=10, min_samples=10)
+    assert deadline.current() == 30.0, "표본이 부족하면 상한을 사용해야 합니다."
+    for i in range(1, 11):
+        deadline.observe(i / 10)
+    assert deadline.current() == pytest.approx(1.8)
+    for _ in range(10):
+        deadline.observe(0.01)
+    assert deadline.current() == 0.5
+
+    # 데드라인 초과는 데드라인 값을 하한 표본으로 기록해 데드라인이 따라 올라감
+    deadline.observe_timeout(0.5)
+    deadline.observe_timeout(0.5)
+    assert deadline.current() == pytest.approx(1.0)
+    deadline.reset()
+    assert deadline.current() == 30.0 and deadline.clone().current() == 30.0
+
+
+@pytest.mark.asyncio
+async def test_vllm_client_deadline_trips_circuit_and_fails_fast(stub_servers):
+    server, url = stub_servers("slow", delay=0.5)
+    breaker = CircuitBreaker(window=2, min_calls=2, open_seconds=60.0)
+    deadline = AdaptiveDeadline(max_seconds=0.1)
+    async with VLLMAsyncClient(base_url=url, circuit_breaker=breaker, deadline=deadline) as client:
+        for _ in range(2):
+            with pytest.raises(DeadlineExceededError):
+                await client.completion(_completion_request())
+        assert client.get_protection_status()["circuit"]["state"] == "open"
+
+        started = time.perf_counter()
+        with pytest.raises(CircuitOpenError):
+            await client.completion(_completion_request())
+        assert time.perf_counter() - started < 0.05
+        assert server.hits == 2, "서킷이 열리면 vLLM을 호출하지 않아야 합니다."
+        assert client.endpoints[0].in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_vllm_client_deadline_recovers_after_latency_step_up(stub_servers):
+    from ai_server.external.vLLM.client.vllm_client import deadline_key
+
+    server, url = stub_servers("slow", delay=0.01)
+    deadline = AdaptiveDeadline(percentile=0.99, multiplier=2.0, min_seconds=0.05, max_seconds=2.0, window=20, min_samples=4)
+    comment = _completion_request()
+    post = CompletionRequest(prompt="안녕", max_tokens=400, temperature=0.3, top_p=0.75, top_k=1, n=3)
+    assert deadline_key(comment) != deadline_key(post)
+
+    breaker = CircuitBreaker(window=20, min_calls=20)
+    async with VLLMAsyncClient(base_url=url, circuit_breaker=breaker, deadline=deadline) as client:
+        for _ in range(4):
+            await client.completion(comment)
+        assert client.deadline_for(comment).current() < 0.3
+        # 짧은 요청의 분포가 긴 요청의 데드라인을 당기지 않음
+        assert client.deadline_for(post).current() == 2.0
+
+        # 지연 시간이 데드라인의 몇 배로 늘어도 초과가 하한 표본으로 쌓여 데드라인이 따라 올라감
+        server.delay = 0.3
+        outcomes = []
+        for _ in range(8):
+            try:
+                await client.completion(comment)
+                outcomes.append("ok")
+            except DeadlineExceededError:
+                outcomes.append("deadline")
+        assert outcomes[0] == "deadline" and outcomes[-3:] == ["ok"] * 3, outcomes
+        assert client.deadline_for(comment).current() >= 0.3
+
+    # 서킷이 열리면 표본을 비우고, half_open 시험 호출은 지난 분포 대신 상한으로 호출해 복구
+    server.delay = 0.01
+    breaker = CircuitBreaker(window=2, min_calls=2, failure_rate=0.5, open_seconds=0.2, half_open_probes=1)
+    async with VLLMAsyncClient(base_url=url, circuit_breaker=breaker, deadline=deadline) as client:
+        for _ in range(4):
+            await client.completion(comment)
+        server.delay = 0.3
+        while breaker.state != "open":
+            with pytest.raises(DeadlineExceededError):
+                await client.completion(comment)
+        assert client.deadline_for(comment).current() == 2.0, "서킷이 열리면 지난 표본을 버려야 합니다."
+        await asyncio.sleep(0.25)
+        assert breaker.state == "half_open"
+        await client.completion(comment)
+        assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_readiness_gates_on_required_warmups(stub_servers):
+    server, live_url = stub_servers("warm")
+    dead_url = _dead_url()
+    attempts = []
+
+    async def flaky_collections():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("not yet")
+        return {"cat": 3}
+
+    async def broken_optional():
+        raise RuntimeError("down")
+
+    async with VLLMAsyncClient(base_url=[dead_url, live_url]) as client:
+        tracker = ReadinessTracker(["vllm", "vector_db"])
+        assert tracker.snapshot()["status"] == "not_ready"
+        tracker.start(
+            {"vllm": client.warmup, "vector_db": flaky_collections, "extra": broken_optional},
+            WarmupConfig(retry_interval=0.01, timeout=0.2),
+        )
+        for _ in range(200):
+            if tracker.ready:
+                break
+            await asyncio.sleep(0.01)
+
+        snapshot = tracker.snapshot()
+        assert snapshot["status"] == "ready"
+        assert snapshot["subsystems"]["vllm"]["detail"] == {dead_url: False, live_url: True}
+        assert server.hits == 1, "워밍업은 레플리카별 1회 생성 요청이어야 합니다."
+        assert snapshot["subsystems"]["vector_db"]["attempts"] == 3
+        assert snapshot["subsystems"]["vector_db"]["detail"] == {"cat": 3}
+        # 필수가 아닌 서브시스템의 실패는 준비 상태에 영향 없음
+        await tracker.close()
+
+        disabled = ReadinessTracker(["vllm"])
+        disabled.start({"vllm": client.warmup}, WarmupConfig(enabled=False))
+        assert disabled.ready and server.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_readiness_keeps_retrying_after_timeout():
+    up = asyncio.Event()
+
+    async def late_vllm():
+        if not up.is_set():
+            raise RuntimeError("vLLM 아직 기동 중")
+        return "ok"
+
+    tracker = ReadinessTracker(["vllm"])
+    tracker.start({"vllm": late_vllm}, WarmupConfig(retry_interval=0.01, timeout=0.05, max_retry_interval=0.04))
+    try:
+        for _ in range(200):
+            if tracker.snapshot()["subsystems"]["vllm"]["state"] == "failed":
+                break
+            await asyncio.sleep(0.01)
+        status = tracker.snapshot()["subsystems"]["vllm"]
+        assert status["state"] == "failed" and not tracker.ready
+        assert "기동 중" in status["error"]
+
+        # 제한 시간 이후에도 포기하지 않고 재시도
+        attempts = status["attempts"]
+        await asyncio.sleep(0.2)
+        assert tracker.snapshot()["subsystems"]["vllm"]["attempts"] > attempts
+
+        up.set()
+        for _ in range(100):
+            if tracker.ready:
+                break
+            await asyncio.sleep(0.01)
+        status = tracker.snapshot()["subsystems"]["vllm"]
+        assert tracker.ready and status["detail"] == "ok" and status["error"] is None
+    finally:
+        await tracker.close()
+
+
+async def _wait_for_supervisor(path, predicate, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = read_supervisor_status(path)
+        if status and predicate(status):
+            return status
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"슈퍼바이저 상태 대기 시간 초과: {read_supervisor_status(path)}")
+
+
+@pytest.mark.asyncio
+async def test_vllm_supervisor_restarts_crashes_and_drains(tmp_path):
+    status_path = str(tmp_path / "supervisor.json")
+    config = VLLMConfig(
+        host="127.0.0.1",
+        port=int(_dead_url().rsplit(":", 1)[1]),
+        server_command=[sys.executable, str(Path(__file__).parent.parent / "scripts" / "fake_vllm_server.py")],
+        supervisor_health_interval=0.1,
+        supervisor_failure_threshold=2,
+        restart_backoff_initial=0.1,
+        restart_backoff_max=0.4,
+        drain_grace=0.3,
+        drain_timeout=1.0,
+        startup_timeout=30.0,
+        log_dir=str(tmp_path / "logs"),
+        supervisor_status_path=status_path,
+    )
+    launcher = VLLMLauncher(config)
+    assert [launcher.backoff_delay(n) for n in (1, 2, 3, 4)] == [0.1, 0.2, 0.4, 0.4]
+
+    task = asyncio.create_task(launcher.supervise(handle_signals=False))
+    try:
+        first = await _wait_for_supervisor(status_path, lambda s: s["state"] == "running")
+
+        # 비정상 종료 -> 백오프 후 재시작
+        os.kill(first["pid"], signal.SIGKILL)
+        second = await _wait_for_supervisor(status_path, lambda s: s["state"] == "running" and s["pid"] != first["pid"])
+        assert second["restarts"] == 1 and second["consecutive_failures"] == 1
+        assert second["last_restart_reason"].startswith("exited")
+
+        # 요청한 재시작은 drain 동안 라우팅에서 제외되고 백오프 없이 진행
+        async with VLLMAsyncClient(base_url=launcher.base_url, supervisor_status_path=status_path) as client:
+            assert await client.check_health() == {launcher.base_url: True}
+            launcher.request_restart()
+            await _wait_for_supervisor(status_path, lambda s: s["state"] == "draining")
+            assert await client.check_health() == {launcher.base_url: False}
+            third = await _wait_for_supervisor(status_path, lambda s: s["state"] == "running" and s["pid"] != second["pid"])
+            assert third["restarts"] == 2 and third["consecutive_failures"] == 1
+            assert third["last_restart_reason"] == "restart requested"
+            assert await client.check_health() == {launcher.base_url: True}
+    finally:
+        launcher.request_stop()
+        await asyncio.wait_for(task, 30)
+
+    final = read_supervisor_status(status_path)
+    assert final["state"] == "stopped" and final["pid"] is None
+    with pytest.raises(ProcessLookupError):
+        os.kill(third["pid"], 0)
+    log_text = (tmp_path / "logs" / "vllm.log").read_text()
+    assert log_text.count("fake vLLM server") == 3, "재시작마다 서버 출력이 로그 파일에 수집되어야 합니다."
+
+
+@pytest.mark.asyncio
+async def test_vllm_supervisor_waits_for_gpu_memory_before_starting(tmp_path, monkeypatch):
+    from ai_server.external.vLLM.server import vllm_launcher
+
+    readings = [20000, 20000, 1000]
+    monkeypatch.setattr(vllm_launcher, "gpu_memory_used_mb", lambda: readings.pop(0) if len(readings) > 1 else readings[0])
+    status_path = str(tmp_path / "supervisor.json")
+    config = VLLMConfig(
+        host="127.0.0.1",
+        port=int(_dead_url().rsplit(":", 1)[1]),
+        server_command=[sys.executable, str(Path(__file__).parent.parent / "scripts" / "fake_vllm_server.py")],
+        supervisor_health_interval=0.1,
+        restart_backoff_initial=0.1,
+        restart_backoff_max=0.2,
+        gpu_memory_threshold_mb=15000,
+        startup_timeout=30.0,
+        log_dir=str(tmp_path / "logs"),
+        supervisor_status_path=status_path,
+    )
+    launcher = VLLMLauncher(config)
+    task = asyncio.create_task(launcher.supervise(handle_signals=False))
+    try:
+        # 메모리가 상한 아래로 내려갈 때까지 띄우지 않고 백오프
+        running = await _wait_for_supervisor(status_path, lambda s: s["state"] == "running")
+        assert running["restarts"] == 2 and running["last_restart_reason"] == "GPU memory 20000MB > 15000MB"
+    finally:
+        launcher.request_stop()
+        await asyncio.wait_for(task, 30)
+    assert (tmp_path / "logs" / "vllm.log").read_text().count("fake vLLM server") == 1
+
+
+@pytest.mark.asyncio
+async def test_trivial_inputs_take_rule_fast_path(stub_servers):
+    config = FastPathConfig()
+    expected = {
+        "ㅋㅋㅋ": "jamo", "ㅠㅠ": "jamo", ".": "punctuation", ";": "punctuation", "👍👍": "punctuation",
+        "안녕": "short", "ㅋㅋ 대박": "short", "Hello, world!": None, "오늘 산책 다녀왔어요": None,
+    }
+    assert {text: classify_input(text, config) for text in expected} == expected
+
+    server, url = stub_servers("llm")
+    rule_before = TRANSFORM_PATHS.get(service="comment", path="rule")
+    llm_before = TRANSFORM_PATHS.get(service="comment", path="llm")
+
+    async def transform(text, fast_path_config=None):
+        service = CommentTransformationService(vllm_base_url=url)
+        if fast_path_config is not None:
+            service.fast_path = RuleFastPath("comment", fast_path_config)
+        return await service.transform_comment(text, CommentEmotion.NORMAL, CommentType.CAT)
+
+    assert await transform("안녕") == ("안냥", "rule")
+    assert await transform("ㅋㅋㅋ") == ("ㅋㅋㅋ냥하하", "rule")
+    assert await transform(" . ") == (".", "rule")
+    assert server.hits == 0, "짧은 입력은 vLLM을 호출하지 않아야 합니다."
+    assert await transform("오늘 산책 다녀왔어요") == ("llm", "llm")
+    assert await transform("ㅋㅋ", FastPathConfig(enabled=False)) == ("llm", "llm")
+    assert await transform("ㅋㅋ", FastPathConfig(services=["post"])) == ("llm", "llm")
+    assert server.hits == 3
+    assert TRANSFORM_PATHS.get(service="comment", path="rule") == rule_before + 3
+    assert TRANSFORM_PATHS.get(service="comment", path="llm") == llm_before + 3
+
+
+
+@pytest.mark.asyncio
+async def test_vllm_failures_fall_back_to_rule_engine(stub_servers):
+    server, url = stub_servers("slow", delay=0.5)
+    text = "오늘 공원에서 산책하고 왔어요"
+
+    # 데드라인 초과 -> 규칙 기반 변환
+    deadline_before = FALLBACKS.get(service="comment", reason="deadline")
+    service = CommentTransformationService(vllm_base_url=url)
+    service.client.deadline = AdaptiveDeadline(max_seconds=0.1)
+    assert await service.transform_comment(text, CommentEmotion.NORMAL, CommentType.CAT) == (cat_converter(text).strip(), "rule")
+    assert FALLBACKS.get(service="comment", reason="deadline") == deadline_before + 1
+
+    # 대기 요청 상한 -> 기다리지 않고 즉시 거절
+    async with VLLMAsyncClient(base_url=url, max_pending=1) as client:
+        first = asyncio.create_task(client.completion(_completion_request()))
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError):
+            await client.completion(_completion_request())
+        assert (await first)["choices"][0]["text"] == "slow"
+        assert client.pending == 0
+
+    # 서킷 open -> vLLM 호출 없이 규칙 기반 변환
+    hits = server.hits
+    service = PostTransformationService(vllm_base_url=url)
+    service.client.circuit_breaker = CircuitBreaker(window=1, min_calls=1, open_seconds=60.0)
+    service.client.circuit_breaker.record(False, 0.0)
+    assert await service.transform_post(text, Emotion.HAPPY, PostType.DOG) == (dog_converter(text).strip(), "rule")
+    assert server.hits == hits, "서킷이 열리면 vLLM을 호출하지 않아야 합니다."
+
+
+@pytest.mark.asyncio
+async def test_post_candidates_pick_best_acceptable(stub_servers):
+    repeated = " ".join(["오늘 산책 했다냥"] * 5)
+    assert not score_candidate(repeated, "cat").acceptable, "반복 후보는 통과하면 안 됩니다."
+    assert not score_candidate("오늘 산책했다", "cat").acceptable, "말투 없는 후보는 통과하면 안 됩니다."
+    assert select_candidate(["", repeated, "오늘 산책했다", "오늘 산책했다냥", "간식 먹었다냥"], "cat") == ("오늘 산책했다냥", "accepted")
+    # 통과한 후보가 여럿이면 앞선 후보가 아니라 점수가 높은 후보
+    partial = "산책 다녀왔다냥. 간식도 먹었다냥. 이제 잔다."
+    assert score_candidate(partial, "cat").acceptable
+    assert select_candidate([partial, "산책 다녀왔다냥. 간식도 먹었다냥!"], "cat") == ("산책 다녀왔다냥. 간식도 먹었다냥!", "accepted")
+
+    # 어미는 끝부분으로만 판단하고 일반 단어로 끝나는 문장은 말투로 치지 않음
+    for plain in ("하늘에 무지개", "사과 두개", "서울 왕복", "오늘 대왕", "고양이는 meow"):
+        assert score_candidate(plain, "dog").ending_ratio == 0.0, plain
+    for styled in ("산책 갔다왈!", "간식 먹었다개~", "배고프냐개?", "왕왕!", "신난다멍 🐶"):
+        assert score_candidate(styled, "dog").ending_ratio == 1.0, styled
+    assert score_candidate("멍멍이가 좋다냥!", "cat").ending_ratio == 1.0
+    assert score_candidate("냥냥펀치 좋다", "cat").ending_ratio == 0.0
+    assert select_candidate(["", "오늘 산책했다"], "cat") == ("오늘 산책했다", "best_effort")
+    assert select_candidate(["", " "], "dog") == (None, "empty")
+
+    server, url = stub_servers("candidates", choices=["", "오늘 산책했다", "산책 다녀왔다냥!"])
+    service = PostTransformationService(vllm_base_url=url)
+    service.inference_config = service.inference_config.model_copy(update={"post_candidates": 3})
+    result = await service.transform_post("오늘 공원에 산책 다녀왔어요", Emotion.HAPPY, PostType.CAT)
+    assert result == ("산책 다녀왔다냥!", "llm")
+    assert server.hits == 1, "후보는 한 번의 요청으로 함께 생성되어야 합니다."
+    assert server.last_body["n"] == 3
+    assert server.last_body["top_k"] == service.inference_config.post_candidate_top_k
+
+    # 후보가 모두 비면 규칙 기반 변환으로 대체
+    server.choices = ["", ""]
+    service = PostTransformationService(vllm_base_url=url)
+    service.inference_config = service.inference_config.model_copy(update={"post_candidates": 2})
+    text = "오늘 공원에 산책 다녀왔어요"
+    assert await service.transform_post(text, Emotion.HAPPY, PostType.CAT) == (cat_converter(text).strip(), "rule")
+
+
+# test_postprocess.py
+def test_postprocessor_cuts_degenerate_output_and_streams_same_text():
+    assert postprocess("Output: 안녕하세요냥! 오늘도 좋은 하루냥.\n다음 줄") == "안녕하세요냥! 오늘도 좋은 하루냥."
+    assert postprocess("Input: 안녕\nOutput:\n<|assistant|>\n안냥</s>") == "안냥"
+    assert postprocess("사랑해 사랑해 사랑해 사랑해") == "사랑해 사랑해 사랑해 사랑해", "한 번 반복은 허용해야 합니다."
+
+    looping = "오늘 날씨 좋다냥. 공원에 갔다냥 " + "산책 가자 냥 " * 200
+    assert postprocess(looping) == "오늘 날씨 좋다냥.", "반복 루프는 그 앞 문장 경계에서 잘려야 합니다."
+    long_text = " ".join(f"{i}번째 문장이다냥." for i in range(50))
+    cut = postprocess(long_text, max_chars=60)
+    assert len(cut) <= 60 and cut.endswith("냥.")
+
+    for text, max_chars in ((looping, None), (long_text, 60), ("Output: <|assistant|>좋아냥! 또 놀자냥~ 간식 줘냥", None)):
+        processor = StreamingPostprocessor(max_chars=max_chars)
+        streamed, consumed = "", 0
+        for token in text:
+            streamed += processor.feed(token)
+            consumed += 1
+            if processor.stopped:
+                break
+        streamed += processor.finish()
+        assert streamed == postprocess(text, max_chars=max_chars), "스트리밍 결과가 전체 문자열 결과와 같아야 합니다."
+        if text is looping:
+            assert processor.stop_reason == "repetition"
+            assert consumed < len(text) // 10, "반복이 감지되면 남은 생성을 기다리지 않아야 합니다."
+
+# test_prompt_layout.py
+def test_prompt_shared_prefix_is_stable():
+    prompts = [
+        PostPromptGenerator(emotion=emotion.value, post_type=post_type.value, content="오늘 날씨 좋네요").get_formatted_prompt()
+        for emotion in Emotion for post_type in PostType
+    ]
+    prompts.append(CommentPromptGenerator(emotion="normal", post_type="cat", content="좋아요").get_formatted_prompt())
+    assert all(prompt.startswith(SHARED_PREFIX) for prompt in prompts), "모든 조합이 공통 프리픽스로 시작해야 합니다."
+
+    generator = PostPromptGenerator(emotion="happy", post_type="dog", content="간식 {주세요}")
+    prompt = generator.get_formatted_prompt()
+    assert prompt.startswith(generator.get_prompt_prefix()), "사용자 입력은 조합별 프리픽스 뒤에만 와야 합니다."
+    assert "간식 {주세요}" in prompt, "중괄호가 포함된 입력도 그대로 프롬프트에 들어가야 합니다."
+
+
+# test_token_budget.py
+class _CharTokenizer:
+    """공백을 제외한 글자 하나를 토큰 하나로 세는 작은 로컬 토크나이저"""
+
+    def encode(self, text, add_special_tokens=True):
+        return [ord(ch) for ch in text if not ch.isspace()]
+
+
+@pytest.fixture
+def budgeter():
+    return TokenBudgeter(max_model_len=100, tokenizer=_CharTokenizer(), output_ratio=1.0, min_output_tokens=10, safety_margin=0)
+
+
+def test_token_budget_short_input_gets_proportional_max_tokens(budgeter):
+    plan = budgeter.plan(overhead="프롬프트", content="안녕하세요", max_tokens_cap=400)
+    assert not plan.truncated
+    assert plan.prompt_tokens == 9
+    assert plan.max_tokens == 5 + 10, "짧은 입력에는 입력 길이에 비례한 생성 토큰만 할당되어야 합니다."
+
+
+def test_token_budget_truncates_at_sentence_boundary(budgeter):
+    # 입력 한도 = (100 - 4 - 10) / 2 = 43 토큰
+    sentences = ["오늘은 산책을 했다.", "공원에서 친구를 만났다!", "간식도 많이 먹었다.", "정말 즐거운 하루였다."] * 3
+    plan = budgeter.plan(overhead="프롬프트", content=" ".join(sentences), max_tokens_cap=400)
+    assert plan.truncated
+    assert plan.content.endswith((".", "!")), "문장 경계에서 잘려야 합니다."
+    assert plan.prompt_tokens + plan.max_tokens <= 100, "프롬프트와 생성 토큰이 모델 윈도우를 넘으면 안 됩니다."
+
+
+def test_token_budget_chunks_cover_whole_content(budgeter):
+    content = " ".join(["가나다라마바사아자차카타파하 문장입니다."] * 10)
+    chunks = budgeter.chunk(overhead="프롬프트", content=content)
+    assert len(chunks) > 1
+    assert all(budgeter.count_tokens(chunk) <= budgeter.max_content_tokens(4) for chunk in chunks)
+    assert " ".join(chunks) == content, "청크를 이어붙이면 원문과 같아야 합니다."
+
+
+def test_token_budget_loads_tokenizer_only_when_asked(monkeypatch):
+    loads = []
+
+    def fake_load(model_path):
+        loads.append(model_path)
+        return _CharTokenizer()
+
+    monkeypatch.setattr("ai_server.util.token_budget.load_tokenizer", fake_load)
+    budgeter = TokenBudgeter(max_model_len=100, model_path="meow-model")
+    assert budgeter.count_tokens("안녕 하세요") == 8, "로드 전에는 바이트 기반 추정치를 써야 합니다."
+    budgeter.plan(overhead="프롬프트", content="안녕하세요", max_tokens_cap=40)
+    assert loads == [], "요청 경로(count_tokens/plan)에서 토크나이저를 로드하면 안 됩니다."
+
+    assert budgeter.load() and loads == ["meow-model"]
+    assert budgeter.count_tokens("안녕 하세요") == 5
+
+
+@pytest.mark.asyncio
+async def test_prompt_with_url_is_preprocessed_once(stub_servers):
+    server, url = stub_servers("냥", choices=["블로그에 글을 올렸다냥!"])
+    content = "오늘 쓴 글이에요 https://blog.example.com/post 놀러 오세요"
+    expected = PostPromptGenerator.preprocess(content)
+    assert "[https://blog.example.com/post]" in expected
+
+    await PostTransformationService(vllm_base_url=url).transform_post(content, Emotion.HAPPY, PostType.CAT)
+    post_prompt = server.last_body["prompt"]
+    await CommentTransformationService(vllm_base_url=url).transform_comment(content, CommentEmotion.NORMAL, CommentType.CAT)
+    comment_prompt = server.last_body["prompt"]
+
+    for prompt in (post_prompt, comment_prompt):
+        assert f"Input: {expected}\n" in prompt, "전처리는 한 번만 적용되어야 합니다."
+        assert "[[" not in prompt
+
+
+# test_post_chunking.py
+@pytest.mark.asyncio
+async def test_post_long_content_is_chunked_and_stitched_in_order(stub_servers):
+    server, url = stub_servers("echo", delay=0.2, echo=True)
+    service = PostTransformationService(vllm_base_url=url)
+    service.token_budgeter = TokenBudgeter(max_model_len=220, tokenizer=_CharTokenizer(), output_ratio=1.0, min_output_tokens=10, safety_margin=0)
+    service.inference_config = service.inference_config.model_copy(update={"post_chunk_concurrency": 2})
+
+    sentences = [f"{i}번째 문장에서는 오늘 산책한 이야기를 합니다." for i in range(6)]
+    start = time.perf_counter()
+    result, engine = await service.transform_post(" ".join(sentences), Emotion.HAPPY, PostType.CAT)
+    elapsed = time.perf_counter() - start
+
+    assert server.hits > 2, "긴 입력은 여러 청크로 나뉘어야 합니다."
+    assert server.max_active == 2, "동시 요청 수가 상한을 넘거나 병렬로 처리되지 않았습니다."
+    assert engine == "llm"
+    assert result.count("냥") == server.hits
+    assert result.replace("냥", "").replace(".", "").split() == " ".join(sentences).replace(".", "").split(), \
+        "청크 결과가 원래 순서대로 이어져야 합니다."
+    assert elapsed < server.hits * 0.2, "청크들이 순차적으로 처리되었습니다."
+
+
+# test_metrics.py
+def test_metrics_histogram_exposition():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "단계 시간", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="prompt_build")
+    histogram.observe(0.5, stage="prompt_build")
+    histogram.observe(5.0, stage="prompt_build")
+
+    text = registry.render()
+    assert 'stage_seconds_bucket{stage="prompt_build",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="prompt_build",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="prompt_build",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="prompt_build"} 3' in text
+
+
+def test_metrics_middleware_uses_route_templates():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, router_prefixes=["/items"])
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        assert HTTP_IN_FLIGHT.get(router="/items") == 1
+        return {"item_id": item_id}
+
+    before = HTTP_REQUESTS.get(method="GET", route="/items/{item_id}", status="200")
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    assert HTTP_REQUESTS.get(method="GET", route="/items/{item_id}", status="200") == before + 2
+    assert HTTP_IN_FLIGHT.get(router="/items") == 0
+
+
+# test_tracing.py
+def test_tracing_server_timing_and_otlp_export(tmp_path):
+    export_path = tmp_path / "traces.jsonl"
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, config=TracingConfig(export="file", export_path=str(export_path)))
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        with stage_timer("prompt_build"):
+            time.sleep(0.01)
+        with span("vllm_request"):
+            await asyncio.gather(asyncio.sleep(0.01), asyncio.sleep(0.01))
+        return {"request_id": get_request_id()}
+
+    client = TestClient(app)
+    response = client.get("/items/1", headers={"X-Request-ID": "req-123"})
+    assert response.headers["x-request-id"] == "req-123"
+    assert response.json() == {"request_id": "req-123"}
+    timing = dict(entry.split(";dur=") for entry in response.headers["server-timing"].split(", "))
+    assert set(timing) == {"prompt_build", "vllm_request", "total"}
+    assert float(timing["prompt_build"]) >= 10.0
+    assert float(timing["total"]) >= float(timing["prompt_build"]) + float(timing["vllm_request"])
+
+    # 트레이스 밖에서는 구간 기록 없이 통과
+    with span("outside") as outside:
+        assert outside is None
+
+    for _ in range(50):
+        if export_path.exists() and export_path.read_text():
+            break
+        time.sleep(0.05)
+    exported = json.loads(export_path.read_text().splitlines()[0])
+    spans = exported["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root = next(s for s in spans if s["name"] == "GET /items/{item_id}")
+    assert {s["name"] for s in spans} == {"GET /items/{item_id}", "prompt_build", "vllm_request"}
+    assert all(s["traceId"] == root["traceId"] for s in spans)
+    assert all(s["parentSpanId"] == root["spanId"] for s in spans if s is not root)
+
+
+# test_profiler.py
+def _busy_regex_loop(stop: threading.Event):
+    import re
+    while not stop.is_set():
+        re.sub(r"(다|요)([.!?]|$)", r"\1냥\2", "오늘 날씨가 좋다. 산책 가요!" * 20)
+
+
+def test_sampling_profiler_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_regex_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        profiler = SamplingProfiler(rate=200, duration=0.3)
+        result = profiler.run()
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = result.splitlines()
+    assert profiler.samples > 10
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines), "collapsed stack 형식이 아닙니다."
+    busy = [line for line in lines if line.startswith("busy-worker;")]
+    assert busy and all("_busy_regex_loop" in line for line in busy)
+
+
+def test_admin_profile_endpoint_requires_token_and_single_run():
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/admin")
+    app.dependency_overrides[get_admin_config] = lambda: AdminConfig(token="secret")
+    client = TestClient(app)
+
+    assert client.post("/admin/profile?duration=0.05").status_code == 403
+    response = client.post("/admin/profile?duration=0.05&rate=100", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert int(response.headers["x-profile-samples"]) > 0
+
+    # 실행 중에는 다른 프로파일 요청을 거절
+    running = threading.Thread(target=SamplingProfiler(rate=50, duration=0.5).run)
+    running.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(ProfilerBusyError):
+            SamplingProfiler(duration=0.05).run()
+        assert client.post("/admin/profile?duration=0.05", headers={"X-Admin-Token": "secret"}).status_code == 409
+    finally:
+        running.join()
+
+    app.dependency_overrides[get_admin_config] = lambda: AdminConfig()
+    assert client.post("/admin/profile", headers={"X-Admin-Token": "secret"}).status_code == 404
+
+
+# test_responses.py
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_fast_json_paths_match_default_bytes(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+    model = ImageSearchResponse(status_code=200, message="이미지 검색 성공 😸", data=["https://example.com/고양이.jpg"])
+    expected = JSONResponse(model.model_dump(mode="json")).body
+
+    assert lean_response(model).body == expected
+    assert lean_response(model).headers["content-type"] == "application/json"
+    assert FastJSONResponse(model.model_dump(mode="json")).body == expected
+
+
+# test_file_lock.py
+def test_run_once_builds_in_a_single_process(tmp_path):
+    lock_path, marker_path = str(tmp_path / ".build.lock"), str(tmp_path / ".build_complete")
+    calls = []
+
+    def slow_build():
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+
+    # flock은 열린 파일 단위라 스레드끼리도 프로세스처럼 배타적으로 동작
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(run_once(lock_path, marker_path, "v1", slow_build)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and sorted(results) == [False, False, False, True]
+    assert run_once(lock_path, marker_path, "v1", slow_build) is False
+    assert run_once(lock_path, marker_path, "v2", slow_build) is True, "데이터가 바뀌면 다시 구축해야 합니다."
+
+    with file_lock(lock_path):
+        with file_lock(lock_path, blocking=False) as acquired:
+            assert acquired is False
+
+
+# test_embedding_worker.py
+def _png_bytes(size: int, color) -> bytes:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_embedding_worker_batches_and_restarts_crashed_worker(tmp_path):
+    import numpy as np
+
+    socket_path = str(tmp_path / "embed.sock")
+    pool = EmbeddingWorkerPool(workers=2, embedder_path="ai_server.model.embedding_worker:load_hash_embedder")
+    server = EmbeddingServer(socket_path, pool)
+    images = [_png_bytes(64, (255, 0, 0)), b"not an image", _png_bytes(64, (0, 0, 255)), _png_bytes(8, (0, 0, 0))]
+
+    async def scenario():
+        await server.start()
+        client = EmbeddingClient(socket_path, timeout=60)
+        try:
+            vectors, errors = await client.embed_with_errors(images)
+            assert vectors.shape == (4, 512)
+            assert errors[0] is None and errors[2] is None
+            assert errors[1] and "너무 작습니다" in errors[3]
+            assert np.isclose(np.linalg.norm(vectors[0]), 1.0) and not np.allclose(vectors[0], vectors[2])
+            with pytest.raises(ValueError):
+                await client.embed(images[:2])
+
+            # 워커가 죽으면 감시 태스크가 다시 띄우고 이후 요청은 정상 처리
+            os.kill(pool.worker_pids()[0], signal.SIGKILL)
+            for _ in range(100):
+                if pool.restarts:
+                    break
+                await asyncio.sleep(0.1)
+            assert pool.restarts == 1
+            results = await asyncio.gather(*(client.embed([images[0]]) for _ in range(4)))
+            assert all(np.allclose(result[0], vectors[0]) for result in results)
+
+
+            # 텍스트 검색어도 같은 워커 풀에서 임베딩
+            texts = await client.embed_texts(["orange cat", "sleepy dog"])
+            assert texts.shape == (2, 512) and np.allclose(texts[0], (await client.embed_texts(["orange cat"]))[0])
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_embedding_worker_crash_loop_backs_off():
+    # 임베더 로드에 실패하는 워커는 시작하자마자 죽음
+    pool = EmbeddingWorkerPool(
+        workers=1,
+        embedder_path="ai_server.model.embedding_worker:missing_embedder",
+        restart_backoff_initial=0.3,
+        restart_backoff_max=0.6,
+    )
+    assert [pool.backoff_delay(n) for n in (1, 2, 3, 4)] == [0.3, 0.6, 0.6, 0.6]
+
+    async def scenario():
+        await pool.start()
+        try:
+            for _ in range(300):
+                worker = pool._workers[0]
+                if worker.failures >= 2 and worker.respawn_at is not None:
+                    break
+                await asyncio.sleep(0.02)
+            assert worker.failures >= 2, "연속으로 죽으면 슬롯의 실패 횟수가 누적되어야 합니다."
+            assert worker.respawn_at - time.monotonic() > 0.3, "두 번째부터는 더 긴 백오프를 기다려야 합니다."
+            with pytest.raises(RuntimeError, match="재시작 대기"):
+                await pool.embed([_png_bytes(64, (255, 0, 0))])
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_image_batch_search_orders_results_and_isolates_item_errors(tmp_path):
+    pytest.importorskip("chromadb")
+    from ai_server.model.image_search import ImageSearchService
+    from ai_server.model.embedding_worker import embed_batch, load_hash_embedder
+
+    embedder = load_hash_embedder()
+
+    class StubEmbeddingClient:
+        calls = 0
+
+        async def embed_with_errors(self, images):
+            StubEmbeddingClient.calls += 1
+            return embed_batch(embedder, images)
+
+        async def embed_texts(self, texts):
+            return embedder.embed_text(texts)
+
+    images = {
+        "https://img/cat-red.png": _png_bytes(64, (255, 0, 0)),
+        "https://img/cat-blue.png": _png_bytes(64, (0, 0, 255)),
+        "https://img/dog-green.png": _png_bytes(64, (0, 255, 0)),
+        "https://img/tiny.png": _png_bytes(8, (0, 0, 0)),
+    }
+
+    def download_image_bytes(url):
+        if url not in images:
+            raise ValueError("이미지 다운로드 실패")
+        return images[url]
+
+    service = ImageSearchService(db_base_path=str(tmp_path), embedding_backend="worker")
+    service.embedding_client = StubEmbeddingClient()
+    service.download_image_bytes = download_image_bytes
+    for animal_type, urls in (("cat", ["https://img/cat-red.png", "https://img/cat-blue.png"]), ("dog", ["https://img/dog-green.png"])):
+        service._ensure_chromadb_initialized(animal_type)
+        vectors, _ = embed_batch(embedder, [images[url] for url in urls])
+        service.collections[animal_type].add(
+            ids=urls,
+            embeddings=vectors.tolist(),
+            metadatas=[{"breed": "persian" if "red" in url else "siamese"} for url in urls],
+        )
+
+    try:
+        results = asyncio.run(service.search_similar_images_batch([
+            ("https://img/cat-blue.png", "cat", 1),
+            ("https://img/missing.png", "cat", 1),
+            ("https://img/dog-green.png", "dog", 1),
+            ("https://img/tiny.png", "dog", 1),
+            ("https://img/cat-red.png", "cat", 2),
+            ("https://img/cat-red.png", "bird", 1),
+            ("https://img/cat-blue.png", "cat", 2, {"breed": "persian"}),
+            ("https://img/cat-red.png", "cat", 2, None, 0.99),
+            ("https://img/cat-red.png", "cat", 2, None, None, 0.5),
+            ("https://img/dog-green.png", "auto", 1),
+        ]))
+    finally:
+        service.cleanup()
+
+    urls = [[match.url for match in result.matches] if not isinstance(result, Exception) else result for result in results]
+    assert urls[0] == ["https://img/cat-blue.png"]
+    assert urls[2] == ["https://img/dog-green.png"]
+    assert urls[4][0] == "https://img/cat-red.png" and len(urls[4]) == 2
+    assert all(isinstance(results[i], ValueError) for i in (1, 3, 5))
+    # 메타데이터 필터와 최소 유사도, 거리/유사도 반환
+    assert urls[6] == ["https://img/cat-red.png"] and results[6].matches[0].metadata["breed"] == "persian"
+    assert urls[7] == ["https://img/cat-red.png"]
+    assert urls[8][0] == "https://img/cat-red.png" and len(urls[8]) == 2
+    # auto 항목은 판별 결과와 함께 반환되거나, 고양이/강아지가 아니면 항목 오류
+    assert isinstance(results[9], ValueError) or results[9].animal.animal_type in ("cat", "dog")
+    assert results[0].matches[0].similarity == pytest.approx(1.0, abs=1e-4)
+    assert results[0].matches[0].distance == pytest.approx(1.0 - results[0].matches[0].similarity)
+    assert results[0].animal is None
+    # 다운로드된 이미지는 한 번의 배치로 임베딩
+    assert StubEmbeddingClient.calls == 1
+
+
+def test_image_db_build_counts_failures_and_removes_stale_entries(tmp_path):
+    pytest.importorskip("chromadb")
+    from ai_server.model.image_search import ImageSearchService
+    from ai_server.model.embedding_worker import load_hash_embedder
+    from ai_server.scripts.build_image_database import BuildStats, ImageDatabaseBuildError, index_url_file
+
+    embedder = load_hash_embedder()
+    images = {"https://img/cat-red.png": _png_bytes(64, (255, 0, 0)), "https://img/cat-blue.png": _png_bytes(64, (0, 0, 255))}
+
+    def download_image_bytes(url):
+        if url not in images:
+            raise ValueError("이미지 다운로드 실패")
+        return images[url]
+
+    service = ImageSearchService(db_base_path=str(tmp_path / "db"), embedding_backend="worker")
+    service.download_image_bytes = download_image_bytes
+    service.extract_query_embedding = lambda image: embedder.embed_text([str(image.getpixel((0, 0)))])[0]
+    url_file = tmp_path / "cat_image_url.txt"
+    url_file.write_text("https://img/cat-red.png persian\nhttps://img/cat-blue.png\nhttps://img/broken.png\n", encoding="utf-8")
+    try:
+        service._ensure_chromadb_initialized("cat")
+        collection = service.collections["cat"]
+        # 이전 구축에서 남은 항목: 파일에서 빠진 URL은 지우고, 일시적으로 실패한 URL은 남김
+        collection.add(ids=["https://img/removed.png", "https://img/broken.png"], embeddings=embedder.embed_text(["a", "b"]).tolist())
+
+        stats = BuildStats()
+        index_url_file(service, "cat", url_file, stats=stats)
+        ids = set(collection.get(include=[])["ids"])
+    finally:
+        service.cleanup()
+
+    assert (stats.indexed, stats.failed, stats.removed) == (2, 1, 1)
+    assert ids == {"https://img/cat-red.png", "https://img/cat-blue.png", "https://img/broken.png"}
+    stats.check(max_failure_ratio=0.5)
+    with pytest.raises(ImageDatabaseBuildError):
+        stats.check(max_failure_ratio=0.2)
+    with pytest.raises(ImageDatabaseBuildError):
+        BuildStats(indexed=0, failed=3).check()
+
+    # 구축이 실패하면 완료 표시를 남기지 않아 다음 시작 때 다시 시도
+    lock_path, marker_path = str(tmp_path / ".build.lock"), str(tmp_path / ".build_complete")
+
+    def failing_build():
+        BuildStats(failed=3).check()
+
+    with pytest.raises(ImageDatabaseBuildError):
+        run_once(lock_path, marker_path, "v1", failing_build)
+    assert not os.path.exists(marker_path)
+    assert run_once(lock_path, marker_path, "v1", lambda: None) is True
+
+
+def test_image_upload_search_accepts_multipart_and_raw_bytes_with_size_cap():
+    pytest.importorskip("chromadb")
+    from ai_server.router.images import router as images_router
+    from ai_server.model.image_search import get_image_search_service, MAX_IMAGE_BYTES
+    from ai_server.schemas.image_schemas import ImageMatch
+    from starlette import formparsers
+    from starlette.datastructures import UploadFile
+
+    received = []
+
+    class StubImageSearchService:
+        async def search_similar_image_bytes_async(self, image_bytes, animal_type, n_results, **filters):
+            received.append((image_bytes, animal_type, n_results))
+            if image_bytes == b"broken":
+                raise ValueError("이미지 디코딩 실패")
+            return [ImageMatch(url=f"https://img/{animal_type}-{i}.png", similarity=0.9, distance=0.1) for i in range(n_results)], None
+
+    app = FastAPI()
+    app.include_router(images_router, prefix="/images")
+    app.dependency_overrides[get_image_search_service] = StubImageSearchService
+    client = TestClient(app)
+    image = _png_bytes(64, (255, 0, 0))
+
+    response = client.post("/images/search/upload?animal_type=cat&n_results=2", files={"file": ("cat.png", image, "image/png")})
+    assert response.status_code == 200
+    assert response.json()["data"] == ["https://img/cat-0.png", "https://img/cat-1.png"]
+
+    response = client.post("/images/search/upload?animal_type=dog", content=image, headers={"content-type": "image/png"})
+    assert response.status_code == 200 and len(response.json()["data"]) == 3
+    assert received[0][0] == image and received[1] == (image, "dog", 3)
+
+    assert client.post("/images/search/upload?animal_type=cat", content=b"broken", headers={"content-type": "application/octet-stream"}).status_code == 400
+    assert client.post("/images/search/upload?animal_type=cat", content=b"x", headers={"content-type": "text/plain"}).status_code == 415
+
+    # Content-Length가 없는 청크 스트림도 상한을 넘으면 중단
+    def oversized():
+        for _ in range(MAX_IMAGE_BYTES // (1024 * 1024) + 1):
+            yield b"\0" * (1024 * 1024)
+    response = client.post("/images/search/upload?animal_type=cat", content=oversized(), headers={"content-type": "image/png"})
+    assert response.status_code == 413
+
+    # multipart도 파서가 본문 전체를 받기 전에 중단 (Content-Length 없는 청크 전송, 20MB)
+    chunks = [b'--meow\r\nContent-Disposition: form-data; name="file"; filename="big.png"\r\nContent-Type: image/png\r\n\r\n']
+    chunks += [b"\0" * (1024 * 1024)] * 20 + [b"\r\n--meow--\r\n"]
+    consumed, sent = [], []
+
+    async def receive():
+        if len(consumed) == len(chunks):
+            return {"type": "http.disconnect"}
+        consumed.append(len(chunks[len(consumed)]))
+        return {"type": "http.request", "body": chunks[len(consumed) - 1], "more_body": len(consumed) < len(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http", "root_path": "",
+        "path": "/images/search/upload", "raw_path": b"/images/search/upload", "query_string": b"animal_type=cat",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=meow")],
+        "server": ("testserver", 80), "client": ("testclient", 50000),
+    }
+    opened = []
+
+    class RecordingUploadFile(UploadFile):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(formparsers, "UploadFile", RecordingUploadFile)
+        asyncio.run(app(scope, receive, send))
+    assert sent[0]["status"] == 413
+    assert sum(consumed) <= MAX_IMAGE_BYTES + 2 * 1024 * 1024, "상한을 넘은 뒤에는 본문을 더 읽지 않아야 합니다."
+    assert opened and all(upload.file.closed for upload in opened), "중단된 파싱의 임시 파일은 닫아야 합니다."
+    assert len(received) == 3
+
+
+def test_build_where_combines_equality_filters():
+    pytest.importorskip("chromadb")
+    from ai_server.model.image_search import build_where
+
+    assert build_where(None) is None and build_where({}) is None
+    assert build_where({"breed": "persian"}) == {"breed": "persian"}
+    assert build_where({"breed": "persian", "width": 512}) == {"$and": [{"breed": "persian"}, {"width": 512}]}
+    assert build_where({"$or": [{"breed": "a"}, {"breed": "b"}]}) == {"$or": [{"breed": "a"}, {"breed": "b"}]}
+
+
+def test_near_duplicate_images_collapse_into_canonical_entry():
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    photo = Image.fromarray(rng.integers(0, 256, (16, 16, 3), dtype=np.uint8)).resize((256, 256), Image.Resampling.BICUBIC)
+    other = Image.fromarray(rng.integers(0, 256, (16, 16, 3), dtype=np.uint8)).resize((256, 256), Image.Resampling.BICUBIC)
+    buffer = io.BytesIO()
+    photo.resize((180, 180)).save(buffer, format="JPEG", quality=70)
+    recompressed = Image.open(io.BytesIO(buffer.getvalue()))
+
+    # 리사이즈/재압축한 사진은 해시가 가깝고 다른 사진은 멀다
+    hashes = np.array([dhash(photo)], dtype=np.uint64)
+    assert hamming_distances(dhash(recompressed), hashes)[0] <= 6
+    assert hamming_distances(dhash(other), hashes)[0] > 16
+
+    embedding = rng.normal(size=512)
+    index = DuplicateIndex()
+    assert index.add("a.jpg", dhash(photo), embedding, content_hash="h1") is None
+    assert index.add("b.jpg", dhash(other), rng.normal(size=512), content_hash="h2") is None
+    # 해시는 가깝고 임베딩도 거의 같으면 중복
+    assert index.add("a_copy.jpg", dhash(recompressed), embedding + rng.normal(scale=0.01, size=512), content_hash="h3") == "a.jpg"
+    # 해시는 가깝지만 임베딩이 다르면 별개 이미지
+    assert index.add("c.jpg", dhash(recompressed), rng.normal(size=512), content_hash="h4") is None
+    # 같은 바이트는 항상 중복
+    assert index.add("b_again.jpg", 0, rng.normal(size=512), content_hash="h2") == "b.jpg"
+
+    summary = index.summary
+    assert (summary.total, summary.unique, summary.duplicates) == (5, 3, 2)
+    assert summary.groups == {"a.jpg": ["a_copy.jpg"], "b.jpg": ["b_again.jpg"]}
+
+
+def test_mmr_rerank_skips_redundant_candidates():
+    import numpy as np
+
+    rng = np.random.default_rng(1)
+    query = rng.normal(size=64)
+    base = query + rng.normal(scale=0.3, size=64)
+    # 0, 1은 거의 같은 이미지(쿼리와 가장 유사), 2는 조금 덜 유사하지만 다른 이미지
+    candidates = np.stack([base, base + rng.normal(scale=0.01, size=64), query + rng.normal(scale=0.6, size=64), rng.normal(size=64)])
+
+    assert mmr(query, candidates, 3, diversity=0.0) == [0, 1, 2]
+    assert mmr(query, candidates, 2, diversity=0.5) == [0, 2]
+    assert mmr(query, candidates, 10, diversity=0.5)[:2] == [0, 2] and len(mmr(query, candidates, 10, diversity=0.5)) == 4
+    assert mmr(query, candidates[:0], 3) == []
+    with pytest.raises(ValueError):
+        mmr(query, candidates, 3, diversity=1.5)
+
+
+def test_min_similarity_filters_candidates_before_mmr(tmp_path):
+    pytest.importorskip("chromadb")
+    import numpy as np
+    from ai_server.model.image_search import ImageSearchService
+
+    def unit(*values):
+        vector = np.array(values, dtype=np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    service = ImageSearchService(db_base_path=str(tmp_path), embedding_backend="worker")
+    try:
+        service._ensure_chromadb_initialized("cat")
+        # a/a2는 거의 같은 이미지, b는 유사하지만 다른 이미지, far는 임계값 미만이지만 가장 다른 이미지
+        service.collections["cat"].add(
+            ids=["a", "a2", "b", "far"],
+            embeddings=[unit(1, 0.05, 0), unit(1, 0.06, 0.01), unit(0.9, 0, 0.436), unit(0.2, -0.98, 0)],
+        )
+        query = np.array([unit(1, 0, 0)], dtype=np.float32)
+        [matches] = service.search_chromadb_batch(query, "cat", [2], min_similarity=[0.8], diversity=[0.9])
+        assert [match.url for match in matches] == ["a", "b"], "임계값을 넘는 후보 중에서 MMR로 n개를 골라야 합니다."
+    finally:
+        service.cleanup()
+
+
+def test_text_embedding_cache_batches_misses_and_serves_hits():
+    import numpy as np
+
+    calls = []
+
+    async def embed(texts):
+        calls.append(list(texts))
+        if "boom" in texts:
+            raise RuntimeError("embedding failed")
+        return np.stack([np.full(4, len(text), dtype=np.float32) for text in texts])
+
+    async def scenario():
+        cache = TextEmbeddingCache(embed, maxsize=2, max_batch=8, max_wait=0.01)
+        # 동시에 들어온 검색어는 한 배치로, 같은 검색어(정규화 후)는 한 번만 계산
+        vectors = await asyncio.gather(cache.get("Orange  Cat"), cache.get("orange cat"), cache.get("sleepy dog"))
+        assert calls == [["orange cat", "sleepy dog"]]
+        assert vectors[0] is vectors[1] and vectors[2][0] == len("sleepy dog")
+
+        # 캐시 적중은 임베딩 호출 없음
+        await cache.get("ORANGE cat")
+        assert len(calls) == 1
+
+        # LRU: 가장 오래 안 쓴 검색어부터 제거
+        await cache.get("fluffy")
+        assert len(cache) == 2
+        await cache.get("sleepy dog")
+        assert calls[-1] == ["sleepy dog"]
+
+        # 배치 크기에 도달하면 대기 없이 바로 실행
+        cache.max_batch = 2
+        await asyncio.wait_for(asyncio.gather(cache.get("a"), cache.get("b")), timeout=0.005 + 0.5)
+
+        with pytest.raises(RuntimeError):
+            await cache.get("boom")
+        with pytest.raises(ValueError):
+            await cache.get("   ")
+
+    asyncio.run(scenario())
+
+
+def test_text_search_queries_both_collections_with_cached_embedding(tmp_path):
+    pytest.importorskip("chromadb")
+    from ai_server.model.image_search import ImageSearchService
+    from ai_server.model.embedding_worker import load_hash_embedder
+
+    embedder = load_hash_embedder()
+
+    class StubEmbeddingClient:
+        text_calls = 0
+
+        async def embed_texts(self, texts):
+            StubEmbeddingClient.text_calls += 1
+            return embedder.embed_text(texts)
+
+    service = ImageSearchService(db_base_path=str(tmp_path), embedding_backend="worker")
+    service.embedding_client = StubEmbeddingClient()
+    try:
+        for animal_type in ("cat", "dog"):
+            service._ensure_chromadb_initialized(animal_type)
+        # 검색어와 같은 벡터를 가진 이미지를 dog 컬렉션에 둠
+        service.collections["dog"].add(ids=["https://img/dog-match.png"], embeddings=embedder.embed_text(["sleepy dog"]).tolist())
+        service.collections["dog"].add(ids=["https://img/dog-other.png"], embeddings=embedder.embed_text(["other"]).tolist())
+        service.collections["cat"].add(ids=["https://img/cat-other.png"], embeddings=embedder.embed_text(["cat"]).tolist())
+
+        matches = asyncio.run(service.search_by_text("Sleepy  Dog", n_results=2))
+        assert matches[0].url == "https://img/dog-match.png" and matches[0].animal_type == "dog"
+        assert matches[0].similarity == pytest.approx(1.0, abs=1e-4) and len(matches) == 2
+
+        cat_only = asyncio.run(service.search_by_text("sleepy dog", animal_types=("cat",), n_results=3))
+        assert [match.url for match in cat_only] == ["https://img/cat-other.png"]
+        assert StubEmbeddingClient.text_calls == 1
+    finally:
+        service.cleanup()
+
+
+def test_text_search_diversifies_across_collections_once(tmp_path):
+    pytest.importorskip("chromadb")
+    import numpy as np
+    from ai_server.model.image_search import ImageSearchService
+    from ai_server.model.embedding_worker import load_hash_embedder
+
+    embedder = load_hash_embedder()
+
+    class StubEmbeddingClient:
+        async def embed_texts(self, texts):
+            return embedder.embed_text(texts)
+
+    query = embedder.embed_text(["sleepy dog"])[0]
+    other = embedder.embed_text(["cat on a sofa"])[0]
+    other = other - (other @ query) * query
+    other /= np.linalg.norm(other)
+    near_duplicate = query + 0.05 * other
+    distinct = 0.7 * query + 0.71 * other
+
+    service = ImageSearchService(db_base_path=str(tmp_path), embedding_backend="worker")
+    service.embedding_client = StubEmbeddingClient()
+    try:
+        for animal_type in ("cat", "dog"):
+            service._ensure_chromadb_initialized(animal_type)
+        service.collections["dog"].add(
+            ids=["https://img/dog-a.png", "https://img/dog-a-copy.png"],
+            embeddings=[query.tolist(), (near_duplicate / np.linalg.norm(near_duplicate)).tolist()],
+        )
+        service.collections["cat"].add(ids=["https://img/cat.png"], embeddings=[(distinct / np.linalg.norm(distinct)).tolist()])
+
+        plain = asyncio.run(service.search_by_text("sleepy dog", n_results=2))
+        diverse = asyncio.run(service.search_by_text("sleepy dog", n_results=2, diversity=0.7))
+        filtered = asyncio.run(service.search_by_text("sleepy dog", n_results=2, diversity=0.7, min_similarity=0.9))
+    finally:
+        service.cleanup()
+
+    assert [match.url for match in plain] == ["https://img/dog-a.png", "https://img/dog-a-copy.png"]
+    # 합친 후보 풀에서 MMR을 적용하므로 거의 같은 이미지 대신 다른 컬렉션의 결과가 두 번째로 선택됨
+    assert [match.url for match in diverse] == ["https://img/dog-a.png", "https://img/cat.png"]
+    assert diverse[1].animal_type == "cat"
+    assert [match.url for match in filtered] == ["https://img/dog-a.png", "https://img/dog-a-copy.png"]
+
+
+def test_zero_shot_classifier_picks_closest_prompt():
+    import numpy as np
+    from ai_server.model.embedding_worker import load_hash_embedder
+
+    embedder = load_hash_embedder()
+    classifier = ZeroShotClassifier()
+    with pytest.raises(RuntimeError):
+        classifier.classify(np.ones(512))
+
+    asyncio.run(classifier.ensure_ready(lambda texts: asyncio.sleep(0, embedder.embed_text(texts))))
+    assert classifier.prompts[:2] == ["a photo of a cat", "a photo of a dog"] and "hamster" in ANIMAL_LABELS
+    prompt_embeddings = embedder.embed_text(classifier.prompts)
+    noise = np.random.default_rng(0).normal(scale=0.02, size=(2, 512))
+    dog, hamster = classifier.classify(prompt_embeddings[[1, 2]] + noise)
+
+    assert dog.animal_type == "dog" and dog.confidence > 0.9
+    assert hamster.animal_type == "hamster"
+    assert sum(dog.scores.values()) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_auto_animal_type_routes_to_predicted_collection(tmp_path):
+    pytest.importorskip("chromadb")
+    import numpy as np
+    from ai_server.model.image_search import ImageSearchService
+    from ai_server.model.embedding_worker import load_hash_embedder
+
+    embedder = load_hash_embedder()
+    prompts = embedder.embed_text([f"a photo of a {label}" for label in ANIMAL_LABELS])
+    query_vectors = {b"dog-photo": prompts[1], b"hamster-photo": prompts[2]}
+
+    class StubEmbeddingClient:
+        async def embed_texts(self, texts):
+            return embedder.embed_text(texts)
+
+    async def embed_image_bytes(images):
+        return np.stack([query_vectors[data] for data in images]), [None] * len(images)
+
+    service = ImageSearchService(db_base_path=str(tmp_path), embedding_backend="worker")
+    service.embedding_client = StubEmbeddingClient()
+    service.embed_image_bytes = embed_image_bytes
+    try:
+        for animal_type in ("cat", "dog"):
+            service._ensure_chromadb_initialized(animal_type)
+            service.collections[animal_type].add(ids=[f"https://img/{animal_type}.png"], embeddings=[prompts[0 if animal_type == "cat" else 1].tolist()])
+
+        matches, animal = asyncio.run(service.search_similar_image_bytes_async(b"dog-photo", "auto", n_results=1))
+        assert animal.animal_type == "dog" and animal.confidence > 0.9
+        assert [match.url for match in matches] == ["https://img/dog.png"]
+
+        # 지정한 동물 타입은 판별하지 않음
+        matches, animal = asyncio.run(service.search_similar_image_bytes_async(b"dog-photo", "cat", n_results=1))
+        assert animal is None and matches[0].url == "https://img/cat.png"
+
+        # 검색 컬렉션이 없는 동물 사진은 400 대상 (ValueError)
+        with pytest.raises(ValueError, match="hamster"):
+            asyncio.run(service.search_similar_image_bytes_async(b"hamster-photo", "auto"))
+    finally:
+        service.cleanup()